@@ -14,6 +14,7 @@ from pathlib import Path
 from datetime import timedelta
 import os
 import dj_database_url
+from corsheaders.defaults import default_headers
 
 
 def _csv_env(name, default=''):
@@ -140,6 +141,15 @@ STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Largest file accepted by the resumable upload API (0 = no limit).
+CHUNKED_UPLOAD_MAX_BYTES = int(os.getenv('CHUNKED_UPLOAD_MAX_BYTES', str(10 * 1024 * 1024 * 1024)))
+
+# Hand /media/ downloads to the front proxy instead of streaming them from a
+# worker: 'x-accel' (nginx, internal location at MEDIA_ACCEL_PREFIX aliased to
+# MEDIA_ROOT) or 'x-sendfile' (Apache/lighttpd). Empty serves from Django.
+MEDIA_ACCEL_MODE = os.getenv('MEDIA_ACCEL_MODE', '').strip().lower()
+MEDIA_ACCEL_PREFIX = os.getenv('MEDIA_ACCEL_PREFIX', '/protected-media/')
+
 # Celery
 CELERY_BROKER_URL = os.getenv("CELERY_BROKER_URL", os.getenv("REDIS_URL", "redis://localhost:6379/0"))
 CELERY_RESULT_BACKEND = os.getenv("CELERY_RESULT_BACKEND", CELERY_BROKER_URL)
@@ -149,9 +159,67 @@ CELERY_RESULT_SERIALIZER = "json"
 CELERY_TASK_ALWAYS_EAGER = os.getenv("CELERY_TASK_ALWAYS_EAGER", "False") == "True"
 CELERY_TASK_EAGER_PROPAGATES = os.getenv("CELERY_TASK_EAGER_PROPAGATES", "False") == "True"
 
+# Job progress ticks are coalesced: at most one write per interval unless
+# progress jumps by PROGRESS_MIN_STEP points. Hot progress goes to Redis
+# (the broker by default; set PROGRESS_REDIS_URL='' to use the database only).
+PROGRESS_MIN_INTERVAL_MS = int(os.getenv('PROGRESS_MIN_INTERVAL_MS', '1000'))
+PROGRESS_MIN_STEP = int(os.getenv('PROGRESS_MIN_STEP', '5'))
+CANCEL_CHECK_INTERVAL_MS = int(os.getenv('CANCEL_CHECK_INTERVAL_MS', '2000'))
+PROGRESS_REDIS_URL = os.getenv(
+    'PROGRESS_REDIS_URL',
+    CELERY_BROKER_URL if CELERY_BROKER_URL.startswith('redis') else '',
+)
+
+# Each /api/jobs/<id>/events stream holds one gunicorn thread while open
+# (WSGI). Keep this well below the --threads value in the Dockerfile; extra
+# clients get 503 and poll JobDetailView instead.
+SSE_MAX_STREAMS = int(os.getenv('SSE_MAX_STREAMS', '4'))
+
+# A job whose archive has been 'building' this long without a status change
+# is rebuilt on the next download request (its worker most likely died).
+ARCHIVE_BUILD_STALE_SECONDS = int(os.getenv('ARCHIVE_BUILD_STALE_SECONDS', '3600'))
+
 # Keep job outputs for at most N days (cleanup task will delete old folders).
 JOB_RETENTION_DAYS = 2
 
+# Word-level transcripts cached by audio fingerprint (LRU, bounded in bytes).
+ASR_CACHE_DIR = MEDIA_ROOT / 'asr_cache'
+ASR_CACHE_MAX_BYTES = int(os.getenv('ASR_CACHE_MAX_BYTES', str(512 * 1024 * 1024)))
+
+# Downloaded YouTube sources shared across jobs, keyed by (video id, format).
+# Jobs hardlink from here; set SOURCE_CACHE_MAX_BYTES=0 to disable.
+SOURCE_CACHE_DIR = MEDIA_ROOT / 'source_cache'
+SOURCE_CACHE_MAX_BYTES = int(os.getenv('SOURCE_CACHE_MAX_BYTES', str(20 * 1024 * 1024 * 1024)))
+
+# Dedicated ASR worker: when ASR_WORKER_QUEUE is set, transcription is sent to
+# that queue instead of loading Whisper in every job worker. Run it with one
+# process holding the models, e.g.
+#   celery -A clipper worker -Q asr --pool=threads --concurrency=2
+# with ASR_PRELOAD_MODELS=small,medium. MEDIA_ROOT must be shared.
+ASR_WORKER_QUEUE = os.getenv('ASR_WORKER_QUEUE', '').strip()
+ASR_WORKER_TIMEOUT = int(os.getenv('ASR_WORKER_TIMEOUT', '3600'))
+# Models loaded when a worker starts (warm-up), in the process that runs
+# tasks. Under the default prefork pool every child loads its own copy, so set
+# this only on the ASR worker above (--pool=threads or --pool=solo). Loaded
+# models are kept in an LRU cache bounded by WHISPER_MODEL_CACHE_MAX_BYTES
+# (env, read by clips.stt).
+ASR_PRELOAD_MODELS = _csv_env('ASR_PRELOAD_MODELS', '')
+
+# Download YouTube sources as fragmented MP4 through ffmpeg and start cutting
+# clips while the download is still running. Trade-offs: portrait jobs skip
+# the shared pose index (the source is incomplete when clips start), so each
+# clip samples its own crop track; and full-audio auto captions transcribe
+# before any clip starts, from the audio-only fetch or, if that fails, after
+# the whole download. Leave it off when most jobs are portrait or full-audio
+# captions.
+PROGRESSIVE_DOWNLOAD = os.getenv('PROGRESSIVE_DOWNLOAD', 'False') == 'True'
+
+# Clips processed concurrently per job (split, subtitles, reframe, burn).
+CLIP_PROCESSING_WORKERS = int(os.getenv('CLIP_PROCESSING_WORKERS', '2'))
+# Concurrent yt-dlp processes for download_sections jobs. Sections download on
+# their own pool, ahead of (and independent from) CLIP_PROCESSING_WORKERS.
+SECTION_DOWNLOAD_WORKERS = int(os.getenv('SECTION_DOWNLOAD_WORKERS', '3'))
+
 CELERY_BEAT_SCHEDULE = {
     'cleanup-old-jobs-daily': {
         'task': 'clips.tasks.cleanup_old_jobs',
@@ -162,6 +230,9 @@ CELERY_BEAT_SCHEDULE = {
 # CORS Settings
 CORS_ALLOWED_ORIGINS = _csv_env('CORS_ALLOWED_ORIGINS', 'http://localhost:5173,http://127.0.0.1:5173')
 CORS_ALLOW_CREDENTIALS = True
+# Resumable uploads send and read these across origins.
+CORS_ALLOW_HEADERS = (*default_headers, 'upload-offset', 'upload-length')
+CORS_EXPOSE_HEADERS = ['Upload-Offset', 'Upload-Length', 'Location']
 
 CSRF_TRUSTED_ORIGINS = _csv_env('CSRF_TRUSTED_ORIGINS', 'http://localhost:5173')
 
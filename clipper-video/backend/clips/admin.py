@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Video, Clip, Job
+from .models import Video, Clip, Job, JobOutput, JobUpload
 
 
 @admin.register(Video)
@@ -24,3 +24,18 @@ class JobAdmin(admin.ModelAdmin):
     list_filter = ['status', 'created_at']
     search_fields = ['youtube_url']
     readonly_fields = ['created_at', 'updated_at']
+
+
+@admin.register(JobOutput)
+class JobOutputAdmin(admin.ModelAdmin):
+    list_display = ['filename', 'job', 'kind', 'clip_index', 'size', 'updated_at']
+    list_filter = ['kind']
+    search_fields = ['filename']
+    readonly_fields = ['created_at', 'updated_at']
+
+
+@admin.register(JobUpload)
+class JobUploadAdmin(admin.ModelAdmin):
+    list_display = ['id', 'filename', 'offset', 'size', 'finalized_at', 'created_at']
+    search_fields = ['filename']
+    readonly_fields = ['created_at', 'updated_at']
@@ -0,0 +1,149 @@
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from django.conf import settings
+
+from .utils import run_command
+
+CACHE_SUFFIX = '.jsonl'
+# Written next to decoded PCM: the fingerprint of the audio it came from.
+FINGERPRINT_SUFFIX = '.fingerprint'
+
+
+def get_cache_dir() -> Path:
+    return Path(getattr(settings, 'ASR_CACHE_DIR', Path(settings.MEDIA_ROOT) / 'asr_cache'))
+
+
+def get_cache_max_bytes() -> int:
+    return int(getattr(settings, 'ASR_CACHE_MAX_BYTES', 512 * 1024 * 1024))
+
+
+def fingerprint_path(input_path: str) -> Path:
+    return Path(f'{input_path}{FINGERPRINT_SUFFIX}')
+
+
+def parse_fingerprint(output: str) -> Optional[str]:
+    """The digest from ffmpeg hash muxer output, or None."""
+    line = output.strip().splitlines()[-1] if output.strip() else ''
+    if line.startswith('SHA256='):
+        return line.split('=', 1)[1]
+    return None
+
+
+def audio_fingerprint(input_path: str) -> str:
+    """Hash the audio packets of input_path, independent of the container.
+
+    Uses ffmpeg's hash muxer with stream copy, so nothing is decoded. Raw
+    PCM cannot be demuxed; services.extract_audio_pcm leaves the source's
+    fingerprint beside it instead. Falls back to hashing the raw file bytes
+    when neither is available.
+    """
+    try:
+        return fingerprint_path(input_path).read_text(encoding='ascii').strip() or _demuxed_fingerprint(input_path)
+    except OSError:
+        return _demuxed_fingerprint(input_path)
+
+
+def _demuxed_fingerprint(input_path: str) -> str:
+    try:
+        output = run_command([
+            'ffmpeg',
+            '-v', 'error',
+            '-i', str(input_path),
+            '-map', '0:a:0',
+            '-c', 'copy',
+            '-f', 'hash',
+            '-hash', 'sha256',
+            '-',
+        ])
+        fingerprint = parse_fingerprint(output)
+        if fingerprint:
+            return fingerprint
+    except Exception:
+        pass
+
+    digest = hashlib.sha256()
+    with open(input_path, 'rb') as handle:
+        for chunk in iter(lambda: handle.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return f'file-{digest.hexdigest()}'
+
+
+def make_cache_key(fingerprint: str, language: str, model_size: str, params: Dict[str, Any]) -> str:
+    raw = json.dumps(
+        {
+            'audio': fingerprint,
+            'language': language or '',
+            'model': model_size,
+            'params': params,
+        },
+        sort_keys=True,
+    )
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+def _cache_path(key: str) -> Path:
+    return get_cache_dir() / key[:2] / f'{key}{CACHE_SUFFIX}'
+
+
+def load_words(key: str) -> Optional[List[Dict[str, Any]]]:
+    path = _cache_path(key)
+    try:
+        with open(path, 'r', encoding='utf-8') as handle:
+            words = [json.loads(line) for line in handle if line.strip()]
+    except (OSError, ValueError):
+        return None
+    try:
+        # Touch on hit so eviction is least-recently-used.
+        os.utime(path, None)
+    except OSError:
+        pass
+    return words
+
+
+def store_words(key: str, words: List[Dict[str, Any]]) -> None:
+    path = _cache_path(key)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Unique per call: clip workers in one process may store the same key.
+    with tempfile.NamedTemporaryFile(
+        'w', encoding='utf-8', dir=path.parent, prefix=f'{path.name}.', suffix='.tmp', delete=False
+    ) as handle:
+        tmp_path = Path(handle.name)
+        try:
+            for word in words:
+                handle.write(json.dumps(word, ensure_ascii=False, separators=(',', ':')))
+                handle.write('\n')
+        except BaseException:
+            handle.close()
+            tmp_path.unlink(missing_ok=True)
+            raise
+    tmp_path.replace(path)
+    evict(get_cache_max_bytes())
+
+
+def evict(max_bytes: int) -> int:
+    """Delete least-recently-used entries until the cache fits max_bytes."""
+    cache_dir = get_cache_dir()
+    if not cache_dir.exists():
+        return 0
+    entries = []
+    total = 0
+    for path in cache_dir.glob(f'*/*{CACHE_SUFFIX}'):
+        try:
+            stat = path.stat()
+        except OSError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+        total += stat.st_size
+    removed = 0
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        path.unlink(missing_ok=True)
+        total -= size
+        removed += 1
+    return removed
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from clips.manifest import job_dir_for, record_output
+from clips.models import Job
+
+
+class Command(BaseCommand):
+    help = 'Record the output files of done jobs that finished before the manifest existed.'
+
+    def handle(self, *args, **options):
+        jobs = recorded = 0
+        for job in Job.objects.filter(status='done', outputs__isnull=True).iterator():
+            job_dir = job_dir_for(job)
+            if not job_dir.is_dir():
+                continue
+            jobs += 1
+            for path in sorted(job_dir.iterdir()):
+                if not path.is_file() or path.suffix.lower() == '.zip':
+                    continue
+                record_output(job, path)
+                recorded += 1
+        self.stdout.write(self.style.SUCCESS(f'Recorded {recorded} files for {jobs} jobs.'))
@@ -0,0 +1,83 @@
+import hashlib
+import re
+import zlib
+from pathlib import Path
+
+from django.conf import settings
+
+from .models import JobOutput
+
+CLIP_INDEX_RE = re.compile(r'^clip_(\d{3})')
+VIDEO_SUFFIXES = {'.mp4', '.mov', '.m4a', '.webm', '.mkv'}
+
+
+def job_dir_for(job):
+    return Path(settings.MEDIA_ROOT) / 'jobs' / str(job.id)
+
+
+def classify(filename):
+    """Return (kind, clip_index) for a job output filename."""
+    name = Path(filename)
+    match = CLIP_INDEX_RE.match(name.name)
+    clip_index = int(match.group(1)) if match else None
+    suffix = name.suffix.lower()
+    if name.name.endswith('_words.json'):
+        kind = 'words'
+    elif suffix == '.srt':
+        kind = 'srt'
+    elif suffix == '.zip':
+        kind = 'archive'
+    elif suffix in VIDEO_SUFFIXES:
+        kind = 'video'
+    else:
+        kind = 'other'
+    return kind, clip_index
+
+
+def file_checksums(path):
+    """Return (sha256 hex, crc32) in one read; the CRC is reused by zip streaming."""
+    digest = hashlib.sha256()
+    crc = 0
+    with open(path, 'rb') as handle:
+        for chunk in iter(lambda: handle.read(1024 * 1024), b''):
+            digest.update(chunk)
+            crc = zlib.crc32(chunk, crc)
+    return digest.hexdigest(), crc
+
+
+def record_output(job, path, checksums=None):
+    """Add or refresh the manifest row for a file the job just wrote.
+
+    Pass checksums=(sha256 hex, crc32) when they were computed while writing.
+    """
+    path = Path(path)
+    kind, clip_index = classify(path.name)
+    checksum, crc = checksums or file_checksums(path)
+    output, _ = JobOutput.objects.update_or_create(
+        job=job,
+        filename=path.name,
+        defaults={
+            'kind': kind,
+            'clip_index': clip_index,
+            'size': path.stat().st_size,
+            'checksum': checksum,
+            'crc32': crc,
+        },
+    )
+    return output
+
+
+def remove_output(job, filename):
+    JobOutput.objects.filter(job=job, filename=filename).delete()
+
+
+def job_outputs(job, kinds=None):
+    """Manifest rows for a job, ordered by filename.
+
+    Jobs that finished before the manifest existed are recorded once by
+    `manage.py backfill_job_outputs`, so this never looks at the job dir.
+    """
+    outputs = job.outputs.all()
+    if kinds:
+        outputs = outputs.filter(kind__in=kinds)
+    return outputs
@@ -0,0 +1,205 @@
+import mimetypes
+import re
+from pathlib import Path
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.utils._os import safe_join
+from django.utils.http import quote_etag
+
+from .models import JobOutput
+
+JOB_OUTPUT_RE = re.compile(r'^jobs/(?P<job_id>[0-9a-f-]{36})/(?P<filename>[^/]+)$')
+# Caches live under MEDIA_ROOT but are internal, never served.
+PRIVATE_MEDIA_DIRS = {'asr_cache', 'source_cache'}
+# Per-job scratch space (uploads, intermediate files) is never served either.
+PRIVATE_JOB_SUBDIRS = {'work'}
+
+
+def resolve_public_media(path):
+    """Resolve a /media/ path to a servable file or raise Http404.
+
+    The private-dir checks run on the resolved path so '..', '.' or
+    symlinks cannot reach the caches or a job's work dir.
+    """
+    segments = path.replace('\\', '/').split('/')
+    if any(segment in ('.', '..') for segment in segments):
+        raise Http404('File tidak ditemukan')
+    media_root = Path(settings.MEDIA_ROOT).resolve()
+    try:
+        full_path = Path(safe_join(media_root, path.lstrip('/'))).resolve()
+        parts = full_path.relative_to(media_root).parts
+    except (SuspiciousFileOperation, ValueError):
+        raise Http404('File tidak ditemukan')
+    if not parts or parts[0] in PRIVATE_MEDIA_DIRS:
+        raise Http404('File tidak ditemukan')
+    if parts[0] == 'jobs' and len(parts) > 2 and parts[2] in PRIVATE_JOB_SUBDIRS:
+        raise Http404('File tidak ditemukan')
+    if not full_path.is_file():
+        raise Http404('File tidak ditemukan')
+    return full_path
+
+
+def iter_file_range(path, start, end, chunk_size=1024 * 1024):
+    with open(path, 'rb') as handle:
+        handle.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = handle.read(min(chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def range_allowed(request, etag):
+    """If-Range needs a strong match; otherwise the full body is sent."""
+    if_range = request.headers.get('If-Range')
+    return if_range is None or (if_range == etag and not etag.startswith('W/'))
+
+
+def ranged_response(request, size, etag, iter_range, content_type, filename=None):
+    """Stream iter_range(start, end) as a 200 or 206 response for Range/If-Range."""
+    byte_range = None
+    if range_allowed(request, etag):
+        byte_range = parse_byte_range(request.headers.get('Range'), size)
+        if byte_range == 'invalid':
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+
+    start, end = byte_range or (0, size - 1)
+    response = StreamingHttpResponse(
+        iter_range(start, end) if size else iter(()),
+        content_type=content_type,
+        status=206 if byte_range else 200,
+    )
+    response['Content-Length'] = str(end - start + 1 if size else 0)
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    if filename:
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    if byte_range:
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    return response
+
+
+def parse_byte_range(header, size):
+    """Parse a single 'bytes=a-b' range. None means serve everything."""
+    if not header or not header.startswith('bytes=') or ',' in header:
+        return None
+    first, _, last = header[len('bytes='):].strip().partition('-')
+    try:
+        if first:
+            start = int(first)
+            end = int(last) if last else size - 1
+        else:
+            start = size - int(last)
+            end = size - 1
+    except ValueError:
+        return None
+    start = max(0, start)
+    end = min(end, size - 1)
+    if start > end or start >= size:
+        return 'invalid'
+    return start, end
+
+
+def _etag_for(relative_path, path, stat):
+    """Strong ETag from the results manifest, else a weak one from mtime/size."""
+    match = JOB_OUTPUT_RE.match(relative_path)
+    if match:
+        output = (
+            JobOutput.objects.filter(job_id=match.group('job_id'), filename=match.group('filename'))
+            .only('checksum', 'size')
+            .first()
+        )
+        if output is not None and output.checksum and output.size == stat.st_size:
+            return quote_etag(output.checksum[:32])
+    return f'W/"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+
+
+def _etag_matches(header, etag):
+    if not header:
+        return False
+    if header.strip() == '*':
+        return True
+    # If-None-Match uses weak comparison.
+    bare = etag[2:] if etag.startswith('W/') else etag
+    for candidate in header.split(','):
+        candidate = candidate.strip()
+        if candidate.startswith('W/'):
+            candidate = candidate[2:]
+        if candidate == bare:
+            return True
+    return False
+
+
+def serve_media(request, path):
+    """Serve a file under MEDIA_ROOT for production.
+
+    With MEDIA_ACCEL_MODE set the bytes are handed to the front proxy
+    (nginx X-Accel-Redirect or Apache/lighttpd X-Sendfile) and no worker
+    streams them. Otherwise full responses go through FileResponse, which
+    gunicorn sends with sendfile(), and Range/If-Range/If-None-Match are
+    answered here so seeking a video only transfers what the player asks for.
+    """
+    full_path = resolve_public_media(path)
+    relative_path = full_path.relative_to(Path(settings.MEDIA_ROOT).resolve()).as_posix()
+
+    content_type, encoding = mimetypes.guess_type(str(full_path))
+    content_type = content_type or 'application/octet-stream'
+    accel_mode = getattr(settings, 'MEDIA_ACCEL_MODE', '')
+    if accel_mode:
+        response = HttpResponse(content_type=content_type)
+        # Percent-encoded: the proxy decodes it, and spaces or non-ASCII
+        # names would otherwise break the lookup (or the header itself).
+        if accel_mode == 'x-accel':
+            prefix = getattr(settings, 'MEDIA_ACCEL_PREFIX', '/protected-media/')
+            response['X-Accel-Redirect'] = quote(f"{prefix.rstrip('/')}/{relative_path}")
+        else:
+            response['X-Sendfile'] = quote(str(full_path))
+        return response
+
+    stat = full_path.stat()
+    etag = _etag_for(relative_path, full_path, stat)
+    if _etag_matches(request.headers.get('If-None-Match'), etag):
+        response = HttpResponseNotModified()
+        response['ETag'] = etag
+        return response
+
+    size = stat.st_size
+    byte_range = None
+    if range_allowed(request, etag):
+        byte_range = parse_byte_range(request.headers.get('Range'), size)
+    if byte_range == 'invalid':
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+    if byte_range is None or byte_range[1] == size - 1:
+        # Whole file or an open-ended range (how players seek): hand the
+        # seeked file to the WSGI server so it can use sendfile().
+        handle = open(full_path, 'rb')
+        start = byte_range[0] if byte_range else 0
+        handle.seek(start)
+        response = FileResponse(handle, content_type=content_type, status=206 if byte_range else 200)
+        response['Content-Length'] = str(size - start)
+        if byte_range:
+            response['Content-Range'] = f'bytes {start}-{size - 1}/{size}'
+    else:
+        response = ranged_response(
+            request,
+            size,
+            etag,
+            lambda start, end: iter_file_range(full_path, start, end),
+            content_type,
+        )
+    if encoding:
+        response['Content-Encoding'] = encoding
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    # Outputs can be replaced (word-level burn), so always revalidate.
+    response['Cache-Control'] = 'no-cache'
+    return response
@@ -0,0 +1,58 @@
+# Generated by Django 5.2.11 on 2026-10-17 16:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clips', '0007_job_local_source'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='access_token',
+            field=models.CharField(blank=True, max_length=255, null=True, unique=True),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='burn_word_level',
+            field=models.BooleanField(default=False, help_text='Burn word-level precision subtitles (per-word ASR)'),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='cancel_requested',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='celery_task_id',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='generate_srt',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='subtitle_font',
+            field=models.CharField(default='Arial', max_length=100),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='subtitle_size',
+            field=models.IntegerField(default=28),
+        ),
+        migrations.AlterField(
+            model_name='job',
+            name='status',
+            field=models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed'), ('canceled', 'Canceled')], default='queued', max_length=10),
+        ),
+        migrations.AlterField(
+            model_name='job',
+            name='whisper_model',
+            field=models.CharField(default='small', max_length=10),
+        ),
+    ]
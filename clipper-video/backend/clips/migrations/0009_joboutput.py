@@ -0,0 +1,32 @@
+# Generated by Django 5.2.11 on 2026-10-17 00:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clips', '0008_job_access_token_and_options'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobOutput',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('filename', models.CharField(max_length=255)),
+                ('kind', models.CharField(choices=[('video', 'Video'), ('srt', 'SRT'), ('words', 'Word tokens'), ('other', 'Other')], max_length=10)),
+                ('clip_index', models.IntegerField(blank=True, null=True)),
+                ('size', models.BigIntegerField(default=0)),
+                ('checksum', models.CharField(blank=True, default='', max_length=64)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='outputs', to='clips.job')),
+            ],
+            options={
+                'ordering': ['filename'],
+                'constraints': [models.UniqueConstraint(fields=('job', 'filename'), name='unique_job_output_filename')],
+            },
+        ),
+    ]
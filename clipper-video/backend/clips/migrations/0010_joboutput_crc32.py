@@ -0,0 +1,18 @@
+# Generated by Django 5.2.11 on 2026-10-17 00:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clips', '0009_joboutput'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='joboutput',
+            name='crc32',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+    ]
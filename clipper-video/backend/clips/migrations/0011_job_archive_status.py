@@ -0,0 +1,23 @@
+# Generated by Django 5.2.11 on 2026-10-17 00:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clips', '0010_joboutput_crc32'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='archive_status',
+            field=models.CharField(blank=True, choices=[('building', 'Building'), ('ready', 'Ready'), ('failed', 'Failed')], default='', max_length=10),
+        ),
+        migrations.AlterField(
+            model_name='joboutput',
+            name='kind',
+            field=models.CharField(choices=[('video', 'Video'), ('srt', 'SRT'), ('words', 'Word tokens'), ('archive', 'Archive'), ('other', 'Other')], max_length=10),
+        ),
+    ]
@@ -65,6 +65,12 @@ class Job(models.Model):
         ('portrait', 'Portrait'),
     ]
 
+    ARCHIVE_STATUS_CHOICES = [
+        ('building', 'Building'),
+        ('ready', 'Ready'),
+        ('failed', 'Failed'),
+    ]
+
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     source_type = models.CharField(max_length=10, choices=SOURCE_CHOICES, default='youtube')
     youtube_url = models.TextField(blank=True, default='')
@@ -96,6 +102,7 @@ class Job(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     access_token = models.CharField(max_length=255, unique=True, null=True, blank=True)
+    archive_status = models.CharField(max_length=10, choices=ARCHIVE_STATUS_CHOICES, blank=True, default='')
 
     def save(self, *args, **kwargs):
         if not self.access_token:
@@ -107,3 +114,56 @@ class Job(models.Model):
 
     def __str__(self):
         return f"Job {self.id} ({self.status})"
+
+
+class JobOutput(models.Model):
+    """One file under MEDIA_ROOT/jobs/<job_id>/, recorded as tasks produce it."""
+    KIND_CHOICES = [
+        ('video', 'Video'),
+        ('srt', 'SRT'),
+        ('words', 'Word tokens'),
+        ('archive', 'Archive'),
+        ('other', 'Other'),
+    ]
+
+    job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='outputs')
+    filename = models.CharField(max_length=255)
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    clip_index = models.IntegerField(null=True, blank=True)
+    size = models.BigIntegerField(default=0)
+    checksum = models.CharField(max_length=64, blank=True, default='')
+    crc32 = models.BigIntegerField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['filename']
+        constraints = [
+            models.UniqueConstraint(fields=['job', 'filename'], name='unique_job_output_filename'),
+        ]
+
+    def __str__(self):
+        return f"{self.filename} ({self.kind})"
+
+
+class JobUpload(models.Model):
+    """Resumable upload of a local video; a Job is created from it on finalize.
+
+    The job id is reserved up front so chunks are appended straight into the
+    job's work dir and the file never has to be moved or copied.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    target_job_id = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
+    filename = models.CharField(max_length=255)
+    size = models.BigIntegerField()
+    offset = models.BigIntegerField(default=0)
+    options = models.JSONField(default=dict)
+    finalized_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"Upload {self.id} ({self.offset}/{self.size})"
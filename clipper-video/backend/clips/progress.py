@@ -0,0 +1,99 @@
+import json
+import logging
+import threading
+import time
+
+from django.conf import settings
+
+try:
+    import redis
+except Exception:  # pragma: no cover - optional dependency
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+HOT_KEY_PREFIX = 'clipper:job-progress:'
+EVENTS_CHANNEL_PREFIX = 'clipper:job-events:'
+HOT_TTL_SECONDS = 24 * 60 * 60
+# After a failed connect, go without Redis this long before trying again.
+RETRY_SECONDS = 30
+
+_client = None
+_client_lock = threading.Lock()
+_retry_at = 0.0
+
+
+def get_redis():
+    """Shared Redis client for hot job progress, or None when unavailable."""
+    global _client, _retry_at
+    url = getattr(settings, 'PROGRESS_REDIS_URL', '')
+    if not url or redis is None or time.monotonic() < _retry_at:
+        return None
+    with _client_lock:
+        if _client is None and time.monotonic() >= _retry_at:
+            try:
+                _client = redis.Redis.from_url(url, socket_timeout=1, socket_connect_timeout=1)
+                _client.ping()
+            except Exception as exc:
+                logger.warning(
+                    'Progress Redis unavailable, using the database for %ss: %s', RETRY_SECONDS, exc
+                )
+                _client = None
+                _retry_at = time.monotonic() + RETRY_SECONDS
+        return _client
+
+
+def _hot_key(job_id):
+    return f'{HOT_KEY_PREFIX}{job_id}'
+
+
+def set_hot_progress(job_id, progress, message):
+    client = get_redis()
+    if client is None:
+        return False
+    payload = json.dumps({'progress': progress, 'message': message, 'at': time.time()})
+    try:
+        client.set(_hot_key(job_id), payload, ex=HOT_TTL_SECONDS)
+    except Exception:
+        return False
+    return True
+
+
+def get_hot_progress(job_id):
+    client = get_redis()
+    if client is None:
+        return None
+    try:
+        raw = client.get(_hot_key(job_id))
+        return json.loads(raw) if raw else None
+    except Exception:
+        return None
+
+
+def events_channel(job_id):
+    return f'{EVENTS_CHANNEL_PREFIX}{job_id}'
+
+
+def publish_job_event(job_id, event, data):
+    """Fan a job delta out to SSE listeners. Best-effort: never raises."""
+    client = get_redis()
+    if client is None:
+        return False
+    try:
+        client.publish(events_channel(job_id), json.dumps({'event': event, 'data': data}, default=str))
+    except Exception:
+        return False
+    return True
+
+
+def subscribe_job_events(job_id):
+    """Return a Redis pubsub subscribed to the job's channel, or None."""
+    client = get_redis()
+    if client is None:
+        return None
+    try:
+        pubsub = client.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(events_channel(job_id))
+    except Exception:
+        return None
+    return pubsub
@@ -1,12 +1,20 @@
 import cv2
 import logging
+import numpy as np
 import statistics
-from typing import Optional, Tuple
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 
 Aspect = 9 / 16
 LOGGER = logging.getLogger(__name__)
 
+# (t, center_x, center_y, width, height, visibility); t relatif terhadap start.
+Sample = Tuple[float, float, float, float, float, float]
+
 
 def _get_target_crop_size(frame_w: float, frame_h: float, person_w: float, person_h: float):
     """
@@ -31,16 +39,113 @@ def _get_target_crop_size(frame_w: float, frame_h: float, person_w: float, perso
     return crop_w, crop_h
 
 
-def compute_dominant_person_crop(
+# Jarak sampel terjauh saat time_budget habis; track tetap menjangkau akhir clip.
+BUDGET_MAX_SPACING = 5.0
+
+
+def _video_metadata(video_path: str) -> Optional[Tuple[float, float, float]]:
+    """(frame_w, frame_h, duration) dari header video; tidak ada frame yang di-decode."""
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        return None
+    frame_w = cap.get(cv2.CAP_PROP_FRAME_WIDTH)
+    frame_h = cap.get(cv2.CAP_PROP_FRAME_HEIGHT)
+    fps = cap.get(cv2.CAP_PROP_FPS) or 25
+    frame_count = cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0
+    cap.release()
+    return frame_w, frame_h, frame_count / fps
+
+
+def _analysis_size(frame_w: float, frame_h: float, analysis_width: int) -> Tuple[int, int]:
+    """Ukuran genap frame analisa, tidak pernah lebih besar dari sumber."""
+    width = min(float(analysis_width), frame_w) if frame_w else float(analysis_width)
+    width = max(2, int(round(width)) // 2 * 2)
+    height = max(2, int(round(frame_h * width / frame_w)) // 2 * 2) if frame_w else width
+    return width, height
+
+
+def _iter_sampled_frames(
     video_path: str,
-    sample_fps: float = 2.0,
-    min_visibility: float = 0.45,
-    min_height_ratio: float = 0.22,
-    debug: bool = False,
-) -> Optional[Tuple[int, int, int, int]]:
+    start: Optional[float],
+    end: Optional[float],
+    sample_fps: float,
+    width: int,
+    height: int,
+    processes=None,
+):
+    """
+    Decode video lewat pipe ffmpeg rawvideo: hanya frame hasil filter
+    fps=sample_fps yang sudah di-scale yang sampai ke Python. Yield
+    (t, rgb ndarray) dengan t relatif terhadap start.
+    """
+    command = ['ffmpeg', '-v', 'error', '-nostdin']
+    if start:
+        command += ['-ss', f'{float(start):.3f}']
+    command += ['-i', video_path]
+    if end is not None:
+        command += ['-t', f'{max(0.0, float(end) - float(start or 0)):.3f}']
+    command += [
+        '-map', '0:v:0', '-an', '-sn',
+        '-vf', f'fps={sample_fps},scale={width}:{height}',
+        '-f', 'rawvideo', '-pix_fmt', 'rgb24', '-',
+    ]
+    frame_bytes = width * height * 3
+    popen = subprocess.Popen if processes is None else processes.start
+    process = popen(command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    try:
+        index = 0
+        while True:
+            data = process.stdout.read(frame_bytes)
+            if len(data) < frame_bytes:
+                break
+            frame = np.frombuffer(data, dtype=np.uint8).reshape(height, width, 3)
+            yield index / sample_fps, frame
+            index += 1
+    finally:
+        process.stdout.close()
+        if process.poll() is None:
+            process.kill()
+        process.wait()
+        if processes is not None:
+            processes.discard(process)
+
+
+def _budget_stride(remaining_frames: int, remaining_time: float, frame_cost: float, sample_fps: float) -> int:
+    """
+    Berapa frame sampel yang dilewati per inference supaya sisa budget cukup
+    sampai akhir range. Saat budget habis jarak sampel dibatasi
+    BUDGET_MAX_SPACING, jadi sampel tetap tersebar sampai akhir clip.
+    """
+    max_stride = max(1, int(round(BUDGET_MAX_SPACING * sample_fps)))
+    if remaining_frames <= 0 or frame_cost <= 0:
+        return 1
+    if remaining_time <= 0:
+        return max_stride
+    needed = remaining_frames * frame_cost / remaining_time
+    return max(1, min(max_stride, int(np.ceil(needed))))
+
+
+def _sample_person_boxes(
+    video_path: str,
+    sample_fps: float,
+    min_visibility: float,
+    debug: bool,
+    start: Optional[float],
+    end: Optional[float],
+    analysis_width: int,
+    time_budget: Optional[float],
+    processes=None,
+    on_frame: Optional[Callable[[float], None]] = None,
+    max_samples: Optional[int] = None,
+) -> Optional[Tuple[float, float, List[Sample]]]:
     """
-    Balikkan (crop_x, crop_y, crop_w, crop_h) untuk portrait 9:16
-    yang mengikuti orang paling dominan di video.
+    Sampling pose torso dari video, balikkan (frame_w, frame_h, samples)
+    atau None bila mediapipe/video tidak tersedia. on_frame(t) dipanggil
+    untuk tiap frame sampel; exception darinya menghentikan decode.
+
+    time_budget menurunkan rate fps ffmpeg (decode diulang dari posisi
+    sekarang) supaya sampel tetap sampai akhir range; max_samples
+    menghentikan sampling sepenuhnya setelah sekian frame dianalisa.
     """
     try:
         import mediapipe as mp
@@ -68,16 +173,15 @@ def compute_dominant_person_crop(
         24, # RIGHT_HIP
     ]
 
-    cap = cv2.VideoCapture(video_path)
-    if not cap.isOpened():
+    # VideoCapture hanya dipakai untuk metadata; decode lewat pipe ffmpeg.
+    metadata = _video_metadata(video_path)
+    if metadata is None:
         if debug:
             LOGGER.warning("reframe: failed to open video: %s", video_path)
         return None
-
-    frame_w = cap.get(cv2.CAP_PROP_FRAME_WIDTH)
-    frame_h = cap.get(cv2.CAP_PROP_FRAME_HEIGHT)
-    fps = cap.get(cv2.CAP_PROP_FPS) or 25
-    step = max(1, int(round(fps / sample_fps)))
+    frame_w, frame_h, duration = metadata
+    range_end = float(end) if end is not None else duration
+    width, height = _analysis_size(frame_w, frame_h, analysis_width)
 
     pose = mp.solutions.pose.Pose(
         static_image_mode=False,
@@ -87,62 +191,98 @@ def compute_dominant_person_crop(
         min_tracking_confidence=0.5,
     )
 
-    centers_x, centers_y, widths, heights, visibilities = [], [], [], [], []
-    frame_idx = 0
-    sampled = 0
-    success, frame = cap.read()
-    while success:
-        if frame_idx % step == 0:
-            rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            result = pose.process(rgb)
-            if result.pose_landmarks:
-                xs, ys, vs = [], [], []
-                for lm_id in torso_landmarks:
-                    # Handle both enum and integer landmark IDs
-                    if hasattr(mp.solutions.pose, 'PoseLandmark'):
-                        landmark_enum = lm_id
-                        lm = result.pose_landmarks.landmark[landmark_enum]
-                    else:
-                        landmark_idx = lm_id
-                        lm = result.pose_landmarks.landmark[landmark_idx]
-                    if lm.visibility < min_visibility:
-                        continue
-                    xs.append(lm.x)
-                    ys.append(lm.y)
-                    vs.append(lm.visibility)
-                if len(xs) < 3:
-                    frame_idx += 1
-                    success, frame = cap.read()
-                    continue
-                min_x, max_x = min(xs), max(xs)
-                min_y, max_y = min(ys), max(ys)
-                w = (max_x - min_x) * frame_w
-                h = (max_y - min_y) * frame_h
-                cx = (min_x + max_x) * 0.5 * frame_w
-                cy = (min_y + max_y) * 0.5 * frame_h
-                if w > 1 and h > 1:
-                    centers_x.append(cx)
-                    centers_y.append(cy)
-                    widths.append(w)
-                    heights.append(h)
-                    visibilities.append(statistics.mean(vs))
-                    sampled += 1
-        frame_idx += 1
-        success, frame = cap.read()
+    samples: List[Sample] = []
+    began = time.monotonic()
+    processed = 0
+    range_start = float(start or 0)
+    # Decode mulai dari offset (relatif start) dengan fps=sample_fps/stride.
+    offset = 0.0
+    stride = 1
+    finished = False
+    try:
+        while not finished:
+            finished = True
+            frames = _iter_sampled_frames(
+                video_path, range_start + offset or None, end, sample_fps / stride, width, height, processes
+            )
+            try:
+                for t, rgb in frames:
+                    t += offset
+                    if on_frame is not None:
+                        on_frame(t)
+                    result = pose.process(rgb)
+                    if result.pose_landmarks:
+                        xs, ys, vs = [], [], []
+                        for lm_id in torso_landmarks:
+                            # Handle both enum and integer landmark IDs
+                            if hasattr(mp.solutions.pose, 'PoseLandmark'):
+                                landmark_enum = lm_id
+                                lm = result.pose_landmarks.landmark[landmark_enum]
+                            else:
+                                landmark_idx = lm_id
+                                lm = result.pose_landmarks.landmark[landmark_idx]
+                            if lm.visibility < min_visibility:
+                                continue
+                            xs.append(lm.x)
+                            ys.append(lm.y)
+                            vs.append(lm.visibility)
+                        if len(xs) >= 3:
+                            min_x, max_x = min(xs), max(xs)
+                            min_y, max_y = min(ys), max(ys)
+                            w = (max_x - min_x) * frame_w
+                            h = (max_y - min_y) * frame_h
+                            cx = (min_x + max_x) * 0.5 * frame_w
+                            cy = (min_y + max_y) * 0.5 * frame_h
+                            if w > 1 and h > 1:
+                                samples.append((t, cx, cy, w, h, statistics.mean(vs)))
 
-    cap.release()
-    pose.close()
+                    processed += 1
+                    if max_samples and processed >= max_samples:
+                        # Berhenti total; track menahan posisi terakhir sampai akhir clip.
+                        break
+                    if time_budget:
+                        # Biaya per frame = waktu dinding (decode + inference),
+                        # sama dengan yang dihitung terhadap budget.
+                        elapsed = time.monotonic() - began
+                        wanted = _budget_stride(
+                            int((range_end - range_start - t) * sample_fps),
+                            time_budget - elapsed,
+                            elapsed / processed,
+                            sample_fps,
+                        )
+                        if wanted >= stride * 2 or wanted * 2 <= stride:
+                            # Ganti rate di filter fps ffmpeg, jadi frame yang
+                            # dilewati tidak di-scale maupun dikirim lewat pipe.
+                            offset = t + wanted / sample_fps
+                            stride = wanted
+                            finished = False
+                            break
+            finally:
+                frames.close()
+    finally:
+        pose.close()
+    return frame_w, frame_h, samples
 
-    if not centers_x:
+
+def _median_person(
+    samples: List[Sample],
+    frame_h: float,
+    min_visibility: float,
+    min_height_ratio: float,
+    debug: bool,
+    video_path: str,
+) -> Optional[Tuple[float, float, float, float]]:
+    """Median (center_x, center_y, person_w, person_h), atau None bila tidak layak."""
+    if not samples:
         if debug:
             LOGGER.info("reframe: no pose detections for %s", video_path)
         return None
 
-    center_x = statistics.median(centers_x)
-    center_y = statistics.median(centers_y)
-    person_w = statistics.median(widths)
-    person_h = statistics.median(heights)
-    visibility = statistics.median(visibilities)
+    center_x = statistics.median(s[1] for s in samples)
+    center_y = statistics.median(s[2] for s in samples)
+    person_w = statistics.median(s[3] for s in samples)
+    person_h = statistics.median(s[4] for s in samples)
+    visibility = statistics.median(s[5] for s in samples)
 
     if person_h < frame_h * min_height_ratio:
         if debug:
@@ -161,31 +301,357 @@ def compute_dominant_person_crop(
                 video_path,
             )
         return None
+    return center_x, center_y, person_w, person_h
 
-    crop_w, crop_h = _get_target_crop_size(frame_w, frame_h, person_w, person_h)
-    crop_x = center_x - crop_w / 2
-    crop_y = center_y - crop_h / 2
 
-    crop_x = max(0, min(crop_x, frame_w - crop_w))
-    crop_y = max(0, min(crop_y, frame_h - crop_h))
+def build_crop_track(
+    samples: List[Sample],
+    frame_w: float,
+    frame_h: float,
+    crop_w: float,
+    crop_h: float,
+    smoothing: float = 0.25,
+    keyframe_interval: float = 1.0,
+) -> List[Dict[str, Any]]:
+    """
+    Haluskan center sampel dengan EMA lalu ambil keyframe tiap
+    keyframe_interval detik. Tiap keyframe berisi posisi crop (x, y)
+    yang sudah di-clamp plus data mentah untuk debug.
+    """
+    keyframes: List[Dict[str, Any]] = []
+    smooth_x = smooth_y = None
+    for t, cx, cy, w, h, vis in sorted(samples):
+        if smooth_x is None:
+            smooth_x, smooth_y = cx, cy
+        else:
+            smooth_x += smoothing * (cx - smooth_x)
+            smooth_y += smoothing * (cy - smooth_y)
+        if keyframes and t - keyframes[-1]['t'] < keyframe_interval:
+            continue
+        x = max(0.0, min(smooth_x - crop_w / 2, frame_w - crop_w))
+        y = max(0.0, min(smooth_y - crop_h / 2, frame_h - crop_h))
+        keyframes.append({
+            't': round(t, 3),
+            'x': int(round(x)),
+            'y': int(round(y)),
+            'raw_center': (round(cx, 1), round(cy, 1)),
+            'smooth_center': (round(smooth_x, 1), round(smooth_y, 1)),
+            'person': (round(w, 1), round(h, 1)),
+            'visibility': round(vis, 3),
+        })
+    return keyframes
+
+
+def compute_person_crop_track(
+    video_path: str,
+    sample_fps: float = 2.0,
+    min_visibility: float = 0.45,
+    min_height_ratio: float = 0.22,
+    debug: bool = False,
+    start: Optional[float] = None,
+    end: Optional[float] = None,
+    analysis_width: int = 640,
+    time_budget: Optional[float] = None,
+    smoothing: float = 0.25,
+    keyframe_interval: float = 1.0,
+    processes=None,
+    max_samples: Optional[int] = None,
+) -> Optional[Dict[str, Any]]:
+    """
+    Crop 9:16 yang mengikuti orang paling dominan: ukuran crop tetap (dari
+    median ukuran person), posisi mengikuti lintasan center yang dihaluskan.
+    Balikkan {'frame', 'crop_w', 'crop_h', 'keyframes'} atau None.
+
+    Sampling dibatasi sample_fps per detik clip (sepanjang start/end); frame
+    sampel diperkecil ke analysis_width oleh ffmpeg sebelum inference.
+    time_budget menjarangkan sampel di seluruh range dengan menurunkan rate
+    fps decoder, bukan memotongnya; max_samples benar-benar berhenti lebih
+    awal dan posisi terakhir ditahan sampai akhir clip.
+    """
+    sampled = _sample_person_boxes(
+        video_path,
+        sample_fps,
+        min_visibility,
+        debug,
+        start,
+        end,
+        analysis_width,
+        time_budget,
+        processes,
+        max_samples=max_samples,
+    )
+    if sampled is None:
+        return None
+    frame_w, frame_h, samples = sampled
+    return _track_from_samples(
+        samples,
+        frame_w,
+        frame_h,
+        min_visibility,
+        min_height_ratio,
+        debug,
+        video_path,
+        smoothing,
+        keyframe_interval,
+    )
+
+
+def _track_from_samples(
+    samples: List[Sample],
+    frame_w: float,
+    frame_h: float,
+    min_visibility: float,
+    min_height_ratio: float,
+    debug: bool,
+    video_path: str,
+    smoothing: float,
+    keyframe_interval: float,
+) -> Optional[Dict[str, Any]]:
+    person = _median_person(samples, frame_h, min_visibility, min_height_ratio, debug, video_path)
+    if person is None:
+        return None
+    _, _, person_w, person_h = person
+
+    crop_w, crop_h = _get_target_crop_size(frame_w, frame_h, person_w, person_h)
+    # Ukuran genap supaya aman untuk encoder yuv420p.
+    crop_w = int(round(crop_w)) // 2 * 2
+    crop_h = int(round(crop_h)) // 2 * 2
+    keyframes = build_crop_track(
+        samples,
+        frame_w,
+        frame_h,
+        crop_w,
+        crop_h,
+        smoothing=smoothing,
+        keyframe_interval=keyframe_interval,
+    )
 
     if debug:
-        LOGGER.info(
-            "reframe: samples=%d center=(%.1f,%.1f) person=(%.1fx%.1f) crop=(%d,%d,%d,%d)",
-            sampled,
-            center_x,
-            center_y,
-            person_w,
-            person_h,
-            int(round(crop_x)),
-            int(round(crop_y)),
-            int(round(crop_w)),
-            int(round(crop_h)),
-        )
-
-    return (
-        int(round(crop_x)),
-        int(round(crop_y)),
-        int(round(crop_w)),
-        int(round(crop_h)),
+        for keyframe in keyframes:
+            LOGGER.info(
+                "reframe: t=%.2f raw=%s smooth=%s crop=(%d,%d,%d,%d)",
+                keyframe['t'],
+                keyframe['raw_center'],
+                keyframe['smooth_center'],
+                keyframe['x'],
+                keyframe['y'],
+                crop_w,
+                crop_h,
+            )
+
+    return {
+        'frame': (int(frame_w), int(frame_h)),
+        'crop_w': crop_w,
+        'crop_h': crop_h,
+        'keyframes': keyframes,
+    }
+
+
+def _pose_slices(duration: float, slices: int, sample_fps: float) -> List[Tuple[float, Optional[float]]]:
+    """Bagi [0, duration) jadi potongan berurutan; potongan terakhir sampai akhir video."""
+    slices = max(1, min(int(slices), int(duration * sample_fps) or 1))
+    step = duration / slices
+    bounds = [round(i * step, 3) for i in range(slices)]
+    return [(start, bounds[i + 1] if i + 1 < slices else None) for i, start in enumerate(bounds)]
+
+
+def build_pose_index(
+    video_path: str,
+    sample_fps: float = 2.0,
+    min_visibility: float = 0.45,
+    debug: bool = False,
+    analysis_width: int = 640,
+    workers: int = 1,
+    on_progress: Optional[Callable[[float], None]] = None,
+    processes=None,
+) -> Optional[Dict[str, Any]]:
+    """
+    Analisa pose sekali untuk seluruh video sumber. Balikkan
+    {'frame': (w, h), 'samples': ndarray float32 (N, 6)} dengan kolom
+    (t, center_x, center_y, width, height, visibility), t dalam detik sumber.
+
+    Sumber dibagi jadi `workers` potongan waktu yang dianalisa paralel.
+    on_progress(fraction) dipanggil per frame sampel; exception darinya
+    (mis. job dibatalkan) menghentikan semua potongan.
+    """
+    metadata = _video_metadata(video_path)
+    if metadata is None:
+        if debug:
+            LOGGER.warning("reframe: failed to open video: %s", video_path)
+        return None
+    duration = metadata[2]
+    slices = _pose_slices(duration, workers, sample_fps) if duration > 0 else [(0.0, None)]
+    lock = threading.Lock()
+    reached = [0.0] * len(slices)
+    stop = threading.Event()
+    errors: List[BaseException] = []
+
+    def sample_slice(index):
+        start, end = slices[index]
+
+        def on_frame(t):
+            if stop.is_set():
+                raise RuntimeError('Analisa pose dihentikan')
+            if on_progress is None or duration <= 0:
+                return
+            with lock:
+                reached[index] = t
+                fraction = min(1.0, sum(reached) / duration)
+            on_progress(fraction)
+
+        try:
+            return _sample_person_boxes(
+                video_path,
+                sample_fps,
+                min_visibility,
+                debug,
+                start or None,
+                end,
+                analysis_width,
+                None,
+                processes,
+                on_frame,
+            )
+        except BaseException as exc:
+            # Simpan error pertama saja; potongan lain berhenti karena stop.
+            with lock:
+                if not stop.is_set():
+                    errors.append(exc)
+                    stop.set()
+            raise
+
+    if len(slices) == 1:
+        results = [sample_slice(0)]
+    else:
+        with ThreadPoolExecutor(max_workers=len(slices), thread_name_prefix='pose') as executor:
+            futures = [executor.submit(sample_slice, index) for index in range(len(slices))]
+        if errors:
+            raise errors[0]
+        results = [future.result() for future in futures]
+    if any(result is None for result in results):
+        return None
+    frame_w, frame_h = results[0][0], results[0][1]
+    samples = [
+        (sample[0] + start,) + tuple(sample[1:])
+        for (start, _), (_, _, slice_samples) in zip(slices, results)
+        for sample in slice_samples
+    ]
+    array = np.asarray(samples, dtype=np.float32).reshape(-1, 6)
+    return {'frame': (int(frame_w), int(frame_h)), 'samples': array}
+
+
+def save_pose_index(index: Dict[str, Any], path: str) -> None:
+    np.savez_compressed(path, samples=index['samples'], frame=np.asarray(index['frame'], dtype=np.int32))
+
+
+def load_pose_index(path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with np.load(path) as data:
+            frame = tuple(int(v) for v in data['frame'])
+            return {'frame': frame, 'samples': data['samples']}
+    except Exception:
+        return None
+
+
+def get_pose_index(
+    video_path: str,
+    cache_path: str,
+    debug: bool = False,
+    workers: int = 1,
+    on_progress: Optional[Callable[[float], None]] = None,
+    processes=None,
+) -> Optional[Dict[str, Any]]:
+    """Load pose index dari cache_path, atau bangun dan simpan bila belum ada."""
+    index = load_pose_index(cache_path)
+    if index is not None:
+        return index
+    index = build_pose_index(
+        video_path,
+        debug=debug,
+        workers=workers,
+        on_progress=on_progress,
+        processes=processes,
+    )
+    if index is not None:
+        save_pose_index(index, cache_path)
+    return index
+
+
+def crop_track_from_index(
+    index: Dict[str, Any],
+    start: float,
+    end: Optional[float],
+    min_visibility: float = 0.45,
+    min_height_ratio: float = 0.22,
+    debug: bool = False,
+    smoothing: float = 0.25,
+    keyframe_interval: float = 1.0,
+) -> Optional[Dict[str, Any]]:
+    """
+    Sama seperti compute_person_crop_track tapi dari pose index sumber:
+    sampel di [start, end) diambil lalu waktunya digeser relatif ke start.
+    """
+    array = index['samples']
+    frame_w, frame_h = index['frame']
+    times = array[:, 0]
+    mask = times >= start
+    if end is not None:
+        mask &= times < end
+    window = array[mask]
+    samples: List[Sample] = [
+        (float(row[0]) - start, float(row[1]), float(row[2]), float(row[3]), float(row[4]), float(row[5]))
+        for row in window
+    ]
+    return _track_from_samples(
+        samples,
+        frame_w,
+        frame_h,
+        min_visibility,
+        min_height_ratio,
+        debug,
+        f'pose index [{start}, {end})',
+        smoothing,
+        keyframe_interval,
     )
+
+
+def _segment_expression(prev: Dict[str, Any], cur: Dict[str, Any], axis: str) -> str:
+    """Expression ffmpeg untuk satu segmen: linear dari prev ke cur, lalu tahan."""
+    delta = cur[axis] - prev[axis]
+    span = cur['t'] - prev['t']
+    if span <= 0:
+        return str(cur[axis])
+    if not delta:
+        return str(prev[axis])
+    return f"{prev[axis]}+{delta}*clip((t-{prev['t']})/{span:.3f},0,1)"
+
+
+def crop_track_commands(keyframes: List[Dict[str, Any]], target: str = 'crop') -> Tuple[str, str, str]:
+    """
+    Posisi crop piecewise-linear sebagai (x0, y0, script) untuk filter sendcmd.
+
+    x0/y0 adalah expression segmen pertama untuk opsi x/y crop; script
+    mengganti expression tiap axis di awal segmen berikutnya. Panjang filter
+    dan biaya evaluasi per frame tetap konstan berapa pun panjang clip;
+    hanya script (ditulis ke file) yang tumbuh per keyframe.
+    """
+    if not keyframes:
+        return '0', '0', ''
+    segments = list(zip(keyframes, keyframes[1:])) or [(keyframes[0], keyframes[0])]
+    initial = {axis: _segment_expression(*segments[0], axis) for axis in ('x', 'y')}
+    current = dict(initial)
+    lines = []
+    tail = segments[1:]
+    if len(keyframes) > 1:
+        # Setelah keyframe terakhir posisi ditahan.
+        tail.append((keyframes[-1], keyframes[-1]))
+    for prev, cur in tail:
+        commands = []
+        for axis in ('x', 'y'):
+            expression = _segment_expression(prev, cur, axis)
+            if expression != current[axis]:
+                commands.append(f"{target} {axis} '{expression}'")
+                current[axis] = expression
+        if commands:
+            lines.append(f"{prev['t']:.3f} {', '.join(commands)};")
+    return initial['x'], initial['y'], '\n'.join(lines)
@@ -2,6 +2,7 @@ from rest_framework import serializers
 import re
 
 from .models import Video, Clip, Job
+from .progress import get_hot_progress
 from django.contrib.auth.models import User
 
 
@@ -221,32 +222,36 @@ class JobDetailSerializer(serializers.ModelSerializer):
             'message',
             'error',
             'cancel_requested',
+            'archive_status',
             'created_at',
             'results',
         ]
 
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        if instance.status == 'running':
+            # Progress ticks between stage changes only live in Redis.
+            hot = get_hot_progress(instance.id)
+            if hot:
+                data['progress'] = hot.get('progress', data['progress'])
+                data['message'] = hot.get('message', data['message'])
+        return data
+
     def get_results(self, obj):
         from django.conf import settings
-        from pathlib import Path
-        import re
+        from .manifest import job_outputs
 
-        job_dir = Path(settings.MEDIA_ROOT) / 'jobs' / str(obj.id)
-        if not job_dir.exists():
-            return []
         results = []
         max_clips = obj.max_clips or 0
-        for path in sorted(job_dir.iterdir()):
-            if path.is_file() and path.name != 'work':
-                if path.suffix.lower() == '.json':
-                    continue
-                if max_clips > 0:
-                    match = re.match(r'^clip_(\d{3})', path.name)
-                    if match and int(match.group(1)) > max_clips:
-                        continue
-                results.append({
-                    'filename': path.name,
-                    'url': f"{settings.MEDIA_URL}jobs/{obj.id}/{path.name}",
-                })
+        for output in job_outputs(obj).exclude(kind='words'):
+            if max_clips > 0 and output.clip_index and output.clip_index > max_clips:
+                continue
+            results.append({
+                'filename': output.filename,
+                'url': f"{settings.MEDIA_URL}jobs/{obj.id}/{output.filename}",
+                'kind': output.kind,
+                'size': output.size,
+            })
         return results
 
 
@@ -295,3 +300,18 @@ class LocalJobUploadSerializer(serializers.Serializer):
             if not ranges or not isinstance(ranges, list):
                 raise serializers.ValidationError({'ranges': 'Ranges wajib diisi untuk mode manual'})
         return data
+
+
+class ChunkedUploadCreateSerializer(LocalJobUploadSerializer):
+    """Job options for a resumable upload; the video arrives later in chunks."""
+    video_file = None
+    filename = serializers.CharField(max_length=255)
+    size = serializers.IntegerField(min_value=1)
+
+    def validate_size(self, value):
+        from django.conf import settings
+
+        max_bytes = getattr(settings, 'CHUNKED_UPLOAD_MAX_BYTES', 0)
+        if max_bytes and value > max_bytes:
+            raise serializers.ValidationError(f'Ukuran file maksimal {max_bytes} bytes')
+        return value
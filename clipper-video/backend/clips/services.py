@@ -9,10 +9,14 @@ import tempfile
 import atexit
 import shlex
 import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
-from .utils import run_command, run_command_stream, escape_ffmpeg_path, format_timecode
-from .reframe import compute_dominant_person_crop
+from .utils import run_command, run_command_stream, escape_ffmpeg_path, format_timecode, parse_ffmpeg_time
+from . import asr_cache
+from .reframe import compute_person_crop_track, crop_track_from_index, crop_track_commands
 from .srt_utils import render_ass_from_words
 from tempfile import NamedTemporaryFile
 
@@ -191,7 +195,50 @@ def _raise_yt_error(prefix, exc):
     raise RuntimeError(f'{prefix}: {message}')
 
 
-def fetch_video_info(url):
+_VIDEO_ID_RE = re.compile(r'(?:v=|/shorts/|/embed/|/live/|youtu\.be/)([A-Za-z0-9_-]{11})')
+_INFO_CACHE = {}
+_INFO_CACHE_LOCK = threading.Lock()
+_INFO_CACHE_MAX_ENTRIES = 64
+
+
+def _info_cache_ttl():
+    # Format URLs in the info JSON expire after a few hours; stay well below that.
+    return float(os.getenv('YT_INFO_CACHE_TTL', '1800') or 0)
+
+
+def video_id_from_url(url):
+    match = _VIDEO_ID_RE.search(url or '')
+    return match.group(1) if match else None
+
+
+def _cached_info(key):
+    with _INFO_CACHE_LOCK:
+        entry = _INFO_CACHE.get(key)
+        if entry is None:
+            return None
+        stored_at, info = entry
+        if time.monotonic() - stored_at > _info_cache_ttl():
+            _INFO_CACHE.pop(key, None)
+            return None
+        return info
+
+
+def _store_info(key, info):
+    with _INFO_CACHE_LOCK:
+        _INFO_CACHE[key] = (time.monotonic(), info)
+        if len(_INFO_CACHE) > _INFO_CACHE_MAX_ENTRIES:
+            oldest = min(_INFO_CACHE, key=lambda item: _INFO_CACHE[item][0])
+            _INFO_CACHE.pop(oldest, None)
+
+
+def fetch_video_info(url, use_cache=True):
+    """Return yt-dlp's info dict for url, reusing a recent extraction of the
+    same video id when YT_INFO_CACHE_TTL allows it."""
+    key = video_id_from_url(url) or url
+    if use_cache and _info_cache_ttl() > 0:
+        info = _cached_info(key)
+        if info is not None:
+            return info
     yt_dlp_cmd = _get_yt_dlp_cmd()
     try:
         output = run_command([
@@ -200,9 +247,52 @@ def fetch_video_info(url):
             *_yt_dlp_common_args(),
             url,
         ])
-        return json.loads(output)
+        info = json.loads(output)
     except Exception as exc:
         _raise_yt_error('Failed to fetch video info', exc)
+    if _info_cache_ttl() > 0:
+        # Store under the key lookups use; yt-dlp's id may differ from it
+        # (e.g. a playlist or non-YouTube URL).
+        _store_info(key, info)
+    return info
+
+
+def write_info_json(info):
+    """Save fetch_video_info output so later yt-dlp calls can skip extraction.
+
+    The dump carries per-format request headers and cookies, so it goes to a
+    private temp dir outside MEDIA_ROOT; remove it with remove_info_json().
+    """
+    info_dir = Path(tempfile.mkdtemp(prefix='clipper-info-'))
+    info_path = info_dir / 'info.json'
+    fd = os.open(info_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, 'w', encoding='utf-8') as handle:
+        json.dump(info, handle)
+    return info_path
+
+
+def remove_info_json(info_path):
+    if info_path:
+        shutil.rmtree(Path(info_path).parent, ignore_errors=True)
+
+
+def _run_yt_dlp(args, url, info_json=None, on_line=None, processes=None):
+    """Run yt-dlp on the saved info JSON when given, else on url.
+
+    A saved extraction can go stale (expired format URLs); in that case the
+    command is retried once against url. With processes (a ProcessGroup) the
+    job can stop yt-dlp from another thread.
+    """
+    yt_dlp_cmd = _get_yt_dlp_cmd()
+    runner = (lambda cmd: run_command(cmd, processes=processes)) if on_line is None else (
+        lambda cmd: run_command_stream(cmd, on_line=on_line, processes=processes)
+    )
+    if info_json:
+        try:
+            return runner([*yt_dlp_cmd, *args, '--load-info-json', str(info_json)])
+        except RuntimeError:
+            pass
+    return runner([*yt_dlp_cmd, *args, url])
 
 
 def probe_duration_seconds(video_path):
@@ -242,12 +332,10 @@ def build_format_selector(strict_1080, min_height_fallback):
     )
 
 
-def download_video(url, work_dir, selector, on_line=None):
+def download_video(url, work_dir, selector, on_line=None, info_json=None, processes=None):
     work_dir = Path(work_dir)
     output_template = str(work_dir / 'source.%(ext)s')
-    yt_dlp_cmd = _get_yt_dlp_cmd()
-    run_command_stream([
-        *yt_dlp_cmd,
+    _run_yt_dlp([
         '--newline',
         '--progress',
         '-f', selector,
@@ -256,8 +344,7 @@ def download_video(url, work_dir, selector, on_line=None):
         '--embed-metadata',
         '--embed-chapters',
         '-o', output_template,
-        url,
-    ], on_line=on_line)
+    ], url, info_json=info_json, on_line=on_line or (lambda line: None), processes=processes)
     source_path = work_dir / 'source.mp4'
     if not source_path.exists():
         matches = list(work_dir.glob('source.*'))
@@ -268,20 +355,168 @@ def download_video(url, work_dir, selector, on_line=None):
     return source_path
 
 
-def download_section(url, work_dir, selector, start, end, index):
+class DownloadCoverage:
+    """Tracks how much of a progressive download is already readable.
+
+    Fed with the ffmpeg downloader's output lines; clip workers block in
+    wait_for() until the range they need is on disk.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.seconds = 0.0
+        self.done = False
+        self.error = None
+        self._cond = threading.Condition()
+
+    def handle_line(self, line):
+        seconds = parse_ffmpeg_time(line)
+        if seconds is None:
+            return
+        with self._cond:
+            if seconds > self.seconds:
+                self.seconds = seconds
+                self._cond.notify_all()
+
+    def finish(self, error=None):
+        with self._cond:
+            self.done = True
+            self.error = error
+            self._cond.notify_all()
+
+    def wait_for(self, seconds, timeout=None):
+        """True once `seconds` of media are written or the download ended."""
+        with self._cond:
+            return self._cond.wait_for(lambda: self.done or self.seconds >= seconds, timeout)
+
+
+def download_video_progressive(url, work_dir, selector, coverage, info_json=None, processes=None):
+    """Download through ffmpeg into a fragmented MP4 that is readable while growing.
+
+    Video and audio are fetched and muxed by one ffmpeg process straight
+    into coverage.path (no .part file), and coverage is updated from its
+    time= progress so ranges can be cut before the download finishes.
+    """
+    yt_dlp_cmd = _get_yt_dlp_cmd()
+    error = None
+    try:
+        run_command_stream([
+            *yt_dlp_cmd,
+            '--newline',
+            '--no-part',
+            '--downloader', 'ffmpeg',
+            '--downloader-args', 'ffmpeg_o:-movflags +frag_keyframe+empty_moov+default_base_moof',
+            '-f', selector,
+            '--merge-output-format', 'mp4',
+            *_yt_dlp_common_args(),
+            '-o', str(coverage.path),
+            # No stale-info retry here: clips may already be reading the file.
+            *(['--load-info-json', str(info_json)] if info_json else [url]),
+        ], on_line=coverage.handle_line, processes=processes)
+        if not coverage.path.exists():
+            raise RuntimeError('Download video gagal: file output tidak ditemukan')
+        return coverage.path
+    except Exception as exc:
+        error = exc
+        raise
+    finally:
+        coverage.finish(error)
+
+
+def download_audio(url, work_dir, info_json=None, processes=None):
+    work_dir = Path(work_dir)
+    output_template = str(work_dir / 'audio.%(ext)s')
+    _run_yt_dlp([
+        '-f', 'ba/b',
+        *_yt_dlp_common_args(),
+        '-o', output_template,
+    ], url, info_json=info_json, processes=processes)
+    matches = [path for path in work_dir.glob('audio.*') if path.suffix != '.part']
+    if not matches:
+        raise RuntimeError('Download audio gagal: file output tidak ditemukan')
+    return matches[0]
+
+
+def extract_audio_pcm(input_path, output_path, sample_rate=16000, processes=None):
+    """Decode the audio track once to raw mono float32 PCM for ASR.
+
+    The output has no header so it can be memory-mapped straight into a
+    NumPy array (see clips.stt.load_pcm); the video stream is never decoded.
+    The same pass hashes the source audio packets into a sidecar file, so
+    the transcript cache never has to hash the (much larger) PCM.
+    """
+    output = run_command([
+        'ffmpeg',
+        '-y',
+        '-v', 'error',
+        '-i', str(input_path),
+        '-map', '0:a:0',
+        '-vn',
+        '-ac', '1',
+        '-ar', str(sample_rate),
+        '-f', 'f32le',
+        str(output_path),
+        '-map', '0:a:0',
+        '-c', 'copy',
+        '-f', 'hash',
+        '-hash', 'sha256',
+        '-',
+    ], processes=processes)
+    sidecar = asr_cache.fingerprint_path(output_path)
+    fingerprint = asr_cache.parse_fingerprint(output)
+    if fingerprint:
+        sidecar.write_text(fingerprint, encoding='ascii')
+    else:
+        sidecar.unlink(missing_ok=True)
+    return Path(output_path)
+
+
+def extract_clip_audio(source_path, start, end, output_path, sample_rate=16000, processes=None):
+    """Decode one range's audio to PCM for per-clip ASR; video is never touched.
+
+    Input seeking while decoding is sample-accurate, so word times line up
+    with renders that cut the same range from the source.
+    """
+    run_command([
+        'ffmpeg',
+        '-y',
+        '-v', 'error',
+        '-ss', str(start),
+        '-i', str(source_path),
+        '-t', str(max(0, end - start)),
+        '-map', '0:a:0',
+        '-vn',
+        '-ac', '1',
+        '-ar', str(sample_rate),
+        '-f', 'f32le',
+        str(output_path),
+    ], processes=processes)
+    return Path(output_path)
+
+
+def fetch_audio_pcm(url, work_dir, output_path, info_json=None, processes=None):
+    """Download only the audio of url and convert it to PCM for ASR."""
+    audio_path = download_audio(url, work_dir, info_json=info_json, processes=processes)
+    try:
+        return extract_audio_pcm(audio_path, output_path, processes=processes)
+    finally:
+        Path(audio_path).unlink(missing_ok=True)
+
+
+def download_section(url, work_dir, selector, start, end, index, info_json=None, on_line=None, processes=None):
+    """Download one time range. With info_json, yt-dlp reuses the saved
+    extraction (--load-info-json) instead of resolving url again."""
     work_dir = Path(work_dir)
     output_template = str(work_dir / f'section_{index:03d}.%(ext)s')
     section = f"*{format_timecode(start)}-{format_timecode(end)}"
-    yt_dlp_cmd = _get_yt_dlp_cmd()
-    run_command([
-        *yt_dlp_cmd,
+    _run_yt_dlp([
+        '--newline',
         '--download-sections', section,
         '-f', selector,
         '--merge-output-format', 'mp4',
         *_yt_dlp_common_args(),
         '-o', output_template,
-        url,
-    ])
+    ], url, info_json=info_json, on_line=on_line or (lambda line: None), processes=processes)
     section_path = work_dir / f'section_{index:03d}.mp4'
     if not section_path.exists():
         matches = list(work_dir.glob(f'section_{index:03d}.*'))
@@ -292,13 +527,73 @@ def download_section(url, work_dir, selector, start, end, index):
     return section_path
 
 
-def download_subtitles(url, work_dir, langs):
+class SectionFetcher:
+    """Fetch download-sections concurrently from one extracted info JSON.
+
+    Sections download on the fetcher's own pool of `workers` threads, so
+    queueing them all with prefetch() keeps that many yt-dlp processes busy
+    however few clip workers consume them. fetch() waits for one section.
+    on_progress(index, percent) is called as each section advances.
+    """
+
+    def __init__(self, url, work_dir, selector, info_json=None, workers=2, on_progress=None, processes=None):
+        self.url = url
+        self.processes = processes
+        self.work_dir = Path(work_dir)
+        self.selector = selector
+        self.info_json = info_json
+        self.on_progress = on_progress
+        self._executor = ThreadPoolExecutor(max_workers=max(1, int(workers)), thread_name_prefix='section')
+        self._futures = {}
+        self._lock = threading.Lock()
+
+    def prefetch(self, index, start, end):
+        """Queue a section (once) and return its future."""
+        with self._lock:
+            future = self._futures.get(index)
+            if future is None:
+                future = self._executor.submit(self._download, index, start, end)
+                self._futures[index] = future
+            return future
+
+    def fetch(self, index, start, end):
+        return self.prefetch(index, start, end).result()
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _download(self, index, start, end):
+        duration = max(0.001, end - start)
+
+        def handle_line(line):
+            if not self.on_progress:
+                return
+            seconds = parse_ffmpeg_time(line)
+            if seconds is not None:
+                self.on_progress(index, min(100.0, seconds / duration * 100))
+
+        try:
+            return download_section(
+                self.url,
+                self.work_dir,
+                self.selector,
+                start,
+                end,
+                index,
+                info_json=self.info_json,
+                on_line=handle_line,
+                processes=self.processes,
+            )
+        finally:
+            if self.on_progress:
+                self.on_progress(index, 100.0)
+
+
+def download_subtitles(url, work_dir, langs, info_json=None, processes=None):
     work_dir = Path(work_dir)
     lang_arg = ','.join(langs)
     output_template = str(work_dir / 'subs.%(ext)s')
-    yt_dlp_cmd = _get_yt_dlp_cmd()
-    run_command([
-        *yt_dlp_cmd,
+    _run_yt_dlp([
         '--write-subs',
         '--write-auto-subs',
         '--sub-langs', lang_arg,
@@ -306,8 +601,7 @@ def download_subtitles(url, work_dir, langs):
         '--skip-download',
         *_yt_dlp_common_args(),
         '-o', output_template,
-        url,
-    ])
+    ], url, info_json=info_json, processes=processes)
     return list(work_dir.glob('subs*.srt'))
 
 
@@ -329,56 +623,173 @@ def pick_subtitle_file(srt_files, langs):
     return srt_files[0]
 
 
-def split_video(source_path, ranges, work_dir, fast_copy=True):
-    clips = []
-    work_dir = Path(work_dir)
-    for idx, (start, end) in enumerate(ranges, start=1):
-        duration = max(0, end - start)
-        clip_path = work_dir / f'clip_{idx:03d}.mp4'
-        if fast_copy:
-            try:
-                run_command([
-                    'ffmpeg',
-                    '-y',
-                    '-ss', str(start),
-                    '-i', str(source_path),
-                    '-t', str(duration),
-                    '-c', 'copy',
-                    '-movflags', '+faststart',
-                    str(clip_path),
-                ])
-                clips.append(clip_path)
+def split_range(source_path, start, end, clip_path, fast_copy=True, processes=None):
+    duration = max(0, end - start)
+    if fast_copy:
+        try:
+            run_command([
+                'ffmpeg',
+                '-y',
+                '-ss', str(start),
+                '-i', str(source_path),
+                '-t', str(duration),
+                '-c', 'copy',
+                '-movflags', '+faststart',
+                str(clip_path),
+            ], processes=processes)
+            return clip_path
+        except Exception:
+            pass
+    run_command([
+        'ffmpeg',
+        '-y',
+        '-i', str(source_path),
+        '-ss', str(start),
+        '-t', str(duration),
+        '-c:v', 'libx264',
+        '-c:a', 'aac',
+        '-movflags', '+faststart',
+        str(clip_path),
+    ], processes=processes)
+    return clip_path
+
+
+# Copy cuts land on the first keyframe at or after the cut, so a segment may
+# start (and end) this much later than its range; callers shift subtitles by
+# the returned start. Ranges whose keyframe is further away are cut per clip.
+SEGMENT_SNAP_TOLERANCE = 2.0
+# Segments never start before their cut, apart from timestamp rounding.
+SEGMENT_START_TOLERANCE = 0.042
+
+
+def _plan_segment_cuts(ranges):
+    """Return the sorted cut points for ranges, or None when ranges overlap.
+
+    The segment muxer can only produce disjoint pieces, so overlapping
+    ranges must go through the per-clip path.
+    """
+    cuts = []
+    cursor = 0
+    for start, end in sorted(ranges):
+        if start < cursor or end <= start:
+            return None
+        if start > cursor:
+            cuts.append(start)
+        cuts.append(end)
+        cursor = end
+    return cuts
+
+
+def _read_segment_list(list_path):
+    segments = []
+    if not list_path.exists():
+        return segments
+    for line in list_path.read_text(encoding='utf-8').splitlines():
+        parts = line.strip().split(',')
+        if len(parts) < 3:
+            continue
+        try:
+            segments.append((parts[0], float(parts[1]), float(parts[2])))
+        except ValueError:
+            continue
+    return segments
+
+
+def _match_segments(ranges, segments):
+    """Map each range index to (segment name, segment start) from the segment list.
+
+    A segment matches when it starts in [start, start + SEGMENT_SNAP_TOLERANCE]
+    (give or take SEGMENT_START_TOLERANCE) and ends within
+    SEGMENT_SNAP_TOLERANCE of the range end.
+    """
+    used = set()
+    matches = {}
+    for index, (start, end) in enumerate(ranges):
+        for name, seg_start, seg_end in segments:
+            if name in used:
                 continue
-            except Exception:
-                pass
-        run_command([
+            if not -SEGMENT_START_TOLERANCE <= seg_start - start <= SEGMENT_SNAP_TOLERANCE:
+                continue
+            if abs(seg_end - end) > SEGMENT_SNAP_TOLERANCE:
+                continue
+            matches[index] = (name, seg_start)
+            used.add(name)
+            break
+    return matches
+
+
+def split_video_batch(source_path, ranges, work_dir, fast_copy=True, processes=None):
+    """Split every range with one stream-copy segment pass over the source.
+
+    Returns [(clip_path, clip_start), ...] in range order. The ffmpeg
+    segment muxer reads the source once, up to the end of the last range,
+    and cuts on the first keyframe at or after each cut point, so a clip
+    may start up to SEGMENT_SNAP_TOLERANCE late: clip_start is the source
+    time the clip actually begins at, and subtitles or word tokens for it
+    must be trimmed from there. Gap segments are discarded. Each range
+    without a matching segment costs one extra seek-and-copy through the
+    per-clip split (clip_start is then the requested start); every range
+    goes that way when ranges overlap or re-encoding is requested.
+    """
+    work_dir = Path(work_dir)
+    clip_paths = [work_dir / f'clip_{idx:03d}.mp4' for idx in range(1, len(ranges) + 1)]
+    cuts = _plan_segment_cuts(ranges) if fast_copy and ranges else None
+    if not cuts:
+        return [
+            (split_range(source_path, start, end, clip_path, fast_copy=fast_copy, processes=processes), start)
+            for (start, end), clip_path in zip(ranges, clip_paths)
+        ]
+
+    segment_dir = work_dir / 'segments'
+    shutil.rmtree(segment_dir, ignore_errors=True)
+    segment_dir.mkdir(parents=True, exist_ok=True)
+    list_path = segment_dir / 'segments.csv'
+    try:
+        command = [
             'ffmpeg',
             '-y',
             '-i', str(source_path),
-            '-ss', str(start),
-            '-t', str(duration),
-            '-c:v', 'libx264',
-            '-c:a', 'aac',
-            '-movflags', '+faststart',
-            str(clip_path),
-        ])
-        clips.append(clip_path)
-    return clips
+            # The last cut is the end of the last range; stop reading there.
+            '-t', str(cuts[-1]),
+            # Data/chapter streams can make the mp4 segment muxer fail.
+            '-map', '0:v:0',
+            '-map', '0:a?',
+            '-c', 'copy',
+            '-f', 'segment',
+            '-segment_format', 'mp4',
+            '-segment_format_options', 'movflags=+faststart',
+            '-segment_list', str(list_path),
+            '-segment_list_type', 'csv',
+            '-reset_timestamps', '1',
+        ]
+        if len(cuts) > 1:
+            command.extend(['-segment_times', ','.join(str(cut) for cut in cuts[:-1])])
+        command.append(str(segment_dir / 'seg_%03d.mp4'))
+        try:
+            run_command(command, processes=processes)
+        except Exception:
+            pass
+
+        matches = _match_segments(ranges, _read_segment_list(list_path))
+        clips = []
+        for index, ((start, end), clip_path) in enumerate(zip(ranges, clip_paths)):
+            name, seg_start = matches.get(index, (None, start))
+            match = segment_dir / name if name else None
+            if match and match.exists() and match.stat().st_size > 0:
+                match.replace(clip_path)
+                clips.append((clip_path, max(start, seg_start)))
+                continue
+            clips.append((split_range(source_path, start, end, clip_path, fast_copy=fast_copy, processes=processes), start))
+        return clips
+    finally:
+        shutil.rmtree(segment_dir, ignore_errors=True)
 
 
-def burn_subtitles(clip_path, srt_path, output_path, font_name='Arial', font_size=28):
+def _subtitle_filter(srt_path, font_name='Arial', font_size=28):
     safe_font_name = (font_name or 'Arial').replace("'", '')
     safe_font_size = max(14, min(72, int(font_size or 28)))
     style = f"FontName={safe_font_name},FontSize={safe_font_size},Outline=1,Shadow=0,MarginV=28"
-    subtitle_filter = f"subtitles='{escape_ffmpeg_path(srt_path)}':force_style='{style}'"
-    run_command([
-        'ffmpeg',
-        '-y',
-        '-i', str(clip_path),
-        '-vf', subtitle_filter,
-        '-c:a', 'copy',
-        str(output_path),
-    ])
+    return f"subtitles='{escape_ffmpeg_path(srt_path)}':force_style='{style}'"
 
 
 def burn_subtitles_from_words(clip_path, words_json_path, output_path, font_name='Arial', font_size=28):
@@ -416,22 +827,105 @@ def burn_subtitles_from_words(clip_path, words_json_path, output_path, font_name
             pass
 
 
-def convert_to_portrait(input_path, output_path):
+def _portrait_filter(input_path, start=None, end=None, pose_index=None, processes=None):
+    """Return (filter, crop_track, script_path) for a 9:16 reframe of input_path.
+
+    The crop follows the smoothed speaker trajectory, so motion costs no
+    extra decode pass. Each segment's expression is swapped in by a
+    sendcmd script written to a temp file (script_path, to be removed by
+    the caller), which keeps the ffmpeg argument and per-frame cost
+    constant however long the clip is. With a pose_index of the source the
+    track is sliced from it instead of decoding the range again. crop_track
+    and script_path are None when falling back to a centre crop.
+    """
     debug_reframe = os.getenv('REFRAME_DEBUG') == '1'
-    crop = compute_dominant_person_crop(str(input_path), debug=debug_reframe)
-    if crop:
-        crop_x, crop_y, crop_w, crop_h = crop
-        vf = f"crop={crop_w}:{crop_h}:{crop_x}:{crop_y},scale=1080:1920"
+    if pose_index is not None:
+        track = crop_track_from_index(pose_index, start or 0, end, debug=debug_reframe)
     else:
-        vf = 'scale=1080:1920:force_original_aspect_ratio=increase,crop=1080:1920'
-
-    run_command([
-        'ffmpeg',
-        '-y',
-        '-i', str(input_path),
-        '-vf', vf,
+        time_budget = float(os.getenv('REFRAME_TIME_BUDGET', '0') or 0) or None
+        max_samples = int(os.getenv('REFRAME_MAX_SAMPLES', '0') or 0) or None
+        track = compute_person_crop_track(
+            str(input_path),
+            debug=debug_reframe,
+            start=start,
+            end=end,
+            time_budget=time_budget,
+            processes=processes,
+            max_samples=max_samples,
+        )
+    if track and track['keyframes']:
+        crop_x, crop_y, script = crop_track_commands(track['keyframes'])
+        crop = f"crop=w={track['crop_w']}:h={track['crop_h']}:x='{crop_x}':y='{crop_y}',scale=1080:1920"
+        if not script:
+            return crop, track, None
+        with NamedTemporaryFile('w', suffix='.cmd', delete=False, encoding='utf-8') as tmp:
+            tmp.write(script)
+            script_path = tmp.name
+        return f"sendcmd=f='{escape_ffmpeg_path(script_path)}',{crop}", track, script_path
+    return 'scale=1080:1920:force_original_aspect_ratio=increase,crop=1080:1920', None, None
+
+
+def build_render_command(input_path, output_path, start=0, end=None, filters=None):
+    """Build one ffmpeg encode: accurate seek, optional filter chain, output."""
+    command = ['ffmpeg', '-y']
+    if start:
+        command.extend(['-ss', str(start)])
+    command.extend(['-i', str(input_path)])
+    if end is not None:
+        command.extend(['-t', str(max(0, end - (start or 0)))])
+    if filters:
+        command.extend(['-vf', ','.join(filters)])
+    command.extend([
         '-c:v', 'libx264',
         '-c:a', 'aac',
         '-movflags', '+faststart',
         str(output_path),
     ])
+    return command
+
+
+def render_clip(
+    input_path,
+    output_path,
+    start=0,
+    end=None,
+    portrait=False,
+    srt_path=None,
+    font_name='Arial',
+    font_size=28,
+    pose_index=None,
+    processes=None,
+):
+    """Cut, reframe and burn subtitles for one clip in a single encode.
+
+    Seeks straight into input_path (source video or an already-cut clip),
+    applies the portrait crop/scale and then the subtitles filter in one
+    filter graph, so there is no intermediate portrait file and the clip
+    is encoded exactly once. srt_path must be relative to start, and
+    pose_index (see clips.reframe.build_pose_index) must describe input_path.
+
+    Returns the portrait crop track (keyframes with debug data) or None.
+    """
+    filters = []
+    track = None
+    script_path = None
+    if portrait:
+        portrait_filter, track, script_path = _portrait_filter(
+            input_path,
+            start=start or None,
+            end=end,
+            pose_index=pose_index,
+            processes=processes,
+        )
+        filters.append(portrait_filter)
+    if srt_path:
+        filters.append(_subtitle_filter(srt_path, font_name=font_name, font_size=font_size))
+    try:
+        run_command(
+            build_render_command(input_path, output_path, start=start, end=end, filters=filters),
+            processes=processes,
+        )
+    finally:
+        if script_path:
+            Path(script_path).unlink(missing_ok=True)
+    return track
@@ -0,0 +1,163 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+from django.conf import settings
+
+SOURCE_NAME = 'source.mp4'
+REFS_DIR = 'refs'
+# A ref older than this belongs to a worker that died without releasing it.
+STALE_REF_SECONDS = 24 * 60 * 60
+
+
+def get_cache_dir() -> Path:
+    return Path(getattr(settings, 'SOURCE_CACHE_DIR', Path(settings.MEDIA_ROOT) / 'source_cache'))
+
+
+def get_cache_max_bytes() -> int:
+    return int(getattr(settings, 'SOURCE_CACHE_MAX_BYTES', 20 * 1024 * 1024 * 1024))
+
+
+def is_enabled() -> bool:
+    return get_cache_max_bytes() > 0
+
+
+def make_cache_key(video_id: str, selector: str) -> str:
+    raw = json.dumps({'video': video_id, 'format': selector}, sort_keys=True)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+def _entry_dir(key: str) -> Path:
+    return get_cache_dir() / key[:2] / key
+
+
+def acquire(key: str, owner: str) -> None:
+    """Pin an entry so eviction leaves it alone until release()."""
+    refs = _entry_dir(key) / REFS_DIR
+    for _ in range(3):
+        refs.mkdir(parents=True, exist_ok=True)
+        try:
+            (refs / owner).touch()
+            return
+        except FileNotFoundError:
+            # A concurrent release()/evict() pruned the empty entry; recreate it.
+            continue
+    (refs / owner).touch()
+
+
+def release(key: str, owner: str) -> None:
+    entry = _entry_dir(key)
+    (entry / REFS_DIR / owner).unlink(missing_ok=True)
+    # Nothing was stored (e.g. the download failed): drop the empty entry.
+    _prune(entry)
+
+
+def _prune(entry: Path) -> None:
+    """Remove the entry's refs dir, the entry and its prefix dir while they are empty."""
+    for path in (entry / REFS_DIR, entry, entry.parent):
+        try:
+            path.rmdir()
+        except FileNotFoundError:
+            continue
+        except OSError:
+            return
+
+
+def _ref_count(entry: Path) -> int:
+    refs = entry / REFS_DIR
+    if not refs.exists():
+        return 0
+    now = time.time()
+    count = 0
+    for ref in refs.iterdir():
+        try:
+            if now - ref.stat().st_mtime < STALE_REF_SECONDS:
+                count += 1
+        except OSError:
+            continue
+    return count
+
+
+def _link_or_copy(src: Path, dest: Path) -> None:
+    dest.unlink(missing_ok=True)
+    try:
+        os.link(src, dest)
+    except OSError:
+        # Different filesystem (or no hardlink support): fall back to a copy.
+        shutil.copyfile(src, dest)
+
+
+def link_cached(key: str, dest: Path) -> Optional[Path]:
+    """Hardlink a cached source to dest. Returns dest on a hit, else None."""
+    cached = _entry_dir(key) / SOURCE_NAME
+    if not cached.exists():
+        return None
+    try:
+        _link_or_copy(cached, Path(dest))
+        # Touch on hit so eviction is least-recently-used.
+        os.utime(cached, None)
+    except OSError:
+        return None
+    return Path(dest)
+
+
+def store(key: str, source_path: Path) -> bool:
+    """Add a finished download to the cache without copying its bytes.
+
+    Caching is best-effort: a failure here never fails the job.
+    """
+    entry = _entry_dir(key)
+    # Per thread as well as per process: jobs in one worker may store the same key.
+    tmp_path = entry / f'{SOURCE_NAME}.{os.getpid()}.{threading.get_ident()}.tmp'
+    try:
+        entry.mkdir(parents=True, exist_ok=True)
+        _link_or_copy(Path(source_path), tmp_path)
+        tmp_path.replace(entry / SOURCE_NAME)
+    except OSError:
+        tmp_path.unlink(missing_ok=True)
+        return False
+    evict(get_cache_max_bytes())
+    return True
+
+
+def evict(max_bytes: int) -> int:
+    """Delete least-recently-used, unreferenced entries until the cache fits max_bytes.
+
+    Entries without a source and without live refs are always removed.
+    """
+    cache_dir = get_cache_dir()
+    if not cache_dir.exists():
+        return 0
+    entries = []
+    total = 0
+    for path in cache_dir.glob(f'*/*/{SOURCE_NAME}'):
+        try:
+            stat = path.stat()
+        except OSError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, path.parent))
+        total += stat.st_size
+    for entry in cache_dir.glob('*/*'):
+        # Entries that never got a source: only stale refs can be left in them.
+        if entry.is_dir() and not (entry / SOURCE_NAME).exists() and not _ref_count(entry):
+            refs = entry / REFS_DIR
+            if refs.is_dir():
+                for ref in refs.iterdir():
+                    ref.unlink(missing_ok=True)
+            _prune(entry)
+    removed = 0
+    for _, size, entry in sorted(entries):
+        if total <= max_bytes:
+            break
+        if _ref_count(entry):
+            continue
+        shutil.rmtree(entry, ignore_errors=True)
+        _prune(entry)
+        total -= size
+        removed += 1
+    return removed
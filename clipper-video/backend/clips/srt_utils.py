@@ -1,5 +1,5 @@
 import re
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional, Tuple
 
 from .utils import format_srt_time
 
@@ -72,24 +72,44 @@ def parse_srt(content: str) -> List[Dict[str, Any]]:
     return entries
 
 
+def _clip_window(start: float, end: float, clip_start: float, clip_end: float) -> Optional[Tuple[float, float]]:
+    """(start, end) clamped to [clip_start, clip_end] and relative to clip_start, or None outside it."""
+    start = float(start)
+    end = float(end)
+    if end <= clip_start or start >= clip_end:
+        return None
+    return max(start, clip_start) - clip_start, min(end, clip_end) - clip_start
+
+
 def trim_srt(content: str, clip_start: float, clip_end: float) -> List[Dict[str, Any]]:
     entries = parse_srt(content)
     trimmed: List[Dict[str, Any]] = []
     for entry in entries:
-        start = float(entry["start"])
-        end = float(entry["end"])
-        if end <= clip_start or start >= clip_end:
+        window = _clip_window(entry["start"], entry["end"], clip_start, clip_end)
+        if window is None:
             continue
         trimmed.append(
             {
-                "start": max(start, clip_start) - clip_start,
-                "end": min(end, clip_end) - clip_start,
+                "start": window[0],
+                "end": window[1],
                 "text": _clean_caption_text(entry["text"]),
             }
         )
     return dedupe_entries(trimmed)
 
 
+def trim_words(words: List[Dict[str, Any]], clip_start: float, clip_end: float) -> List[Dict[str, Any]]:
+    trimmed: List[Dict[str, Any]] = []
+    for word in words or []:
+        window = _clip_window(word["start"], word["end"], clip_start, clip_end)
+        if window is None or window[1] <= window[0]:
+            continue
+        token = dict(word)
+        token["start"], token["end"] = window
+        trimmed.append(token)
+    return trimmed
+
+
 def normalize_text_for_compare(text: str) -> str:
     lowered = (text or "").lower().strip()
     collapsed = _SPACE_RE.sub(" ", lowered)
@@ -1,15 +1,33 @@
 import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Any, Dict, List, Tuple
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
 
 try:
-    from faster_whisper import WhisperModel
+    from faster_whisper import WhisperModel, decode_audio
 
     HAS_FASTER_WHISPER = True
 except ImportError:
     WhisperModel = None
+    decode_audio = None
     HAS_FASTER_WHISPER = False
 
+try:
+    from faster_whisper import BatchedInferencePipeline
+except ImportError:
+    BatchedInferencePipeline = None
+
+try:
+    from faster_whisper.vad import VadOptions, get_speech_timestamps
+except ImportError:
+    VadOptions = None
+    get_speech_timestamps = None
+
 try:
     import stable_whisper
 
@@ -18,51 +36,319 @@ except ImportError:
     stable_whisper = None
     HAS_STABLE_WHISPER = False
 
+from . import asr_cache
 from .utils import format_srt_time
 from .srt_utils import dedupe_entries, export_word_srt_from_tokens, export_word_webvtt_from_tokens
 
-_MODEL_CACHE: Dict[Tuple[str, str, str], Dict[str, Any]] = {}
+BEAM_SIZE = 5
+VAD_PARAMETERS = {"min_silence_duration_ms": 500}
+PCM_SAMPLE_RATE = 16000
+PCM_SUFFIX = ".f32"
+
+# Long PCM inputs are split at pauses between speech and fed to Whisper one window at
+# a time (in parallel with several workers), so only the windows being
+# transcribed are copied out of the memmap.
+CHUNK_SECONDS = 600
+CHUNK_MIN_SECONDS = 900
+CHUNK_SEARCH_SECONDS = 30
+CHUNK_OVERLAP_SECONDS = 1.0
+_SILENCE_FRAME = 480  # 30 ms at 16 kHz
+
+# Batched transcription of many short clips in one pipeline run.
+BATCH_SIZE = 16
+# Silence between inputs. The pipeline merges VAD segments into chunks of up
+# to 30 s and drops the silence inside a chunk, so the gap must be longer
+# than that for no chunk to span two inputs.
+BATCH_GAP_SECONDS = 32.0
+# Audio per pipeline call, gaps included; about 40 MB of float32 PCM at 16 kHz.
+BATCH_MAX_SECONDS = 600
+
+
+_CUDA_FAILED = False
 
 
 def _pick_device() -> Tuple[str, str]:
     cuda_visible = (os.environ.get("CUDA_VISIBLE_DEVICES") or "").strip()
     has_cuda = bool(cuda_visible and cuda_visible != "-1")
-    if has_cuda:
+    if has_cuda and not _CUDA_FAILED:
         return ("cuda", "float16")
     return ("cpu", "int8")
 
 
+def get_chunk_workers() -> int:
+    """Parallel transcription workers for chunked ASR (WHISPER_CHUNK_WORKERS)."""
+    raw = os.environ.get("WHISPER_CHUNK_WORKERS", "").strip()
+    if raw:
+        try:
+            return max(1, int(raw))
+        except ValueError:
+            return 1
+    return max(1, min(4, (os.cpu_count() or 1) // 4))
+
+
+# Rough resident size per model, used when RSS cannot be measured.
+_MODEL_SIZE_ESTIMATES = {
+    "tiny": 150 * 1024 * 1024,
+    "base": 250 * 1024 * 1024,
+    "small": 700 * 1024 * 1024,
+    "medium": 1800 * 1024 * 1024,
+}
+
+
+def _rss_bytes() -> int:
+    try:
+        with open("/proc/self/statm", "r", encoding="ascii") as handle:
+            return int(handle.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+class ModelCache:
+    """LRU cache of loaded models bounded by an approximate byte budget.
+
+    The most recently used model is never evicted, so a budget smaller than
+    one model still works (it just keeps a single model resident).
+    """
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Tuple[Any, ...], Tuple[Dict[str, Any], int]]" = OrderedDict()
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.load_seconds = 0.0
+
+    def get(self, key: Tuple[Any, ...], record: bool = True) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                if record:
+                    self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            if record:
+                self.hits += 1
+            return entry[0]
+
+    def put(self, key: Tuple[Any, ...], wrapper: Dict[str, Any], size: int, load_seconds: float) -> None:
+        with self._lock:
+            self._entries[key] = (wrapper, size)
+            self._entries.move_to_end(key)
+            self.load_seconds += load_seconds
+            while self.resident_bytes() > self.max_bytes and len(self._entries) > 1:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def resident_bytes(self) -> int:
+        return sum(size for _, size in self._entries.values())
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "models": [list(key) for key in self._entries],
+                "resident_bytes": self.resident_bytes(),
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "load_seconds": round(self.load_seconds, 3),
+            }
+
+
+_MODEL_CACHE = ModelCache(int(os.environ.get("WHISPER_MODEL_CACHE_MAX_BYTES", str(2 * 1024 * 1024 * 1024))))
+# Serialises loads so concurrent threads do not load the same model twice.
+_LOAD_LOCK = threading.Lock()
+
+
+def get_model_cache_stats() -> Dict[str, Any]:
+    return _MODEL_CACHE.stats()
+
+
+def _load_model(model_size: str, device: str, compute_type: str, num_workers: int, cpu_threads: int) -> Dict[str, Any]:
+    if HAS_FASTER_WHISPER:
+        model = WhisperModel(
+            model_size,
+            device=device,
+            compute_type=compute_type,
+            num_workers=num_workers,
+            cpu_threads=cpu_threads,
+        )
+        return {"backend": "faster", "model": model}
+
+    if HAS_STABLE_WHISPER:
+        # Fallback backend if faster-whisper is unavailable.
+        model = stable_whisper.load_model(model_size, device=device)
+        return {"backend": "stable", "model": model}
+
+    raise RuntimeError("Neither faster_whisper nor stable_whisper is installed")
+
+
+def _model_threads() -> Tuple[int, int]:
+    """(num_workers, cpu_threads) every model in this process is loaded with.
+
+    One configuration keeps a single copy of each model: it can run
+    WHISPER_CHUNK_WORKERS transcribe() calls in parallel from different
+    threads, each on an equal share of the CPUs.
+    """
+    workers = get_chunk_workers()
+    if workers <= 1:
+        return 1, 0
+    return workers, max(1, (os.cpu_count() or 1) // workers)
+
+
 def get_whisper_model(model_size: str) -> Dict[str, Any]:
+    """Load (or reuse) a Whisper model, one per (size, device, compute type)."""
+    global _CUDA_FAILED
+
+    num_workers, cpu_threads = _model_threads()
     device, compute_type = _pick_device()
     cache_key = (model_size, device, compute_type)
-    if cache_key in _MODEL_CACHE:
-        return _MODEL_CACHE[cache_key]
+    wrapper = _MODEL_CACHE.get(cache_key)
+    if wrapper is not None:
+        return wrapper
 
-    if HAS_FASTER_WHISPER:
-        try:
-            model = WhisperModel(model_size, device=device, compute_type=compute_type)
-            wrapper = {"backend": "faster", "model": model}
-            _MODEL_CACHE[cache_key] = wrapper
+    with _LOAD_LOCK:
+        wrapper = _MODEL_CACHE.get(cache_key, record=False)
+        if wrapper is not None:
             return wrapper
+        rss_before = _rss_bytes()
+        started = time.monotonic()
+        try:
+            wrapper = _load_model(model_size, device, compute_type, num_workers, cpu_threads)
         except Exception:
-            if device == "cuda":
-                cpu_key = (model_size, "cpu", "int8")
-                if cpu_key in _MODEL_CACHE:
-                    return _MODEL_CACHE[cpu_key]
-                model = WhisperModel(model_size, device="cpu", compute_type="int8")
-                wrapper = {"backend": "faster", "model": model}
-                _MODEL_CACHE[cpu_key] = wrapper
+            if device != "cuda" or not HAS_FASTER_WHISPER:
+                raise
+            # Remember the failure so later calls go straight to the CPU entry.
+            _CUDA_FAILED = True
+            device, compute_type = _pick_device()
+            cache_key = (model_size, device, compute_type)
+            wrapper = _MODEL_CACHE.get(cache_key, record=False)
+            if wrapper is not None:
                 return wrapper
-            raise
-
-    if HAS_STABLE_WHISPER:
-        # Fallback backend if faster-whisper is unavailable.
-        model = stable_whisper.load_model(model_size, device=device)
-        wrapper = {"backend": "stable", "model": model}
-        _MODEL_CACHE[cache_key] = wrapper
+            wrapper = _load_model(model_size, device, compute_type, num_workers, cpu_threads)
+        elapsed = time.monotonic() - started
+        size = _rss_bytes() - rss_before
+        if size <= 0:
+            size = _MODEL_SIZE_ESTIMATES.get(model_size, _MODEL_SIZE_ESTIMATES["small"])
+        _MODEL_CACHE.put(cache_key, wrapper, size, elapsed)
         return wrapper
 
-    raise RuntimeError("Neither faster_whisper nor stable_whisper is installed")
+
+def load_pcm(path: str) -> np.ndarray:
+    """Memory-map raw 16 kHz mono float32 PCM (see services.extract_audio_pcm)."""
+    return np.memmap(str(path), dtype=np.float32, mode="r")
+
+
+def _audio_input(input_path: str) -> Any:
+    # Whisper accepts a float32 array at 16 kHz, which skips its own decoding.
+    if str(input_path).endswith(PCM_SUFFIX):
+        return load_pcm(input_path)
+    return str(input_path)
+
+
+def preload_models(model_sizes: List[str]) -> None:
+    """Load models up front so the first request does not pay the load latency."""
+    for model_size in model_sizes:
+        get_whisper_model(model_size)
+
+
+def _find_quiet_point(audio: np.ndarray, target: float, search: float) -> float:
+    """Time (s) of the lowest-energy 30 ms frame within target +/- search."""
+    lo = max(0, int((target - search) * PCM_SAMPLE_RATE))
+    hi = min(len(audio), int((target + search) * PCM_SAMPLE_RATE))
+    frames = (hi - lo) // _SILENCE_FRAME
+    if frames <= 0:
+        return target
+    window = np.asarray(audio[lo:lo + frames * _SILENCE_FRAME], dtype=np.float32)
+    energy = np.square(window.reshape(frames, _SILENCE_FRAME)).mean(axis=1)
+    best = int(np.argmin(energy))
+    return (lo + best * _SILENCE_FRAME + _SILENCE_FRAME // 2) / PCM_SAMPLE_RATE
+
+
+def _find_speech_gap(audio: np.ndarray, target: float, search: float) -> Optional[float]:
+    """Middle (s) of the non-speech gap nearest target within target +/- search.
+
+    Uses faster-whisper's Silero VAD with the transcription VAD_PARAMETERS.
+    Returns None when VAD is unavailable or finds no gap in the window.
+    """
+    if get_speech_timestamps is None:
+        return None
+    lo = max(0, int((target - search) * PCM_SAMPLE_RATE))
+    hi = min(len(audio), int((target + search) * PCM_SAMPLE_RATE))
+    if hi <= lo:
+        return None
+    window = np.asarray(audio[lo:hi], dtype=np.float32)
+    speech = get_speech_timestamps(window, vad_options=VadOptions(**VAD_PARAMETERS))
+    edges = [0] + [edge for segment in speech for edge in (segment["start"], segment["end"])] + [len(window)]
+    gaps = list(zip(edges[::2], edges[1::2]))
+    # A gap touching the window edge may be a short pause cut off by the
+    # window; only trust it when it is as long as a VAD silence.
+    min_edge_gap = VAD_PARAMETERS["min_silence_duration_ms"] * PCM_SAMPLE_RATE // 1000
+    gaps = [
+        (start, end)
+        for start, end in gaps
+        if end > start and (0 < start and end < len(window) or end - start >= min_edge_gap)
+    ]
+    if not gaps:
+        return None
+    middle = target * PCM_SAMPLE_RATE - lo
+    start, end = min(gaps, key=lambda gap: abs((gap[0] + gap[1]) / 2 - middle))
+    return (lo + (start + end) // 2) / PCM_SAMPLE_RATE
+
+
+def plan_audio_chunks(audio: np.ndarray, chunk_seconds: float = CHUNK_SECONDS) -> List[Tuple[float, float]]:
+    """Split audio into ~chunk_seconds pieces, cutting in a pause between speech.
+
+    The cut is the VAD gap nearest each target; the quietest nearby frame is
+    only used when VAD is unavailable or hears speech across the whole
+    search window.
+    """
+    total = len(audio) / PCM_SAMPLE_RATE
+    cuts = [0.0]
+    while total - cuts[-1] > chunk_seconds * 1.5:
+        target = cuts[-1] + chunk_seconds
+        cut = _find_speech_gap(audio, target, CHUNK_SEARCH_SECONDS)
+        if cut is None:
+            cut = _find_quiet_point(audio, target, CHUNK_SEARCH_SECONDS)
+        cuts.append(cut)
+    cuts.append(total)
+    return list(zip(cuts, cuts[1:]))
+
+
+def _transcribe_chunk(model: Any, audio: np.ndarray, start: float, end: float, language: str) -> List[Dict[str, Any]]:
+    total = len(audio) / PCM_SAMPLE_RATE
+    lo = max(0.0, start - CHUNK_OVERLAP_SECONDS)
+    hi = min(total, end + CHUNK_OVERLAP_SECONDS)
+    piece = np.asarray(audio[int(lo * PCM_SAMPLE_RATE):int(hi * PCM_SAMPLE_RATE)], dtype=np.float32)
+    segments_iter, _ = model.transcribe(
+        piece,
+        language=(language or None),
+        beam_size=BEAM_SIZE,
+        word_timestamps=True,
+        vad_filter=True,
+        vad_parameters=VAD_PARAMETERS,
+        condition_on_previous_text=False,
+    )
+    owned: List[Dict[str, Any]] = []
+    for word in _collect_faster_whisper_words(list(segments_iter)):
+        word["start"] += lo
+        word["end"] += lo
+        # The overlap is transcribed twice; each chunk keeps only words centred in it.
+        middle = (word["start"] + word["end"]) / 2
+        if start <= middle < end:
+            owned.append(word)
+    return owned
+
+
+def _should_chunk(input_path: str) -> bool:
+    if not str(input_path).endswith(PCM_SUFFIX):
+        return False
+    try:
+        samples = os.path.getsize(input_path) // np.dtype(np.float32).itemsize
+    except OSError:
+        return False
+    return samples / PCM_SAMPLE_RATE >= CHUNK_MIN_SECONDS
 
 
 def _clean_word(word: str) -> str:
@@ -176,26 +462,202 @@ def _to_srt_from_segment_entries(entries: List[Dict[str, Any]], output_srt: str)
     return len(entries)
 
 
-def transcribe_to_word_tokens(input_path: str, language: str = "id", model_size: str = "tiny") -> List[Dict[str, Any]]:
+def _installed_backend() -> str:
+    """The backend _load_model would pick, known without loading anything."""
+    if HAS_FASTER_WHISPER:
+        return "faster"
+    if HAS_STABLE_WHISPER:
+        return "stable"
+    raise RuntimeError("Neither faster_whisper nor stable_whisper is installed")
+
+
+def _transcribe_params(backend: str) -> Dict[str, Any]:
+    """Decoding parameters that affect word output; part of the cache key."""
+    if backend == "faster":
+        return {"backend": backend, "beam_size": BEAM_SIZE, "vad": VAD_PARAMETERS}
+    return {"backend": backend, "vad": True, "regroup": True}
+
+
+def transcribe_to_word_tokens(
+    input_path: str,
+    language: str = "id",
+    model_size: str = "tiny",
+    use_cache: bool = True,
+) -> List[Dict[str, Any]]:
+    """Word tokens for input_path, served from the transcript cache when possible.
+
+    Long PCM inputs are transcribed in windows (see plan_audio_chunks), in
+    parallel when WHISPER_CHUNK_WORKERS allows. The model is only loaded on
+    a cache miss.
+    """
+    key = None
+    if use_cache:
+        key = asr_cache.make_cache_key(
+            asr_cache.audio_fingerprint(input_path),
+            language,
+            model_size,
+            _transcribe_params(_installed_backend()),
+        )
+        cached = asr_cache.load_words(key)
+        if cached is not None:
+            return cached
+
+    chunked = _should_chunk(input_path)
+    workers = get_chunk_workers() if chunked else 1
     engine = get_whisper_model(model_size)
+    words = _transcribe_words(engine, input_path, language, workers, chunked=chunked)
+    if key:
+        asr_cache.store_words(key, words)
+    return words
+
+
+def _load_audio_array(input_path: str) -> np.ndarray:
+    if str(input_path).endswith(PCM_SUFFIX):
+        return np.asarray(load_pcm(input_path), dtype=np.float32)
+    return decode_audio(str(input_path), sampling_rate=PCM_SAMPLE_RATE)
+
+
+def _transcribe_group(pipeline: Any, audios: List[np.ndarray], language: str) -> List[List[Dict[str, Any]]]:
+    gap = np.zeros(int(BATCH_GAP_SECONDS * PCM_SAMPLE_RATE), dtype=np.float32)
+    pieces: List[np.ndarray] = []
+    bounds: List[Tuple[float, float]] = []
+    cursor = 0
+    for audio in audios:
+        bounds.append((cursor / PCM_SAMPLE_RATE, (cursor + len(audio)) / PCM_SAMPLE_RATE))
+        pieces.extend([audio, gap])
+        cursor += len(audio) + len(gap)
+
+    segments_iter, _ = pipeline.transcribe(
+        np.concatenate(pieces),
+        language=(language or None),
+        beam_size=BEAM_SIZE,
+        batch_size=BATCH_SIZE,
+        word_timestamps=True,
+        vad_filter=True,
+        vad_parameters=VAD_PARAMETERS,
+        condition_on_previous_text=False,
+    )
+    words = sorted(_collect_faster_whisper_words(list(segments_iter)), key=lambda item: item["start"])
+
+    per_input: List[List[Dict[str, Any]]] = [[] for _ in audios]
+    index = 0
+    for word in words:
+        middle = (word["start"] + word["end"]) / 2
+        while index + 1 < len(bounds) and middle >= bounds[index][1]:
+            index += 1
+        clip_start, clip_end = bounds[index]
+        if not clip_start <= middle < clip_end:
+            continue
+        word["start"] = max(0.0, word["start"] - clip_start)
+        word["end"] = min(clip_end, word["end"]) - clip_start
+        per_input[index].append(word)
+    return [_clean_words(words) for words in per_input]
+
+
+def _transcribe_batched(model: Any, input_paths: List[str], language: str) -> List[List[Dict[str, Any]]]:
+    """Run inputs through BatchedInferencePipeline, one bounded group at a time.
+
+    A group's inputs are laid end to end with BATCH_GAP_SECONDS of silence
+    and transcribed in one call. The gap is longer than the pipeline's 30 s
+    chunk merge, so every chunk holds speech from one input only; words are
+    mapped back to the input holding their midpoint. Groups stop growing at
+    BATCH_MAX_SECONDS of audio and gaps so memory stays bounded however many
+    clips a job has.
+    """
+    pipeline = BatchedInferencePipeline(model=model)
+    max_samples = int(BATCH_MAX_SECONDS * PCM_SAMPLE_RATE)
+    gap_samples = int(BATCH_GAP_SECONDS * PCM_SAMPLE_RATE)
+    results: List[List[Dict[str, Any]]] = []
+    group: List[np.ndarray] = []
+    group_samples = 0
+    for input_path in input_paths:
+        audio = _load_audio_array(input_path)
+        group.append(audio)
+        group_samples += len(audio) + gap_samples
+        if group_samples >= max_samples:
+            results.extend(_transcribe_group(pipeline, group, language))
+            group = []
+            group_samples = 0
+    if group:
+        results.extend(_transcribe_group(pipeline, group, language))
+    return results
+
+
+def transcribe_batch_to_word_tokens(
+    input_paths: List[str],
+    language: str = "id",
+    model_size: str = "tiny",
+    use_cache: bool = True,
+) -> List[List[Dict[str, Any]]]:
+    """Word tokens for many short inputs, transcribed in one batched pass.
+
+    Cached inputs are served from the transcript cache; the rest go through
+    faster-whisper's batched pipeline together. Falls back to one call per
+    input when batching is unavailable. The model is only loaded when some
+    input misses the cache.
+    """
+    backend = _installed_backend()
+    if backend != "faster" or BatchedInferencePipeline is None:
+        return [
+            transcribe_to_word_tokens(path, language=language, model_size=model_size, use_cache=use_cache)
+            for path in input_paths
+        ]
+
+    results: List[Optional[List[Dict[str, Any]]]] = [None] * len(input_paths)
+    keys: List[Optional[str]] = [None] * len(input_paths)
+    if use_cache:
+        params = _transcribe_params(backend)
+        for idx, path in enumerate(input_paths):
+            keys[idx] = asr_cache.make_cache_key(asr_cache.audio_fingerprint(path), language, model_size, params)
+            results[idx] = asr_cache.load_words(keys[idx])
+
+    missing = [idx for idx, words in enumerate(results) if words is None]
+    if missing:
+        engine = get_whisper_model(model_size)
+        batched = _transcribe_batched(engine["model"], [input_paths[idx] for idx in missing], language)
+        for idx, words in zip(missing, batched):
+            results[idx] = words
+            if keys[idx]:
+                asr_cache.store_words(keys[idx], words)
+    return [words or [] for words in results]
+
+
+def _transcribe_words(
+    engine: Dict[str, Any],
+    input_path: str,
+    language: str,
+    workers: int = 1,
+    chunked: bool = False,
+) -> List[Dict[str, Any]]:
     backend = engine["backend"]
     model = engine["model"]
 
-    if backend == "faster":
+    if backend == "faster" and chunked:
+        # Only the window being transcribed is copied out of the memmap;
+        # a single worker walks the windows in order.
+        audio = load_pcm(input_path)
+        chunks = plan_audio_chunks(audio)
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            results = executor.map(
+                lambda chunk: _transcribe_chunk(model, audio, chunk[0], chunk[1], language),
+                chunks,
+            )
+            words = [word for chunk_words in results for word in chunk_words]
+    elif backend == "faster":
         segments_iter, _ = model.transcribe(
-            str(input_path),
+            _audio_input(input_path),
             language=(language or None),
-            beam_size=5,
+            beam_size=BEAM_SIZE,
             word_timestamps=True,
             vad_filter=True,
-            vad_parameters={"min_silence_duration_ms": 500},
+            vad_parameters=VAD_PARAMETERS,
             condition_on_previous_text=False,
         )
         segments = list(segments_iter)
         words = _collect_faster_whisper_words(segments)
     else:
         result = model.transcribe(
-            str(input_path),
+            _audio_input(input_path),
             language=(language or None),
             vad=True,
             regroup=True,
@@ -204,6 +666,10 @@ def transcribe_to_word_tokens(input_path: str, language: str = "id", model_size:
         )
         words = _collect_stable_whisper_words(result)
 
+    return _clean_words(words)
+
+
+def _clean_words(words: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     cleaned: List[Dict[str, Any]] = []
     for token in words:
         word = _clean_word(token.get("word", ""))
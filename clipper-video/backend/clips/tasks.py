@@ -1,13 +1,24 @@
+import hashlib
+import logging
 import shutil
 import re
+import threading
+import time
+import zlib
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from pathlib import Path
 
-from celery import shared_task
+from celery import chain, shared_task
+from celery.concurrency.thread import TaskPool as ThreadTaskPool
+from celery.signals import worker_process_init, worker_ready
 from django.conf import settings
 from django.utils import timezone
 from datetime import timedelta
 
-from .models import Job
+from . import source_cache
+from .progress import publish_job_event, set_hot_progress
+from .manifest import job_outputs, record_output, remove_output
+from .models import Job, JobUpload
 from .services import (
     fetch_video_info,
     probe_duration_seconds,
@@ -15,21 +26,39 @@ from .services import (
     has_height,
     build_format_selector,
     download_video,
-    download_section,
+    download_video_progressive,
+    DownloadCoverage,
+    SectionFetcher,
+    write_info_json,
+    remove_info_json,
     download_subtitles,
+    extract_audio_pcm,
+    extract_clip_audio,
+    fetch_audio_pcm,
     pick_subtitle_file,
-    split_video,
-    burn_subtitles,
-    convert_to_portrait,
+    split_range,
+    split_video_batch,
+    render_clip,
     burn_subtitles_from_words,
 )
-from .srt_utils import write_trimmed_srt
-from .utils import parse_timecode, parse_yt_dlp_progress
+from .reframe import get_pose_index
+from .zipstream import ZipEntry, ZipStream
+from .srt_utils import export_word_srt_from_tokens, trim_words, write_trimmed_srt
+from .utils import ProcessGroup, parse_timecode, parse_yt_dlp_progress
 import json
-from .stt import transcribe_to_srt_from_words, transcribe_to_word_tokens
+from .stt import (
+    PCM_SUFFIX,
+    get_model_cache_stats,
+    preload_models,
+    transcribe_batch_to_word_tokens,
+    transcribe_to_word_tokens,
+)
 
 MAX_DURATION_SECONDS = 2 * 60 * 60
 MAX_CLIPS = 60
+CANCEL_POLL_SECONDS = 2.0
+# Extra seconds a progressive download must cover past a range's end.
+STREAM_MARGIN_SECONDS = 5.0
 CLIP_OUTPUT_RE = re.compile(r"^clip_(\d{3})(?:_caption)?\.mp4$")
 
 
@@ -45,6 +74,34 @@ def update_job(job, **fields):
     for key, value in fields.items():
         setattr(job, key, value)
     job.save(update_fields=list(fields.keys()) + ['updated_at'])
+    if 'progress' in fields or 'message' in fields:
+        # Keep the hot copy in step so readers never see an older value.
+        set_hot_progress(job.id, job.progress, job.message)
+    publish_job_event(job.id, 'status', _status_payload(job))
+
+
+def _status_payload(job):
+    return {
+        'status': job.status,
+        'progress': job.progress,
+        'message': job.message,
+        'error': job.error,
+    }
+
+
+def publish_result(job, path):
+    """Record a finished output in the manifest and announce it."""
+    output = record_output(job, path)
+    if output.kind == 'words':
+        return output
+    publish_job_event(job.id, 'result', {
+        'filename': output.filename,
+        'url': f"{settings.MEDIA_URL}jobs/{job.id}/{output.filename}",
+        'kind': output.kind,
+        'clip_index': output.clip_index,
+        'size': output.size,
+    })
+    return output
 
 
 def ensure_not_canceled(job):
@@ -53,6 +110,106 @@ def ensure_not_canceled(job):
         raise JobCanceledError('Canceled by user')
 
 
+class ProgressReporter:
+    """Coalesces high-frequency progress ticks for one job.
+
+    report() writes at most every PROGRESS_MIN_INTERVAL_MS, or sooner when
+    progress moved by PROGRESS_MIN_STEP points. With Redis available ticks
+    only go to the hot store and the database is written by update_job on
+    stage changes; without it they fall back to update_job. check_canceled()
+    queries the database at most every CANCEL_CHECK_INTERVAL_MS.
+    """
+
+    def __init__(self, job):
+        self.job = job
+        self.min_interval = getattr(settings, 'PROGRESS_MIN_INTERVAL_MS', 1000) / 1000
+        self.min_step = getattr(settings, 'PROGRESS_MIN_STEP', 5)
+        self.cancel_interval = getattr(settings, 'CANCEL_CHECK_INTERVAL_MS', 2000) / 1000
+        self._lock = threading.Lock()
+        self._written_at = 0.0
+        self._written_progress = int(job.progress or 0)
+        self._checked_at = time.monotonic()
+
+    def report(self, progress=None, message=None):
+        now = time.monotonic()
+        with self._lock:
+            progress = self._written_progress if progress is None else int(progress)
+            due = (
+                now - self._written_at >= self.min_interval
+                or abs(progress - self._written_progress) >= self.min_step
+            )
+            if not due:
+                return False
+            self._written_at = now
+            self._written_progress = progress
+        message = self.job.message if message is None else message
+        if set_hot_progress(self.job.id, progress, message):
+            self.job.progress, self.job.message = progress, message
+            publish_job_event(self.job.id, 'status', _status_payload(self.job))
+            self.check_canceled()
+        else:
+            update_job(self.job, progress=progress, message=message)
+            self._checked_at = time.monotonic()
+        return True
+
+    def check_canceled(self):
+        now = time.monotonic()
+        if now - self._checked_at < self.cancel_interval:
+            return
+        self._checked_at = now
+        ensure_not_canceled(self.job)
+
+
+def await_prefetch(future, reporter, watch=()):
+    """Wait on the task thread for a prefetch future; return (result, error).
+
+    Raises as soon as a future in watch fails (e.g. the video download), so
+    the job's error handling stops the other fetches instead of waiting for
+    this one first. Cancellation is checked while waiting.
+    """
+    watch = [other for other in watch if other is not None]
+    while not future.done():
+        for other in watch:
+            if other.done() and other.exception() is not None:
+                raise other.exception()
+        running = [other for other in watch if not other.done()]
+        wait([future, *running], timeout=CANCEL_POLL_SECONDS, return_when=FIRST_COMPLETED)
+        reporter.check_canceled()
+    error = future.exception()
+    return (None, error) if error is not None else (future.result(), None)
+
+
+def get_clip_workers():
+    """Number of clips processed concurrently inside one job."""
+    try:
+        return max(1, int(getattr(settings, 'CLIP_PROCESSING_WORKERS', 2)))
+    except (TypeError, ValueError):
+        return 1
+
+
+def write_word_tokens(out_path, words):
+    words_rounded = [
+        {
+            'word': w['word'],
+            'start': round(float(w['start']), 3),
+            'end': round(float(w['end']), 3),
+            'confidence': round(float(w.get('confidence', 1.0)), 3),
+        }
+        for w in words
+    ]
+    out_path.write_text(json.dumps(words_rounded, ensure_ascii=False), encoding='utf-8')
+
+
+def export_clip_srt(words, output_srt):
+    return export_word_srt_from_tokens(
+        words,
+        output_srt,
+        pause_threshold=0.35,
+        max_words_per_line=6,
+        max_chars=40,
+    )
+
+
 def iter_output_clips(job_dir):
     """Yield (clip_idx, clip_path) for final clip outputs.
 
@@ -72,6 +229,96 @@ def iter_output_clips(job_dir):
         yield clip_idx, selected[clip_idx]
 
 
+def _preload_asr_models():
+    model_sizes = getattr(settings, 'ASR_PRELOAD_MODELS', [])
+    if model_sizes:
+        preload_models(model_sizes)
+        logging.getLogger(__name__).info('ASR models preloaded: %s', get_model_cache_stats())
+
+
+@worker_process_init.connect
+def preload_asr_models(sender=None, **kwargs):
+    """Load ASR_PRELOAD_MODELS in the process that runs tasks.
+
+    Sent in each prefork child and in a solo worker; the prefork parent
+    never runs tasks, so loading there would only waste memory.
+    """
+    _preload_asr_models()
+
+
+@worker_ready.connect
+def preload_asr_models_threads(sender=None, **kwargs):
+    """The threads pool sends no worker_process_init: its tasks run here."""
+    if isinstance(getattr(sender, 'pool', None), ThreadTaskPool):
+        _preload_asr_models()
+
+
+@shared_task
+def transcribe_words_batch(items):
+    """Transcribe [{'input_path', 'language', 'model_size'}, ...] in one task.
+
+    Runs on the dedicated ASR queue when ASR_WORKER_QUEUE is set, so the
+    preloaded model in that worker is shared by every request. Returns
+    [{'words': [...]} | {'error': str}, ...] in request order. Items sharing
+    a language and model are transcribed together in one batched pass.
+    """
+    results = [None] * len(items)
+    groups = {}
+    for idx, item in enumerate(items):
+        key = (item.get('language') or 'id', item.get('model_size') or 'tiny')
+        groups.setdefault(key, []).append(idx)
+
+    for (language, model_size), indexes in groups.items():
+        paths = [items[idx]['input_path'] for idx in indexes]
+        try:
+            if len(paths) > 1:
+                batch = transcribe_batch_to_word_tokens(paths, language=language, model_size=model_size)
+                for idx, words in zip(indexes, batch):
+                    results[idx] = {'words': words}
+                continue
+        except Exception:
+            # Retry one by one so a single bad input only fails itself.
+            pass
+        for idx, path in zip(indexes, paths):
+            try:
+                words = transcribe_to_word_tokens(path, language=language, model_size=model_size)
+                results[idx] = {'words': words}
+            except Exception as exc:
+                results[idx] = {'error': str(exc)}
+    return results
+
+
+def transcribe_words(input_paths, language, model_size, raise_errors=True):
+    """Word tokens for each input path, via the ASR worker when configured.
+
+    Failed items raise (raise_errors=True) or come back as None.
+    """
+    items = [
+        {'input_path': str(path), 'language': language, 'model_size': model_size}
+        for path in input_paths
+    ]
+    queue = getattr(settings, 'ASR_WORKER_QUEUE', '')
+    if queue:
+        result = transcribe_words_batch.apply_async(args=[items], queue=queue)
+        # Waiting inside a task is intended here: the ASR worker is a separate pool.
+        results = result.get(
+            timeout=getattr(settings, 'ASR_WORKER_TIMEOUT', 3600),
+            disable_sync_subtasks=False,
+        )
+    else:
+        results = transcribe_words_batch(items)
+
+    words = []
+    for item in results:
+        if 'error' in item:
+            if raise_errors:
+                raise RuntimeError(f"Transcription failed: {item['error']}")
+            words.append(None)
+            continue
+        words.append(item['words'])
+    return words
+
+
 @shared_task
 def cleanup_old_jobs():
     """
@@ -88,12 +335,25 @@ def cleanup_old_jobs():
         if job_dir.exists():
             shutil.rmtree(job_dir, ignore_errors=True)
             deleted += 1
+        job.outputs.all().delete()
+
+    # Resumable uploads that were never finalized.
+    for upload in JobUpload.objects.filter(finalized_at__isnull=True, updated_at__lt=cutoff):
+        shutil.rmtree(base_dir / str(upload.target_job_id), ignore_errors=True)
+        upload.delete()
     return deleted
 
 
 @shared_task
 def process_job(job_id):
     job = Job.objects.get(id=job_id)
+    prefetch = ThreadPoolExecutor(max_workers=2)
+    # Downloads started here are stopped on cancel/failure before the work
+    # dir is removed, instead of running on in the background.
+    processes = ProcessGroup()
+    section_fetcher = None
+    cache_key = None
+    info_json = None
     try:
         ensure_not_canceled(job)
         update_job(job, status='running', progress=5, message='Preparing')
@@ -165,27 +425,97 @@ def process_job(job_id):
         job_dir.mkdir(parents=True, exist_ok=True)
         work_dir.mkdir(parents=True, exist_ok=True)
 
+        if info is not None:
+            # Later yt-dlp calls load this instead of re-running extraction.
+            info_json = write_info_json(info)
+
         selector = build_format_selector(job.strict_1080, job.min_height_fallback)
         source_path = None
-        if job.source_type == 'youtube':
-            if not job.download_sections:
-                last_reported = {'progress': 0}
+        if job.source_type == 'youtube' and not job.download_sections and source_cache.is_enabled():
+            cache_key = source_cache.make_cache_key(info.get('id') or job.youtube_url, selector)
+            source_cache.acquire(cache_key, str(job.id))
+            source_path = source_cache.link_cached(cache_key, work_dir / 'source.mp4')
+
+        prefer_auto_asr = bool(job.auto_captions)
+        per_clip_whisper = prefer_auto_asr and (
+            (job.source_type == 'youtube' and job.download_sections) or max_clips <= 3
+        )
+        audio_pcm = work_dir / f'audio_16k{PCM_SUFFIX}'
+        audio_future = None
+        if prefer_auto_asr and not per_clip_whisper and job.source_type == 'youtube' and source_path is None:
+            # Whisper only needs the audio: fetch it alongside the video download.
+            audio_future = prefetch.submit(
+                fetch_audio_pcm, job.youtube_url, work_dir, audio_pcm,
+                info_json=info_json, processes=processes,
+            )
+
+        wants_subtitles = job.burn_subtitles or job.auto_captions or job.generate_srt
+        subtitle_langs = job.subtitle_langs or ['id', 'en']
+        subtitles_future = None
+        if wants_subtitles and job.source_type == 'youtube' and not prefer_auto_asr:
+            # Independent network call: fetch subtitles while the video downloads.
+            subtitles_future = prefetch.submit(
+                download_subtitles, job.youtube_url, work_dir, subtitle_langs,
+                info_json=info_json, processes=processes,
+            )
 
+        reporter = ProgressReporter(job)
+        coverage = None
+        download_future = None
+        section_progress = {}
+        if source_path is not None:
+            update_job(job, progress=20, message='Using cached source video')
+        elif job.source_type == 'youtube':
+            if not job.download_sections and getattr(settings, 'PROGRESSIVE_DOWNLOAD', False):
+                # Clips start as soon as the download covers their range.
+                coverage = DownloadCoverage(work_dir / 'source.mp4')
+                download_future = prefetch.submit(
+                    download_video_progressive,
+                    job.youtube_url,
+                    work_dir,
+                    selector,
+                    coverage,
+                    info_json=info_json,
+                    processes=processes,
+                )
+                update_job(job, progress=20, message='Downloading video (progressive)')
+            elif not job.download_sections:
                 def handle_download_line(line):
-                    ensure_not_canceled(job)
+                    reporter.check_canceled()
                     percent = parse_yt_dlp_progress(line)
                     if percent is None:
                         return
                     scaled = 5 + int((percent / 100) * 15)
-                    if scaled > last_reported['progress']:
-                        last_reported['progress'] = scaled
-                        update_job(job, progress=scaled, message=f'Downloading video {percent:.1f}%')
+                    reporter.report(progress=scaled, message=f'Downloading video {percent:.1f}%')
 
                 update_job(job, message='Downloading video 0%')
-                source_path = download_video(job.youtube_url, work_dir, selector, on_line=handle_download_line)
+                source_path = download_video(
+                    job.youtube_url,
+                    work_dir,
+                    selector,
+                    on_line=handle_download_line,
+                    info_json=info_json,
+                    processes=processes,
+                )
                 update_job(job, progress=20, message='Download complete')
+                if cache_key:
+                    source_cache.store(cache_key, source_path)
             else:
                 update_job(job, progress=20, message='Using download-sections (streaming)')
+                section_progress = {}
+                section_fetcher = SectionFetcher(
+                    job.youtube_url,
+                    work_dir,
+                    selector,
+                    info_json=info_json,
+                    workers=getattr(settings, 'SECTION_DOWNLOAD_WORKERS', 3),
+                    on_progress=section_progress.__setitem__,
+                    processes=processes,
+                )
+                # Queue every section now: downloads run on the fetcher's own
+                # pool, ahead of the clip workers that consume them.
+                for idx, (section_start, section_end) in enumerate(ranges, start=1):
+                    section_fetcher.prefetch(idx, section_start, section_end)
         else:
             # Local source: file already exists, skip download.
             source_path = Path(settings.MEDIA_ROOT) / job.local_video_path
@@ -194,71 +524,196 @@ def process_job(job_id):
         update_job(job, progress=40, message='Processing clips (streaming)')
 
         subtitle_file = None
-        per_clip_whisper = False
-        wants_subtitles = job.burn_subtitles or job.auto_captions or job.generate_srt
-        prefer_auto_asr = bool(job.auto_captions)
+        full_words = None
 
-        if wants_subtitles and job.source_type == 'youtube' and not prefer_auto_asr:
+        if subtitles_future is not None:
             update_job(job, progress=60, message='Fetching subtitles')
-            try:
-                srt_files = download_subtitles(job.youtube_url, work_dir, job.subtitle_langs or ['id', 'en'])
-                subtitle_file = pick_subtitle_file(srt_files, job.subtitle_langs or ['id', 'en'])
-                if not subtitle_file:
-                    update_job(job, message='No YouTube subtitles found')
-            except Exception:
+            srt_files, error = await_prefetch(subtitles_future, reporter, watch=[download_future])
+            if error is None:
+                subtitle_file = pick_subtitle_file(srt_files, subtitle_langs)
+            if not subtitle_file:
                 update_job(job, message='No YouTube subtitles found')
         elif wants_subtitles and not prefer_auto_asr:
             update_job(job, progress=60, message='No YouTube subtitles for local source')
 
         if prefer_auto_asr:
-            if (job.source_type == 'youtube' and job.download_sections) or max_clips <= 3:
-                per_clip_whisper = True
+            if per_clip_whisper:
                 update_job(job, message='Auto captions per clip (word-level)')
             else:
                 update_job(job, message='Auto captions full audio (word-level)')
+                audio_path = None
+                if audio_future is not None:
+                    # A failed audio fetch falls back to the downloaded video.
+                    audio_path, _ = await_prefetch(audio_future, reporter, watch=[download_future])
+                if audio_path is None:
+                    if download_future is not None:
+                        source_path, error = await_prefetch(download_future, reporter)
+                        if error is not None:
+                            raise error
+                    audio_path = extract_audio_pcm(source_path, audio_pcm)
+                ensure_not_canceled(job)
                 full_srt = work_dir / 'whisper_full.srt'
-                transcribe_to_srt_from_words(
-                    source_path,
-                    full_srt,
+                # Keep the tokens: per-clip word JSON is sliced from them later.
+                full_words = transcribe_words(
+                    [audio_path],
                     language=job.auto_caption_lang,
                     model_size=job.whisper_model,
-                    pause_threshold=0.35,
-                    max_words_per_line=6,
-                    max_chars=40,
-                )
+                )[0]
+                export_clip_srt(full_words, full_srt)
                 ensure_not_canceled(job)
                 subtitle_file = full_srt
         elif (job.burn_subtitles or job.generate_srt) and not subtitle_file:
             update_job(job, message='Subtitle/SRT diminta tapi subtitle sumber tidak tersedia')
 
-        total = len(ranges)
-        for idx, (start, end) in enumerate(ranges, start=1):
+        # Still downloading progressively: each clip is cut from the growing file.
+        streaming = source_path is None and coverage is not None
+        # Portrait or burned output is re-encoded anyway, so render it straight
+        # from the source in one pass instead of split -> reframe -> burn.
+        encode_from_source = (source_path is not None or streaming) and (
+            job.orientation == 'portrait' or job.burn_subtitles
+        )
+        split_paths = []
+        # Where each split clip really starts in the source (copy cuts snap
+        # to keyframes); subtitles and word tokens are trimmed from there.
+        split_starts = []
+        # Per-clip ASR input. Clips rendered from the source need only their
+        # audio, so no video is split (or re-encoded) just to feed Whisper.
+        asr_paths = []
+        if source_path is not None and not encode_from_source:
+            update_job(job, message='Splitting clips')
+            fast_copy = not job.burn_subtitles
+            split_clips = split_video_batch(
+                source_path, ranges, work_dir, fast_copy=fast_copy, processes=processes
+            )
+            split_paths = [clip_path for clip_path, _ in split_clips]
+            split_starts = [clip_start for _, clip_start in split_clips]
+            asr_paths = split_paths
+            ensure_not_canceled(job)
+        elif source_path is not None and per_clip_whisper:
+            update_job(job, message='Extracting clip audio')
+            asr_paths = [
+                extract_clip_audio(
+                    source_path, start, end, work_dir / f'clip_{idx:03d}{PCM_SUFFIX}', processes=processes
+                )
+                for idx, (start, end) in enumerate(ranges, start=1)
+            ]
             ensure_not_canceled(job)
-            if job.source_type == 'youtube' and job.download_sections:
-                clip_path = download_section(job.youtube_url, work_dir, selector, start, end, idx)
-            else:
-                fast_copy = not job.burn_subtitles
-                clip_paths = split_video(source_path, [(start, end)], work_dir, fast_copy=fast_copy)
-                clip_path = clip_paths[0]
+
+        # Set when the job stops early; worker threads check it instead of
+        # touching the ORM, which stays on the task thread.
+        cancel_event = threading.Event()
+
+        def check_canceled():
+            if cancel_event.is_set():
+                raise JobCanceledError('Canceled by user')
+
+        pose_index = None
+        covered = sum(end - start for start, end in ranges)
+        if (
+            encode_from_source
+            and source_path is not None
+            and job.orientation == 'portrait'
+            and (job.mode == 'auto' or covered >= duration * 0.5)
+        ):
+            # Clips cover most of the source: analyse poses once and slice per clip.
+            update_job(job, message='Analysing speaker position')
+
+            pose_fraction = [0.0]
+
+            def pose_progress(fraction):
+                # Runs on the pose slice threads: only record and observe.
+                check_canceled()
+                pose_fraction[0] = fraction
+
+            pose_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix='pose-index')
+            try:
+                pose_future = pose_pool.submit(
+                    get_pose_index,
+                    str(source_path),
+                    str(work_dir / 'pose_index.npz'),
+                    workers=get_clip_workers(),
+                    on_progress=pose_progress,
+                    processes=processes,
+                )
+                while not wait([pose_future], timeout=CANCEL_POLL_SECONDS).done:
+                    reporter.check_canceled()
+                    reporter.report(message=f'Analysing speaker position {pose_fraction[0] * 100:.0f}%')
+                pose_index = pose_future.result()
+            except BaseException:
+                cancel_event.set()
+                raise
+            finally:
+                pose_pool.shutdown(wait=False)
+            ensure_not_canceled(job)
+
+        prefetched_words = {}
+        if per_clip_whisper and asr_paths:
+            # All clip inputs exist already: transcribe them in one batched pass.
+            update_job(job, message='Auto captions per clip (batched)')
+            batch = transcribe_words(
+                asr_paths,
+                language=job.auto_caption_lang,
+                model_size=job.whisper_model,
+            )
+            prefetched_words = dict(enumerate(batch, start=1))
+            ensure_not_canceled(job)
+
+        def wait_for_source(end):
+            while not coverage.wait_for(end + STREAM_MARGIN_SECONDS, timeout=CANCEL_POLL_SECONDS):
+                check_canceled()
+            if coverage.error:
+                raise RuntimeError(f'Download video gagal: {coverage.error}')
+
+        def process_clip(idx, start, end):
+            check_canceled()
+            clip_path = split_paths[idx - 1] if split_paths else None
+            clip_start = split_starts[idx - 1] if split_starts else start
+            asr_path = asr_paths[idx - 1] if asr_paths else None
+            render_input, render_start, render_end = source_path, start, end
+            if streaming:
+                wait_for_source(end)
+                render_input = coverage.path
+                if not encode_from_source:
+                    clip_path = split_range(
+                        coverage.path,
+                        start,
+                        end,
+                        work_dir / f'clip_{idx:03d}.mp4',
+                        fast_copy=not job.burn_subtitles,
+                        processes=processes,
+                    )
+                elif per_clip_whisper:
+                    asr_path = extract_clip_audio(
+                        coverage.path,
+                        start,
+                        end,
+                        work_dir / f'clip_{idx:03d}{PCM_SUFFIX}',
+                        processes=processes,
+                    )
+            elif job.source_type == 'youtube' and job.download_sections:
+                clip_path = section_fetcher.fetch(idx, start, end)
+                render_input, render_start, render_end = clip_path, 0, None
 
             output_srt = None
             count = 0
+            clip_words = None
+            if full_words is not None:
+                clip_words = trim_words(full_words, clip_start, end)
             if wants_subtitles:
                 output_srt = job_dir / f'clip_{idx:03d}.srt'
                 if per_clip_whisper:
-                    count = transcribe_to_srt_from_words(
-                        clip_path,
-                        output_srt,
-                        language=job.auto_caption_lang,
-                        model_size=job.whisper_model,
-                        pause_threshold=0.35,
-                        max_words_per_line=6,
-                        max_chars=40,
-                    )
-                    ensure_not_canceled(job)
+                    clip_words = prefetched_words.get(idx)
+                    if clip_words is None:
+                        clip_words = transcribe_words(
+                            [asr_path or clip_path],
+                            language=job.auto_caption_lang,
+                            model_size=job.whisper_model,
+                        )[0]
+                    count = export_clip_srt(clip_words, output_srt)
+                    check_canceled()
                 elif subtitle_file:
                     try:
-                        count = write_trimmed_srt(subtitle_file, output_srt, start, end)
+                        count = write_trimmed_srt(subtitle_file, output_srt, clip_start, end)
                     except Exception:
                         output_srt.write_text('', encoding='utf-8')
                         count = 0
@@ -266,50 +721,113 @@ def process_job(job_id):
                     output_srt.write_text('', encoding='utf-8')
                     count = 0
 
-            if job.orientation == 'portrait':
-                portrait_path = work_dir / f'clip_{idx:03d}_portrait.mp4'
-                convert_to_portrait(clip_path, portrait_path)
-                ensure_not_canceled(job)
-                clip_path = portrait_path
+            words_path = None
+            if job.burn_word_level and clip_words is not None:
+                # produce_word_tokens skips clips that already have tokens.
+                words_path = job_dir / f'clip_{idx:03d}_words.json'
+                write_word_tokens(words_path, clip_words)
 
             output_video = job_dir / f'clip_{idx:03d}_caption.mp4'
+            burn_srt = output_srt if job.burn_subtitles and output_srt and count > 0 else None
 
-            if job.burn_subtitles and output_srt and count > 0:
-                burn_subtitles(
-                    clip_path,
-                    output_srt,
+            if encode_from_source or job.orientation == 'portrait' or burn_srt:
+                render_clip(
+                    render_input,
                     output_video,
+                    start=render_start,
+                    end=render_end,
+                    portrait=job.orientation == 'portrait',
+                    srt_path=burn_srt,
                     font_name=job.subtitle_font,
                     font_size=job.subtitle_size,
+                    pose_index=pose_index if render_input == source_path else None,
+                    processes=processes,
                 )
+                check_canceled()
             else:
                 shutil.copyfile(clip_path, output_video)
+            return [path for path in (output_video, output_srt, words_path) if path is not None]
 
-            progress = 40 + int((idx / total) * 50) if total else 90
-            update_job(job, progress=progress, message=f'Processing clip {idx}/{total}')
-
-        update_job(job, status='done', progress=100, message='Done')
+        total = len(ranges)
+        workers = max(1, min(total, get_clip_workers()))
+        completed = 0
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            pending = {
+                executor.submit(process_clip, idx, start, end)
+                for idx, (start, end) in enumerate(ranges, start=1)
+            }
+            try:
+                while pending:
+                    done, pending = wait(pending, timeout=CANCEL_POLL_SECONDS, return_when=FIRST_COMPLETED)
+                    reporter.check_canceled()
+                    for future in done:
+                        for output in future.result():
+                            publish_result(job, output)
+                        completed += 1
+                    if done:
+                        progress = 40 + int((completed / total) * 50)
+                        message = f'Processing clip {completed}/{total}'
+                        if section_progress:
+                            fetched = sum(section_progress.values()) / total
+                            message = f'{message} (sections {fetched:.0f}%)'
+                        reporter.report(progress=progress, message=message)
+            except BaseException:
+                # Stop queued clips and kill running encodes, otherwise leaving
+                # the executor waits for every in-flight ffmpeg to finish.
+                cancel_event.set()
+                for future in pending:
+                    future.cancel()
+                processes.terminate()
+                raise
+
+        if download_future is not None:
+            # Surface download errors that no clip happened to wait on.
+            downloaded = download_future.result()
+            if cache_key:
+                source_cache.store(cache_key, downloaded)
+
+        update_job(job, status='done', progress=100, message='Done', archive_status='building')
         try:
+            # Word tokens -> burn -> archive must run in order, not side by side.
+            stages = []
             if job.burn_word_level:
-                produce_word_tokens.delay(str(job.id))
-                burn_clips_with_word_subtitles.delay(str(job.id))
+                stages += [
+                    produce_word_tokens.si(str(job.id)),
+                    burn_clips_with_word_subtitles.si(str(job.id)),
+                ]
+            stages.append(build_job_archive.si(str(job.id)))
+            # Any stage failing marks the archive failed so downloads fall
+            # back to streaming instead of answering 'building' forever.
+            chain(*stages).apply_async(link_error=mark_archive_failed.si(str(job.id)))
         except Exception:
-            pass
+            Job.objects.filter(id=job.id).update(archive_status='failed')
         shutil.rmtree(work_dir, ignore_errors=True)
     except JobCanceledError:
+        processes.terminate()
         update_job(job, status='canceled', progress=100, message='Canceled by user', cancel_requested=True)
         try:
             work_dir = Path(settings.MEDIA_ROOT) / 'jobs' / str(job.id) / 'work'
             shutil.rmtree(work_dir, ignore_errors=True)
         except Exception:
             pass
+        # Clips recorded after JobCancelView cleared the manifest.
+        job.outputs.all().delete()
     except Exception as exc:
+        processes.terminate()
         update_job(job, status='failed', progress=100, error=str(exc), message='Failed')
         try:
             work_dir = Path(settings.MEDIA_ROOT) / 'jobs' / str(job.id) / 'work'
             shutil.rmtree(work_dir, ignore_errors=True)
         except Exception:
             pass
+    finally:
+        processes.terminate()
+        if section_fetcher is not None:
+            section_fetcher.shutdown()
+        prefetch.shutdown(wait=False, cancel_futures=True)
+        remove_info_json(info_json)
+        if cache_key:
+            source_cache.release(cache_key, str(job.id))
 
 
 @shared_task
@@ -317,36 +835,38 @@ def produce_word_tokens(job_id):
     """Generate per-word timestamps from per-clip media using ASR.
 
     Uses transcribe_to_word_tokens which attempts stable-ts or falls back to
-    faster-whisper with approximate word timing.
+    faster-whisper with approximate word timing. Clips whose tokens were
+    already sliced from the full-source transcript are left as-is; the rest
+    are sent as one batch request.
     """
     job = Job.objects.get(id=job_id)
     job_dir = Path(settings.MEDIA_ROOT) / 'jobs' / str(job.id)
     if not job_dir.exists():
         return 0
     produced = 0
+    pending = []
     for clip_idx, clip_path in iter_output_clips(job_dir):
         clip_key = f'clip_{clip_idx:03d}'
-        try:
-            words = transcribe_to_word_tokens(
-                clip_path,
-                language=job.auto_caption_lang or 'id',
-                model_size=job.whisper_model or 'tiny'
-            )
-        except Exception:
-            continue
-
-        # Round and write to JSON
-        words_rounded = [
-            {
-                'word': w['word'],
-                'start': round(float(w['start']), 3),
-                'end': round(float(w['end']), 3),
-                'confidence': round(float(w.get('confidence', 1.0)), 3),
-            }
-            for w in words
-        ]
         out_path = job_dir / f'{clip_key}_words.json'
-        out_path.write_text(json.dumps(words_rounded, ensure_ascii=False), encoding='utf-8')
+        if out_path.exists():
+            # Already sliced from the source transcript by process_job.
+            produced += 1
+            continue
+        pending.append((clip_path, out_path))
+
+    if not pending:
+        return produced
+    results = transcribe_words(
+        [clip_path for clip_path, _ in pending],
+        language=job.auto_caption_lang or 'id',
+        model_size=job.whisper_model or 'tiny',
+        raise_errors=False,
+    )
+    for (_, out_path), words in zip(pending, results):
+        if words is None:
+            continue
+        write_word_tokens(out_path, words)
+        record_output(job, out_path)
         produced += 1
     return produced
 
@@ -382,9 +902,65 @@ def burn_clips_with_word_subtitles(job_id):
             clip_path.unlink(missing_ok=True)
             output_path.replace(clip_path)
             words_json.unlink(missing_ok=True)
+            publish_result(job, clip_path)
+            remove_output(job, words_json.name)
         except Exception as e:
             import logging
             logging.error(f"Failed to burn clip {clip_key}: {str(e)}")
             continue
 
     return burned
+
+
+def _set_archive_status(job, archive_status):
+    # updated_at doubles as the build heartbeat JobZipView checks for staleness.
+    Job.objects.filter(id=job.id).update(archive_status=archive_status, updated_at=timezone.now())
+    job.archive_status = archive_status
+    publish_job_event(job.id, 'archive', {'archive_status': archive_status})
+
+
+@shared_task
+def build_job_archive(job_id):
+    """Final pipeline stage: write every output into jobs/<id>/job_<id>.zip.
+
+    The archive is written to a temp name and renamed, then recorded in the
+    manifest, so the download endpoint only ever serves a complete file.
+    """
+    job = Job.objects.get(id=job_id)
+    job_dir = Path(settings.MEDIA_ROOT) / 'jobs' / str(job.id)
+    if not job_dir.exists():
+        _set_archive_status(job, 'failed')
+        return None
+    outputs = [
+        output for output in job_outputs(job).exclude(kind__in=['words', 'archive'])
+        if (job_dir / output.filename).is_file()
+    ]
+    zip_path = job_dir / f'job_{job.id}.zip'
+    tmp_path = zip_path.with_name(f'{zip_path.name}.tmp')
+    _set_archive_status(job, 'building')
+    try:
+        archive = ZipStream(ZipEntry(job_dir / output.filename, crc=output.crc32) for output in outputs)
+        digest = hashlib.sha256()
+        crc = 0
+        with open(tmp_path, 'wb') as handle:
+            for chunk in archive.iter_range():
+                handle.write(chunk)
+                digest.update(chunk)
+                crc = zlib.crc32(chunk, crc)
+        tmp_path.replace(zip_path)
+        record_output(job, zip_path, checksums=(digest.hexdigest(), crc))
+    except Exception as exc:
+        tmp_path.unlink(missing_ok=True)
+        logging.getLogger(__name__).error('Failed to build archive for job %s: %s', job.id, exc)
+        _set_archive_status(job, 'failed')
+        return None
+    _set_archive_status(job, 'ready')
+    return zip_path.name
+
+
+@shared_task
+def mark_archive_failed(job_id):
+    """Error callback for the post-processing chain."""
+    job = Job.objects.filter(id=job_id, archive_status='building').first()
+    if job is not None:
+        _set_archive_status(job, 'failed')
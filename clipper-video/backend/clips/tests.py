@@ -1,3 +1,1457 @@
-from django.test import TestCase
+import io
+import json
+import os
+import random
+import shutil
+import struct
+import sys
+import tempfile
+import threading
+import time
+import uuid
+import zipfile
+import zlib
+from contextlib import ExitStack
+from datetime import timedelta
+from pathlib import Path
+from unittest import mock, skipUnless
 
-# Create your tests here.
+import numpy as np
+from django.db import connection
+from django.http import FileResponse, Http404
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.utils import timezone as django_timezone
+
+from . import asr_cache, progress, reframe, services, source_cache, srt_utils, stt, tasks
+from .manifest import record_output
+from .media import serve_media
+from .models import Job, JobUpload
+from .services import SectionFetcher, extract_audio_pcm, extract_clip_audio
+from .srt_utils import trim_words
+from .tasks import JobCanceledError, ProgressReporter, mark_archive_failed
+from .utils import ProcessGroup, run_command, run_command_stream
+from .views import ChunkedUploadView, JobCancelView, JobEventsView, JobZipView
+from .zipstream import ZIP64_LIMIT, ZipEntry, ZipStream
+
+
+class MediaTestMixin:
+    def setUp(self):
+        super().setUp()
+        self.media_root = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=self.media_root, MEDIA_ACCEL_MODE='')
+        override.enable()
+        self.addCleanup(override.disable)
+        self.factory = RequestFactory()
+
+    def write(self, relative_path, data):
+        path = self.media_root / relative_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+        return path
+
+
+class ServeMediaTests(MediaTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.job_id = str(uuid.uuid4())
+        self.clip = self.write(f'jobs/{self.job_id}/clip_001_caption.mp4', b'0123456789' * 10)
+        self.write('asr_cache/ab/k.jsonl', b'{"word": "halo"}\n')
+        self.write('source_cache/cd/key/source.mp4', b'video')
+        self.write(f'jobs/{self.job_id}/work/info.json', b'{"http_headers": {}}')
+
+    def get(self, path, **headers):
+        request = self.factory.get(f'/media/{path}', **headers)
+        return serve_media(request, path)
+
+    def test_serves_job_output(self):
+        response = self.get(f'jobs/{self.job_id}/clip_001_caption.mp4')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), self.clip.read_bytes())
+        response.close()
+
+    def test_private_paths_are_not_served(self):
+        private_paths = [
+            'asr_cache/ab/k.jsonl',
+            './asr_cache/ab/k.jsonl',
+            'jobs/../asr_cache/ab/k.jsonl',
+            f'jobs/{self.job_id}/../../source_cache/cd/key/source.mp4',
+            'source_cache/cd/key/source.mp4',
+            f'jobs/{self.job_id}/work/info.json',
+            f'jobs/{self.job_id}/./work/info.json',
+            '../etc/passwd',
+        ]
+        for path in private_paths:
+            with self.subTest(path=path):
+                with self.assertRaises(Http404):
+                    self.get(path)
+
+    def test_symlink_into_private_dir_is_not_served(self):
+        link = self.media_root / 'jobs' / self.job_id / 'clip_002.srt'
+        os.symlink(self.media_root / 'asr_cache' / 'ab' / 'k.jsonl', link)
+        with self.assertRaises(Http404):
+            self.get(f'jobs/{self.job_id}/clip_002.srt')
+
+    def test_accel_path_is_percent_encoded(self):
+        self.write(f'jobs/{self.job_id}/klip 1 ü.mp4', b'video')
+        with self.settings(MEDIA_ACCEL_MODE='x-accel', MEDIA_ACCEL_PREFIX='/protected-media/'):
+            response = self.get(f'jobs/{self.job_id}/klip 1 ü.mp4')
+        self.assertEqual(response['X-Accel-Redirect'], f'/protected-media/jobs/{self.job_id}/klip%201%20%C3%BC.mp4')
+        with self.settings(MEDIA_ACCEL_MODE='x-sendfile'):
+            response = self.get(f'jobs/{self.job_id}/klip 1 ü.mp4')
+        self.assertTrue(response['X-Sendfile'].endswith('/klip%201%20%C3%BC.mp4'))
+
+    def test_if_none_match_returns_not_modified(self):
+        first = self.get(f'jobs/{self.job_id}/clip_001_caption.mp4')
+        first.close()
+        response = self.get(f'jobs/{self.job_id}/clip_001_caption.mp4', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+
+class EventStreamSlotTests(SimpleTestCase):
+    @override_settings(SSE_MAX_STREAMS=1)
+    def test_slot_is_released_once_when_stream_closes(self):
+        from .views import _SlotStream, _StreamSlots
+
+        slots = _StreamSlots()
+        self.assertTrue(slots.acquire())
+        self.assertFalse(slots.acquire())
+
+        stream = _SlotStream((chunk for chunk in ['a']), slots.release)
+        stream.close()
+        stream.close()
+        self.assertTrue(slots.acquire())
+        self.assertFalse(slots.acquire())
+
+
+class JobArchiveStatusTests(MediaTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.job = Job.objects.create(mode='auto', status='done', archive_status='building')
+        self.write(f'jobs/{self.job.id}/clip_001.mp4', b'video')
+
+    def test_chain_error_marks_archive_failed(self):
+        mark_archive_failed(str(self.job.id))
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.archive_status, 'failed')
+
+    def test_error_callback_leaves_ready_archive_alone(self):
+        Job.objects.filter(id=self.job.id).update(archive_status='ready')
+        mark_archive_failed(str(self.job.id))
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.archive_status, 'ready')
+
+    def test_stale_build_is_requeued(self):
+        stale = django_timezone.now() - timedelta(hours=2)
+        Job.objects.filter(id=self.job.id).update(updated_at=stale)
+        request = self.factory.get(f'/api/jobs/{self.job.id}/download-zip/')
+        with mock.patch('clips.views.build_job_archive.delay') as delay:
+            response = JobZipView.as_view()(request, job_id=self.job.id)
+        self.assertEqual(response.status_code, 202)
+        delay.assert_called_once_with(str(self.job.id))
+
+    def test_fresh_build_is_not_requeued(self):
+        request = self.factory.get(f'/api/jobs/{self.job.id}/download-zip/')
+        with mock.patch('clips.views.build_job_archive.delay') as delay:
+            response = JobZipView.as_view()(request, job_id=self.job.id)
+        self.assertEqual(response.status_code, 202)
+        delay.assert_not_called()
+
+
+class ProcessGroupTests(SimpleTestCase):
+    def test_terminate_stops_running_and_refuses_new_processes(self):
+        processes = ProcessGroup()
+        errors = []
+
+        def run():
+            try:
+                run_command_stream([sys.executable, '-c', 'import time; time.sleep(30)'], processes=processes)
+            except RuntimeError as exc:
+                errors.append(exc)
+
+        worker = threading.Thread(target=run)
+        worker.start()
+        deadline = time.monotonic() + 5
+        while not processes._processes and time.monotonic() < deadline:
+            time.sleep(0.01)
+        processes.terminate()
+        worker.join(timeout=10)
+        self.assertFalse(worker.is_alive())
+        self.assertEqual(len(errors), 1)
+        with self.assertRaises(RuntimeError):
+            run_command([sys.executable, '-c', 'pass'], processes=processes)
+
+    def test_render_and_split_run_in_the_job_group(self):
+        processes = ProcessGroup()
+        processes.terminate()
+        with self.assertRaisesMessage(RuntimeError, 'Proses dihentikan'):
+            services.render_clip('in.mp4', 'out.mp4', start=1, end=2, processes=processes)
+        with self.assertRaisesMessage(RuntimeError, 'Proses dihentikan'):
+            services.split_range('in.mp4', 1, 2, 'out.mp4', processes=processes)
+
+
+class TranscriptCacheTests(MediaTestMixin, SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        self.audio = self.write('work/clip.m4a', b'not really audio')
+        words = [{'word': 'halo', 'start': 0.0, 'end': 0.4, 'confidence': 1.0}]
+        patches = [
+            mock.patch.object(stt, 'HAS_FASTER_WHISPER', True),
+            mock.patch.object(stt, 'BatchedInferencePipeline', object),
+            mock.patch.object(stt.asr_cache, 'audio_fingerprint', return_value='fp'),
+            mock.patch.object(stt.asr_cache, 'load_words', return_value=words),
+            mock.patch.object(stt, 'get_whisper_model', side_effect=AssertionError('model loaded')),
+        ]
+        for patcher in patches:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.words = words
+
+    def test_cache_hit_does_not_load_model(self):
+        self.assertEqual(stt.transcribe_to_word_tokens(str(self.audio)), self.words)
+
+    def test_batch_cache_hit_does_not_load_model(self):
+        self.assertEqual(stt.transcribe_batch_to_word_tokens([str(self.audio)] * 2), [self.words, self.words])
+
+
+class TranscribeWordsRoutingTests(SimpleTestCase):
+    WORDS = [{'word': 'halo', 'start': 0.0, 'end': 0.4}]
+
+    @override_settings(ASR_WORKER_QUEUE='asr', ASR_WORKER_TIMEOUT=60)
+    def test_requests_go_to_the_asr_queue(self):
+        with mock.patch.object(tasks, 'transcribe_words_batch') as task:
+            task.apply_async.return_value.get.return_value = [{'words': self.WORDS}]
+            words = tasks.transcribe_words(['a.f32'], language='id', model_size='small')
+        self.assertEqual(words, [self.WORDS])
+        task.assert_not_called()
+        task.apply_async.assert_called_once_with(
+            args=[[{'input_path': 'a.f32', 'language': 'id', 'model_size': 'small'}]],
+            queue='asr',
+        )
+        task.apply_async.return_value.get.assert_called_once_with(timeout=60, disable_sync_subtasks=False)
+
+    @override_settings(ASR_WORKER_QUEUE='')
+    def test_without_a_queue_transcription_runs_in_process(self):
+        with mock.patch.object(tasks.transcribe_words_batch, 'apply_async') as apply_async, \
+                mock.patch.object(tasks, 'transcribe_batch_to_word_tokens', return_value=[self.WORDS, []]) as batch:
+            words = tasks.transcribe_words(['a.f32', 'b.f32'], language='en', model_size='tiny')
+        self.assertEqual(words, [self.WORDS, []])
+        apply_async.assert_not_called()
+        batch.assert_called_once_with(['a.f32', 'b.f32'], language='en', model_size='tiny')
+
+    @override_settings(ASR_WORKER_QUEUE='asr')
+    def test_worker_errors_reach_the_caller(self):
+        with mock.patch.object(tasks, 'transcribe_words_batch') as task:
+            task.apply_async.return_value.get.return_value = [{'error': 'boom'}, {'words': self.WORDS}]
+            with self.assertRaisesMessage(RuntimeError, 'Transcription failed: boom'):
+                tasks.transcribe_words(['a.f32', 'b.f32'], language='id', model_size='small')
+            self.assertEqual(
+                tasks.transcribe_words(['a.f32', 'b.f32'], language='id', model_size='small', raise_errors=False),
+                [None, self.WORDS],
+            )
+            task.apply_async.return_value.get.side_effect = TimeoutError('worker gone')
+            with self.assertRaises(TimeoutError):
+                tasks.transcribe_words(['a.f32'], language='id', model_size='small')
+
+    def test_a_failed_batch_is_retried_item_by_item(self):
+        def single(path, language, model_size):
+            if path == 'bad.f32':
+                raise ValueError('unreadable')
+            return self.WORDS
+
+        with mock.patch.object(tasks, 'transcribe_batch_to_word_tokens', side_effect=RuntimeError('batch')), \
+                mock.patch.object(tasks, 'transcribe_to_word_tokens', side_effect=single):
+            results = tasks.transcribe_words_batch([
+                {'input_path': 'good.f32'},
+                {'input_path': 'bad.f32'},
+            ])
+        self.assertEqual(results, [{'words': self.WORDS}, {'error': 'unreadable'}])
+
+
+class ModelCacheKeyTests(SimpleTestCase):
+    def test_one_model_per_size_loaded_with_chunk_workers(self):
+        loads = []
+
+        def load(model_size, device, compute_type, num_workers, cpu_threads):
+            loads.append((model_size, num_workers, cpu_threads))
+            return {'backend': 'faster', 'model': object()}
+
+        cache = stt.ModelCache(1024 ** 3)
+        with mock.patch.object(stt, '_MODEL_CACHE', cache), \
+                mock.patch.object(stt, '_load_model', side_effect=load), \
+                mock.patch.object(stt, 'get_chunk_workers', return_value=4):
+            first = stt.get_whisper_model('tiny')
+            second = stt.get_whisper_model('tiny')
+        self.assertIs(first, second)
+        self.assertEqual(len(loads), 1)
+        self.assertEqual(loads[0][1], 4)
+
+
+class WindowedTranscriptionTests(MediaTestMixin, SimpleTestCase):
+    def test_long_pcm_is_fed_in_windows_with_one_worker(self):
+        rate = stt.PCM_SAMPLE_RATE
+        pcm = self.write(f'work/audio_16k{stt.PCM_SUFFIX}', np.zeros(rate * 10, dtype=np.float32).tobytes())
+        fed = []
+
+        class Model:
+            def transcribe(self, audio, **kwargs):
+                fed.append(audio)
+                return iter([]), None
+
+        # Only the windowing is under test: no ASR backend needs to be installed.
+        with mock.patch.object(stt, 'HAS_FASTER_WHISPER', True), \
+                mock.patch.object(stt, 'CHUNK_MIN_SECONDS', 5), \
+                mock.patch.object(stt, 'plan_audio_chunks', return_value=[(0, 4), (4, 7), (7, 10)]), \
+                mock.patch.object(stt, 'get_chunk_workers', return_value=1), \
+                mock.patch.object(stt.asr_cache, 'audio_fingerprint', return_value='fp'), \
+                mock.patch.object(stt.asr_cache, 'load_words', return_value=None), \
+                mock.patch.object(stt.asr_cache, 'store_words'), \
+                mock.patch.object(stt, 'get_whisper_model', return_value={'backend': 'faster', 'model': Model()}):
+            stt.transcribe_to_word_tokens(str(pcm))
+
+        self.assertEqual(len(fed), 3)
+        for audio in fed:
+            self.assertNotIsInstance(audio, np.memmap)
+            self.assertLess(len(audio), rate * 6)
+
+
+class AudioChunkPlanTests(SimpleTestCase):
+    def test_cuts_fall_in_the_vad_gap_nearest_the_target(self):
+        rate = stt.PCM_SAMPLE_RATE
+        audio = np.zeros(rate * 25, dtype=np.float32)
+        # Each 6 s search window hears speech with one pause 1.5-2.5 s in.
+        speech = [{'start': 0, 'end': int(rate * 1.5)}, {'start': int(rate * 2.5), 'end': rate * 6}]
+
+        with mock.patch.object(stt, 'CHUNK_SEARCH_SECONDS', 3), \
+                mock.patch.object(stt, 'VadOptions', dict), \
+                mock.patch.object(stt, 'get_speech_timestamps', return_value=speech):
+            chunks = stt.plan_audio_chunks(audio, chunk_seconds=10)
+
+        self.assertEqual(chunks, [(0.0, 9.0), (9.0, 18.0), (18.0, 25.0)])
+
+    def test_continuous_speech_falls_back_to_the_quietest_frame(self):
+        rate = stt.PCM_SAMPLE_RATE
+        audio = np.full(rate * 20, 0.5, dtype=np.float32)
+        audio[int(rate * 11.4):int(rate * 11.6)] = 0
+
+        def all_speech(window, **kwargs):
+            return [{'start': 0, 'end': len(window)}]
+
+        with mock.patch.object(stt, 'CHUNK_SEARCH_SECONDS', 3), \
+                mock.patch.object(stt, 'VadOptions', dict), \
+                mock.patch.object(stt, 'get_speech_timestamps', side_effect=all_speech):
+            chunks = stt.plan_audio_chunks(audio, chunk_seconds=10)
+
+        self.assertEqual(len(chunks), 2)
+        self.assertTrue(11.4 <= chunks[0][1] <= 11.6)
+
+
+class ModelCacheTests(SimpleTestCase):
+    def test_least_recently_used_model_is_evicted_first(self):
+        cache = stt.ModelCache(250)
+        cache.put(('tiny',), {'name': 'tiny'}, 100, 0.5)
+        cache.put(('base',), {'name': 'base'}, 100, 1.0)
+        self.assertEqual(cache.get(('tiny',)), {'name': 'tiny'})
+        cache.put(('small',), {'name': 'small'}, 100, 2.0)
+
+        self.assertIsNone(cache.get(('base',)))
+        self.assertIsNotNone(cache.get(('tiny',)))
+        stats = cache.stats()
+        self.assertEqual(stats['models'], [['small'], ['tiny']])
+        self.assertEqual(stats['resident_bytes'], 200)
+        self.assertEqual((stats['hits'], stats['misses'], stats['evictions']), (2, 1, 1))
+        self.assertEqual(stats['load_seconds'], 3.5)
+
+    def test_newest_model_stays_even_over_budget(self):
+        cache = stt.ModelCache(50)
+        cache.put(('tiny',), {}, 100, 0)
+        self.assertEqual(cache.resident_bytes(), 100)
+        cache.put(('base',), {}, 100, 0)
+        self.assertEqual(cache.stats()['models'], [['base']])
+        self.assertEqual(cache.evictions, 1)
+
+    def test_unrecorded_lookups_leave_counters_alone(self):
+        cache = stt.ModelCache(100)
+        cache.put(('tiny',), {}, 10, 0)
+        cache.get(('tiny',), record=False)
+        cache.get(('base',), record=False)
+        self.assertEqual((cache.hits, cache.misses), (0, 0))
+
+
+class FakeWord:
+    def __init__(self, start, end):
+        self.word, self.start, self.end, self.probability = 'halo', start, end, 0.9
+
+
+class FakeSegment:
+    def __init__(self, words):
+        self.words, self.text = words, ' '.join(word.word for word in words)
+        self.start, self.end = words[0].start, words[-1].end
+
+
+class BatchedTranscriptionTests(SimpleTestCase):
+    def test_inputs_are_transcribed_in_bounded_groups(self):
+        rate = stt.PCM_SAMPLE_RATE
+        audios = {f'clip_{idx}.f32': np.zeros(rate * 4, dtype=np.float32) for idx in range(5)}
+        calls = []
+
+        stride = 4 + stt.BATCH_GAP_SECONDS
+
+        class Pipeline:
+            def __init__(self, model):
+                pass
+
+            def transcribe(self, audio, **kwargs):
+                calls.append(len(audio) / rate)
+                # One word one second into each 4 s input.
+                count = int(round(len(audio) / rate / stride))
+                return [FakeSegment([FakeWord(idx * stride + 1.0, idx * stride + 1.5) for idx in range(count)])], None
+
+        with mock.patch.object(stt, 'BatchedInferencePipeline', Pipeline), \
+                mock.patch.object(stt, 'BATCH_MAX_SECONDS', 2 * stride), \
+                mock.patch.object(stt, '_load_audio_array', side_effect=audios.__getitem__):
+            results = stt._transcribe_batched(object(), list(audios), 'id')
+
+        self.assertEqual(calls, [2 * stride, 2 * stride, stride])
+        self.assertEqual(len(results), 5)
+        for words in results:
+            self.assertEqual([(word['start'], word['end']) for word in words], [(1.0, 1.5)])
+
+    def test_words_next_to_the_gap_stay_with_their_clip(self):
+        rate = stt.PCM_SAMPLE_RATE
+        first = np.zeros(rate * 4, dtype=np.float32)
+        first[int(rate * 3.5):] = 0.1
+        second = np.zeros(rate * 4, dtype=np.float32)
+        second[:rate // 2] = 0.1
+
+        class Pipeline:
+            """Like the real pipeline: speech runs merged into chunks of up to
+            30 s, silence inside a chunk dropped, words timed from its start."""
+
+            def __init__(self, model):
+                pass
+
+            def transcribe(self, audio, **kwargs):
+                edges = np.flatnonzero(np.diff(np.concatenate([[0], (audio != 0).astype(np.int8), [0]])))
+                chunks = []
+                for start, end in zip(edges[::2] / rate, edges[1::2] / rate):
+                    if chunks and end - chunks[-1][0][0] <= 30:
+                        chunks[-1].append((start, end))
+                    else:
+                        chunks.append([(start, end)])
+                segments = []
+                for chunk in chunks:
+                    cursor = chunk[0][0]
+                    words = []
+                    for start, end in chunk:
+                        words.append(FakeWord(cursor, cursor + end - start))
+                        cursor += end - start
+                    segments.append(FakeSegment(words))
+                return segments, None
+
+        with mock.patch.object(stt, 'BatchedInferencePipeline', Pipeline), \
+                mock.patch.object(stt, '_load_audio_array', side_effect=[first, second]):
+            results = stt._transcribe_batched(object(), ['a.f32', 'b.f32'], 'id')
+
+        self.assertEqual(
+            [[(word['start'], word['end']) for word in words] for words in results],
+            [[(3.5, 4.0)], [(0.0, 0.5)]],
+        )
+
+
+class JobCancelTests(MediaTestMixin, TestCase):
+    def test_cancel_removes_outputs_and_manifest(self):
+        job = Job.objects.create(mode='auto', status='running', access_token='secret')
+        clip = self.write(f'jobs/{job.id}/clip_001.mp4', b'video')
+        record_output(job, clip)
+
+        request = self.factory.post(
+            f'/api/jobs/{job.id}/cancel/',
+            {'token': 'secret'},
+            content_type='application/json',
+        )
+        response = JobCancelView.as_view()(request, job_id=job.id)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['status'], 'canceled')
+        self.assertEqual(response.data['results'], [])
+        self.assertFalse(clip.exists())
+        self.assertFalse(job.outputs.exists())
+
+
+@override_settings(PROGRESSIVE_DOWNLOAD=False, CLIP_PROCESSING_WORKERS=2)
+class ProcessJobTests(MediaTestMixin, TestCase):
+    INFO = {'id': 'abcdefghijk', 'duration': 60, 'formats': [{'height': 1080}]}
+
+    def setUp(self):
+        super().setUp()
+        self.info_json = self.media_root / 'info' / 'info.json'
+
+    def create_job(self, **fields):
+        return Job.objects.create(
+            mode='manual',
+            youtube_url='https://youtu.be/abcdefghijk',
+            ranges=[{'start': '00:00:00', 'end': '00:00:10'}],
+            subtitle_langs=['en'],
+            status='queued',
+            **fields,
+        )
+
+    def run_job(self, job, **overrides):
+        """Run process_job with every external call mocked; returns the mocks."""
+        mocked = {
+            'fetch_video_info': mock.Mock(return_value=self.INFO),
+            'write_info_json': mock.Mock(return_value=self.info_json),
+            'remove_info_json': mock.Mock(),
+            'chain': mock.Mock(),
+            'download_subtitles': mock.Mock(return_value=[]),
+            'source_cache': mock.Mock(**{'is_enabled.return_value': False}),
+        }
+        mocked.update(overrides)
+        with ExitStack() as stack:
+            for name, value in mocked.items():
+                stack.enter_context(mock.patch.object(tasks, name, value))
+            tasks.process_job(job.id)
+        job.refresh_from_db()
+        return mocked
+
+    def test_prefetched_subtitles_are_awaited_and_the_cache_released(self):
+        job = self.create_job(generate_srt=True)
+        source = self.write(f'jobs/{job.id}/work/source.mp4', b'video')
+
+        def fetch_subtitles(url, work_dir, langs, info_json=None, processes=None):
+            time.sleep(0.05)
+            srt = Path(work_dir) / 'subs.en.srt'
+            srt.write_text('1\n00:00:01,000 --> 00:00:03,000\nHalo semua\n', encoding='utf-8')
+            return [srt]
+
+        def split(source_path, ranges, work_dir, **kwargs):
+            clip = Path(work_dir) / 'clip_001.mp4'
+            clip.write_bytes(b'clip')
+            return [(clip, 0)]
+
+        cache = mock.Mock(**{
+            'is_enabled.return_value': True,
+            'make_cache_key.return_value': 'key',
+            'link_cached.return_value': None,
+        })
+        mocks = self.run_job(
+            job,
+            download_subtitles=mock.Mock(side_effect=fetch_subtitles),
+            download_video=mock.Mock(return_value=source),
+            split_video_batch=mock.Mock(side_effect=split),
+            source_cache=cache,
+        )
+
+        self.assertEqual(job.status, 'done', job.error)
+        self.assertIn('Halo semua', (self.media_root / f'jobs/{job.id}/clip_001.srt').read_text(encoding='utf-8'))
+        self.assertEqual(
+            sorted(job.outputs.values_list('filename', flat=True)),
+            ['clip_001.srt', 'clip_001_caption.mp4'],
+        )
+        cache.store.assert_called_once_with('key', source)
+        cache.release.assert_called_once_with('key', str(job.id))
+        mocks['remove_info_json'].assert_called_once_with(self.info_json)
+        mocks['chain'].return_value.apply_async.assert_called_once()
+        self.assertFalse((self.media_root / f'jobs/{job.id}/work').exists())
+
+    @override_settings(PROGRESSIVE_DOWNLOAD=True)
+    def test_failed_download_stops_the_other_prefetches(self):
+        job = self.create_job(generate_srt=True)
+        started = threading.Event()
+        stopped = threading.Event()
+
+        def fetch_subtitles(url, work_dir, langs, info_json=None, processes=None):
+            started.set()
+            try:
+                run_command([sys.executable, '-c', 'import time; time.sleep(30)'], processes=processes)
+            finally:
+                stopped.set()
+
+        def download(url, work_dir, selector, coverage, info_json=None, processes=None):
+            started.wait(5)
+            coverage.finish(RuntimeError('network'))
+            raise RuntimeError('Download video gagal: network')
+
+        began = time.monotonic()
+        mocks = self.run_job(
+            job,
+            download_subtitles=mock.Mock(side_effect=fetch_subtitles),
+            download_video_progressive=mock.Mock(side_effect=download),
+        )
+
+        self.assertLess(time.monotonic() - began, 15)
+        self.assertTrue(stopped.wait(5))
+        self.assertEqual(job.status, 'failed')
+        self.assertIn('network', job.error)
+        mocks['remove_info_json'].assert_called_once_with(self.info_json)
+        mocks['chain'].assert_not_called()
+        self.assertFalse((self.media_root / f'jobs/{job.id}/work').exists())
+
+    @override_settings(PROGRESSIVE_DOWNLOAD=True, CANCEL_CHECK_INTERVAL_MS=0)
+    def test_cancel_while_audio_falls_back_to_the_download(self):
+        job = self.create_job(auto_captions=True, max_clips=5)
+        stopped = threading.Event()
+
+        def fetch_audio(url, work_dir, output_path, info_json=None, processes=None):
+            # The audio fetch fails and the user cancels during the fallback wait.
+            Job.objects.filter(id=job.id).update(cancel_requested=True)
+            raise RuntimeError('Download audio gagal')
+
+        def download(url, work_dir, selector, coverage, info_json=None, processes=None):
+            try:
+                run_command([sys.executable, '-c', 'import time; time.sleep(30)'], processes=processes)
+            finally:
+                stopped.set()
+
+        began = time.monotonic()
+        with mock.patch.object(tasks, 'CANCEL_POLL_SECONDS', 0.05):
+            mocks = self.run_job(
+                job,
+                fetch_audio_pcm=mock.Mock(side_effect=fetch_audio),
+                download_video_progressive=mock.Mock(side_effect=download),
+            )
+
+        self.assertLess(time.monotonic() - began, 15)
+        self.assertTrue(stopped.wait(5))
+        self.assertEqual(job.status, 'canceled')
+        mocks['chain'].assert_not_called()
+        self.assertFalse((self.media_root / f'jobs/{job.id}/work').exists())
+
+    def test_cancel_shuts_the_section_fetcher_down(self):
+        job = self.create_job(download_sections=True)
+        fetcher = mock.Mock()
+
+        def make_fetcher(*args, **kwargs):
+            # The user cancels while the sections are being queued.
+            Job.objects.filter(id=job.id).update(cancel_requested=True)
+            return fetcher
+
+        mocks = self.run_job(job, SectionFetcher=mock.Mock(side_effect=make_fetcher))
+
+        self.assertEqual(job.status, 'canceled')
+        fetcher.prefetch.assert_called_once_with(1, 0, 10)
+        fetcher.fetch.assert_not_called()
+        fetcher.shutdown.assert_called_once()
+        mocks['remove_info_json'].assert_called_once_with(self.info_json)
+        self.assertFalse((self.media_root / f'jobs/{job.id}/work').exists())
+
+
+class DownloadCoverageTests(SimpleTestCase):
+    def test_wait_returns_once_the_range_is_written(self):
+        coverage = services.DownloadCoverage('source.mp4')
+        coverage.handle_line('frame=1 time=00:00:05.00 bitrate=1k')
+        self.assertTrue(coverage.wait_for(5.0, timeout=0))
+        self.assertFalse(coverage.wait_for(12.0, timeout=0.01))
+
+        results = []
+        waiter = threading.Thread(target=lambda: results.append(coverage.wait_for(12.0, timeout=5)))
+        waiter.start()
+        coverage.handle_line('[download] 40.0% of 10MiB')
+        coverage.handle_line('frame=9 time=00:00:12.50 bitrate=1k')
+        waiter.join(timeout=5)
+        self.assertEqual(results, [True])
+        self.assertEqual(coverage.seconds, 12.5)
+
+    def test_progress_never_moves_backwards(self):
+        coverage = services.DownloadCoverage('source.mp4')
+        coverage.handle_line('time=00:01:00.00')
+        coverage.handle_line('time=00:00:30.00')
+        self.assertEqual(coverage.seconds, 60.0)
+
+    def test_finish_releases_waiters_with_the_error(self):
+        coverage = services.DownloadCoverage('source.mp4')
+        results = []
+        waiter = threading.Thread(target=lambda: results.append(coverage.wait_for(600, timeout=5)))
+        waiter.start()
+        coverage.finish(error='403 Forbidden')
+        waiter.join(timeout=5)
+        self.assertEqual(results, [True])
+        self.assertEqual(coverage.error, '403 Forbidden')
+
+
+class VideoInfoCacheTests(SimpleTestCase):
+    def setUp(self):
+        patcher = mock.patch.dict(services._INFO_CACHE, clear=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_second_fetch_hits_the_cache(self):
+        urls = [
+            'https://www.youtube.com/watch?v=abcdefghijk',
+            'https://vimeo.com/123456',
+        ]
+        for url in urls:
+            output = json.dumps({'id': 'different-id', 'title': 'video'})
+            with mock.patch('clips.services.run_command', return_value=output) as run:
+                first = services.fetch_video_info(url)
+                second = services.fetch_video_info(url)
+            self.assertEqual(run.call_count, 1, url)
+            self.assertEqual(first, second)
+
+
+class SectionFetcherTests(SimpleTestCase):
+    def test_prefetched_sections_download_in_parallel_once(self):
+        calls = []
+        running = []
+        peak = []
+        lock = threading.Lock()
+
+        def download(url, work_dir, selector, start, end, index, **kwargs):
+            with lock:
+                calls.append(index)
+                running.append(index)
+                peak.append(len(running))
+            time.sleep(0.05)
+            with lock:
+                running.remove(index)
+            return Path(work_dir) / f'section_{index:03d}.mp4'
+
+        fetcher = SectionFetcher('https://youtu.be/x', '/tmp', 'best', workers=3)
+        self.addCleanup(fetcher.shutdown)
+        with mock.patch('clips.services.download_section', side_effect=download):
+            for idx in range(1, 7):
+                fetcher.prefetch(idx, idx * 10, idx * 10 + 5)
+            paths = [fetcher.fetch(idx, idx * 10, idx * 10 + 5) for idx in range(1, 7)]
+
+        self.assertEqual(sorted(calls), [1, 2, 3, 4, 5, 6])
+        self.assertEqual(max(peak), 3)
+        self.assertEqual(paths[0].name, 'section_001.mp4')
+
+
+@skipUnless(shutil.which('ffmpeg'), 'ffmpeg not installed')
+class AudioFingerprintTests(MediaTestMixin, SimpleTestCase):
+    def test_pcm_reuses_source_audio_fingerprint(self):
+        source = self.media_root / 'tone.m4a'
+        run_command([
+            'ffmpeg', '-v', 'error', '-y', '-f', 'lavfi', '-i', 'sine=frequency=440:duration=2',
+            '-c:a', 'aac', str(source),
+        ])
+        pcm = extract_audio_pcm(source, self.media_root / f'audio_16k{stt.PCM_SUFFIX}')
+
+        self.assertTrue(asr_cache.fingerprint_path(pcm).exists())
+        self.assertEqual(asr_cache.audio_fingerprint(str(pcm)), asr_cache.audio_fingerprint(str(source)))
+
+    def test_clip_audio_covers_exactly_the_range(self):
+        source = self.media_root / 'tone.mp4'
+        run_command([
+            'ffmpeg', '-v', 'error', '-y', '-f', 'lavfi', '-i', 'testsrc=duration=3:size=64x64:rate=25',
+            '-f', 'lavfi', '-i', 'sine=frequency=440:duration=3', '-shortest',
+            '-c:v', 'libx264', '-g', '75', '-c:a', 'aac', str(source),
+        ])
+        pcm = extract_clip_audio(source, 1.3, 2.3, self.media_root / f'clip_001{stt.PCM_SUFFIX}')
+        samples = pcm.stat().st_size // 4
+        self.assertAlmostEqual(samples / stt.PCM_SAMPLE_RATE, 1.0, delta=0.03)
+
+
+class ZipStreamTests(MediaTestMixin, SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        rng = random.Random(22)
+        self.files = {
+            'clip_001_caption.mp4': bytes(rng.getrandbits(8) for _ in range(200_000)),
+            'clip_001.srt': '1\n00:00:00,000 --> 00:00:01,000\nhalo\n\n'.encode('utf-8') * 50,
+            'clip_002_caption.mp4': b'',
+        }
+        for name, data in self.files.items():
+            self.write(name, data)
+
+    def archive(self, with_crc=False):
+        entries = []
+        for name, data in self.files.items():
+            crc = zlib.crc32(data) if with_crc else None
+            entries.append(ZipEntry(self.media_root / name, crc=crc))
+        return ZipStream(entries)
+
+    def test_round_trips_through_zipfile(self):
+        for with_crc in (False, True):
+            archive = self.archive(with_crc)
+            data = b''.join(archive.iter_range())
+            self.assertEqual(len(data), archive.size)
+            with zipfile.ZipFile(io.BytesIO(data)) as bundle:
+                self.assertIsNone(bundle.testzip())
+                self.assertEqual({name: bundle.read(name) for name in bundle.namelist()}, self.files)
+                methods = {info.filename: info.compress_type for info in bundle.infolist()}
+            self.assertEqual(methods['clip_001_caption.mp4'], zipfile.ZIP_STORED)
+            self.assertEqual(methods['clip_001.srt'], zipfile.ZIP_DEFLATED)
+
+    def test_crc_and_sizes_are_only_in_descriptor_and_central_directory(self):
+        archive = self.archive(with_crc=True)
+        entry = archive.entries[0]
+        data = b''.join(archive.iter_range())
+        self.assertEqual(struct.unpack_from('<III', data, 14), (0, 0, 0))
+        descriptor_at = len(entry.local_header()) + entry.compressed_size
+        self.assertEqual(
+            struct.unpack_from('<IIII', data, descriptor_at),
+            (0x08074B50, entry.crc, entry.compressed_size, entry.size),
+        )
+
+        entry.zip64 = True
+        header = entry.local_header()
+        self.assertEqual(struct.unpack_from('<III', header, 14), (0, ZIP64_LIMIT, ZIP64_LIMIT))
+        self.assertEqual(struct.unpack_from('<HHQQ', header, 30 + len(entry.name)), (0x0001, 16, 0, 0))
+
+    def test_any_byte_range_matches_the_full_archive(self):
+        full = b''.join(self.archive().iter_range())
+        rng = random.Random(25)
+        for _ in range(200):
+            start = rng.randrange(len(full))
+            end = rng.randrange(start, len(full))
+            # A fresh stream per range, as a resumed download would get.
+            self.assertEqual(b''.join(self.archive().iter_range(start, end)), full[start:end + 1])
+
+
+class JobZipRangeTests(MediaTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.job = Job.objects.create(mode='auto', status='done', archive_status='failed')
+        for name, data in (('clip_001_caption.mp4', b'v' * 5000), ('clip_001.srt', b'1\nhalo\n')):
+            record_output(self.job, self.write(f'jobs/{self.job.id}/{name}', data))
+        self.full = self.get()
+        self.etag = self.full['ETag']
+        self.body = b''.join(self.full.streaming_content)
+
+    def get(self, **headers):
+        request = self.factory.get(f'/api/jobs/{self.job.id}/download-zip/', **headers)
+        return JobZipView.as_view()(request, job_id=self.job.id)
+
+    def test_full_download(self):
+        self.assertEqual(self.full.status_code, 200)
+        self.assertEqual(int(self.full['Content-Length']), len(self.body))
+        with zipfile.ZipFile(io.BytesIO(self.body)) as bundle:
+            self.assertIsNone(bundle.testzip())
+
+    def test_range_returns_partial_content(self):
+        response = self.get(HTTP_RANGE='bytes=100-299')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], f'bytes 100-299/{len(self.body)}')
+        self.assertEqual(b''.join(response.streaming_content), self.body[100:300])
+
+    def test_suffix_and_open_ended_ranges(self):
+        response = self.get(HTTP_RANGE='bytes=-22')
+        self.assertEqual(b''.join(response.streaming_content), self.body[-22:])
+        response = self.get(HTTP_RANGE=f'bytes={len(self.body) - 10}-')
+        self.assertEqual(b''.join(response.streaming_content), self.body[-10:])
+
+    def test_if_range_only_resumes_the_same_archive(self):
+        response = self.get(HTTP_RANGE='bytes=10-19', HTTP_IF_RANGE=self.etag)
+        self.assertEqual(response.status_code, 206)
+        response = self.get(HTTP_RANGE='bytes=10-19', HTTP_IF_RANGE='"stale"')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), self.body)
+
+    def test_unsatisfiable_range(self):
+        response = self.get(HTTP_RANGE=f'bytes={len(self.body)}-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], f'bytes */{len(self.body)}')
+
+
+class JobZipReadyTests(MediaTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.job = Job.objects.create(mode='auto', status='done', archive_status='ready')
+        self.data = b'PK' + b'z' * 4000
+        record_output(self.job, self.write(f'jobs/{self.job.id}/job_{self.job.id}.zip', self.data))
+
+    def get(self, **headers):
+        request = self.factory.get(f'/api/jobs/{self.job.id}/download-zip/', **headers)
+        return JobZipView.as_view()(request, job_id=self.job.id)
+
+    def test_ready_archive_is_a_file_response(self):
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertIsInstance(response, FileResponse)
+        self.assertEqual(response['Content-Disposition'], f'attachment; filename="job_{self.job.id}.zip"')
+        self.assertEqual(b''.join(response.streaming_content), self.data)
+        response.close()
+
+    def test_ready_archive_is_handed_to_the_proxy(self):
+        with self.settings(MEDIA_ACCEL_MODE='x-accel', MEDIA_ACCEL_PREFIX='/protected-media/'):
+            response = self.get()
+        self.assertEqual(
+            response['X-Accel-Redirect'], f'/protected-media/jobs/{self.job.id}/job_{self.job.id}.zip'
+        )
+        self.assertEqual(response['Content-Disposition'], f'attachment; filename="job_{self.job.id}.zip"')
+
+
+class ChunkedUploadTests(MediaTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.data = bytes(range(256)) * 40
+        response = self.client.post(
+            '/api/jobs/uploads/',
+            {'filename': 'video.mp4', 'size': len(self.data), 'mode': 'auto', 'interval_minutes': 1},
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 201)
+        self.upload_url = response.data['upload_url']
+        self.upload = JobUpload.objects.get(id=response.data['id'])
+        self.dest = self.media_root / 'jobs' / str(self.upload.target_job_id) / 'work' / 'local_source.mp4'
+
+    def patch(self, offset, chunk):
+        return self.client.patch(
+            self.upload_url,
+            chunk,
+            content_type='application/offset+octet-stream',
+            headers={'Upload-Offset': str(offset)},
+        )
+
+    def finalize(self):
+        return self.client.post(f'{self.upload_url}finalize/')
+
+    def test_chunks_append_in_order(self):
+        for offset in range(0, len(self.data), 4096):
+            response = self.patch(offset, self.data[offset:offset + 4096])
+            self.assertEqual(response.status_code, 204)
+            self.assertEqual(int(response['Upload-Offset']), min(offset + 4096, len(self.data)))
+        self.assertEqual(self.dest.read_bytes(), self.data)
+
+    def test_duplicate_chunk_is_acknowledged_without_rewriting(self):
+        self.patch(0, self.data[:4096])
+        response = self.patch(0, self.data[:4096])
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(response['Upload-Offset'], '4096')
+        self.assertEqual(self.dest.read_bytes(), self.data[:4096])
+
+    def test_overlapping_chunk_skips_the_stored_prefix(self):
+        self.patch(0, self.data[:4096])
+        response = self.patch(2048, self.data[2048:6144])
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(response['Upload-Offset'], '6144')
+        self.assertEqual(self.dest.read_bytes(), self.data[:6144])
+
+    def test_chunk_is_received_before_the_row_is_locked(self):
+        depth = {}
+        receive, append = ChunkedUploadView._receive, ChunkedUploadView._append
+
+        def spy(name, method):
+            def wrapper(*args):
+                depth[name] = len(connection.savepoint_ids)
+                return method(*args)
+            return wrapper
+
+        with mock.patch.object(ChunkedUploadView, '_receive', spy('receive', receive)), \
+                mock.patch.object(ChunkedUploadView, '_append', spy('append', append)):
+            response = self.patch(0, self.data[:4096])
+        self.assertEqual(response.status_code, 204)
+        # The append runs inside the view's own transaction; the read does not.
+        self.assertEqual(depth['append'], depth['receive'] + 1)
+        self.assertEqual(self.dest.read_bytes(), self.data[:4096])
+
+    def test_gap_is_rejected(self):
+        self.patch(0, self.data[:4096])
+        response = self.patch(8192, self.data[8192:])
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response['Upload-Offset'], '4096')
+        self.assertEqual(self.dest.read_bytes(), self.data[:4096])
+
+    def test_chunk_past_the_declared_size_is_rejected(self):
+        response = self.patch(0, self.data + b'extra')
+        self.assertEqual(response.status_code, 413)
+        self.assertEqual(self.dest.read_bytes(), b'')
+
+    def test_finalize_requires_every_byte(self):
+        self.patch(0, self.data[:4096])
+        response = self.finalize()
+        self.assertEqual(response.status_code, 409)
+        self.assertFalse(Job.objects.filter(id=self.upload.target_job_id).exists())
+
+    def test_finalize_is_idempotent(self):
+        self.patch(0, self.data)
+        with mock.patch('clips.views.process_job.delay', return_value=mock.Mock(id='task-1')) as delay:
+            first = self.finalize()
+            second = self.finalize()
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(first.data['id'], second.data['id'])
+        self.assertEqual(first.data['id'], str(self.upload.target_job_id))
+        delay.assert_called_once_with(str(self.upload.target_job_id))
+        job = Job.objects.get(id=self.upload.target_job_id)
+        self.assertEqual(job.source_type, 'local')
+        self.assertEqual(job.local_video_path, str(self.dest.relative_to(self.media_root)))
+        self.assertEqual(self.patch(len(self.data), b'x').status_code, 409)
+
+
+class JobEventsTests(TestCase):
+    def test_terminal_state_is_sent_as_a_snapshot_with_results(self):
+        job = Job.objects.create(mode='auto', status='running')
+
+        class PubSub:
+            def __init__(self):
+                self.messages = [
+                    {'data': json.dumps({'event': 'status', 'data': {'status': 'running', 'progress': 50}})},
+                    {'data': json.dumps({'event': 'status', 'data': {'status': 'done', 'progress': 100}})},
+                ]
+
+            def get_message(self, timeout=None):
+                if self.messages:
+                    Job.objects.filter(id=job.id).update(status='done')
+                    return self.messages.pop(0)
+                return None
+
+        events = list(JobEventsView()._relay(job, PubSub(), time.monotonic() + 5))
+        self.assertTrue(events[0].startswith('event: status'))
+        self.assertEqual(len(events), 2)
+        self.assertTrue(events[-1].startswith('event: snapshot'))
+        self.assertIn('"results"', events[-1])
+        self.assertIn('"status": "done"', events[-1])
+
+    def test_done_job_stream_waits_for_the_archive(self):
+        job = Job.objects.create(mode='auto', status='done', archive_status='building')
+        published = [
+            ('status', {'status': 'done', 'progress': 100}),
+            ('result', {'filename': 'clip_001_caption.mp4'}),
+            ('archive', {'archive_status': 'building'}),
+            ('archive', {'archive_status': 'ready'}),
+        ]
+
+        class PubSub:
+            def get_message(self, timeout=None):
+                if not published:
+                    return None
+                event, data = published.pop(0)
+                if data.get('archive_status') == 'ready':
+                    Job.objects.filter(id=job.id).update(archive_status='ready')
+                return {'data': json.dumps({'event': event, 'data': data})}
+
+        events = list(JobEventsView()._relay(job, PubSub(), time.monotonic() + 5))
+        names = [event.split('\n', 1)[0] for event in events]
+        self.assertEqual(names, [
+            'event: snapshot', 'event: result', 'event: archive', 'event: snapshot',
+        ])
+        self.assertIn('"archive_status": "ready"', events[-1])
+
+    def test_poll_ends_with_a_snapshot(self):
+        job = Job.objects.create(mode='auto', status='done')
+        events = list(JobEventsView()._poll(job, time.monotonic() + 5))
+        self.assertEqual(len(events), 1)
+        self.assertTrue(events[0].startswith('event: snapshot'))
+
+
+class SplitVideoBatchTests(SimpleTestCase):
+    def test_segments_match_within_the_snap_tolerance(self):
+        segments = [
+            ('seg_000.mp4', 0.0, 10.01),
+            ('seg_001.mp4', 10.01, 21.2),
+            ('seg_002.mp4', 21.2, 31.5),
+        ]
+        matches = services._match_segments([(0, 10), (20, 30), (40, 50)], segments)
+        # The cut at 20 snapped to the keyframe at 21.2.
+        self.assertEqual(matches, {0: ('seg_000.mp4', 0.0), 1: ('seg_002.mp4', 21.2)})
+        # A segment never starts before its cut...
+        self.assertEqual(services._match_segments([(11, 21)], segments), {})
+        # ...and ends more than SEGMENT_SNAP_TOLERANCE away are rejected.
+        self.assertEqual(services._match_segments([(21, 35)], segments), {})
+
+    def test_one_pass_returns_snapped_starts(self):
+        work_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, work_dir, ignore_errors=True)
+
+        def segment(command, **kwargs):
+            segment_dir = work_dir / 'segments'
+            (segment_dir / 'seg_000.mp4').write_bytes(b'gap')
+            (segment_dir / 'seg_001.mp4').write_bytes(b'first')
+            (segment_dir / 'seg_002.mp4').write_bytes(b'gap')
+            (segment_dir / 'seg_003.mp4').write_bytes(b'second')
+            (segment_dir / 'segments.csv').write_text(
+                'seg_000.mp4,0.0,4.0\nseg_001.mp4,4.0,10.0\nseg_002.mp4,10.0,20.0\nseg_003.mp4,20.0,25.0\n'
+            )
+            return ''
+
+        with mock.patch('clips.services.run_command', side_effect=segment) as run, \
+                mock.patch('clips.services.split_range') as split:
+            clips = services.split_video_batch('in.mp4', [(3, 8), (12, 25)], work_dir)
+        run.assert_called_once()
+        command = run.call_args[0][0]
+        self.assertEqual(command[command.index('-segment_times') + 1], '3,8,12')
+        # The keyframe after 12 is 8 s late: only that range is cut on its own.
+        split.assert_called_once()
+        self.assertEqual(split.call_args[0][1:3], (12, 25))
+        self.assertEqual(clips[0], (work_dir / 'clip_001.mp4', 4.0))
+        self.assertEqual(clips[0][0].read_bytes(), b'first')
+        self.assertEqual(clips[1][1], 12)
+
+    def test_overlapping_ranges_are_cut_per_clip(self):
+        with mock.patch('clips.services.run_command') as run, \
+                mock.patch('clips.services.split_range', side_effect=lambda src, s, e, path, **kw: path) as split:
+            clips = services.split_video_batch('in.mp4', [(0, 10), (5, 15)], '/tmp/work')
+        run.assert_not_called()
+        self.assertEqual(split.call_count, 2)
+        self.assertEqual([(clip.name, start) for clip, start in clips], [('clip_001.mp4', 0), ('clip_002.mp4', 5)])
+
+
+class ReframeSamplerTests(MediaTestMixin, SimpleTestCase):
+    def test_analysis_size_is_even_and_never_upscales(self):
+        self.assertEqual(reframe._analysis_size(1920, 1080, 640), (640, 360))
+        self.assertEqual(reframe._analysis_size(480, 270, 640), (480, 270))
+        width, height = reframe._analysis_size(1001, 563, 333)
+        self.assertEqual((width % 2, height % 2), (0, 0))
+
+    def test_budget_thins_samples_instead_of_stopping(self):
+        # Enough time left: every sampled frame is analysed.
+        self.assertEqual(reframe._budget_stride(100, 10.0, 0.05, 2.0), 1)
+        # Half the time needed: every other frame.
+        self.assertEqual(reframe._budget_stride(100, 2.5, 0.05, 2.0), 2)
+        # Budget spent: keep sampling at the widest spacing until the end.
+        max_stride = int(reframe.BUDGET_MAX_SPACING * 2.0)
+        self.assertEqual(reframe._budget_stride(100, 0.0, 0.05, 2.0), max_stride)
+        self.assertEqual(reframe._budget_stride(100, 0.01, 5.0, 2.0), max_stride)
+
+    def sample(self, **kwargs):
+        """Run _sample_person_boxes over a fake 100 s source; return the decodes started."""
+        decodes = []
+
+        def frames(path, start, end, rate, width, height, processes=None):
+            decodes.append((start, rate))
+            index = 0
+            while (start or 0) + index / rate < 100:
+                yield index / rate, np.zeros((height, width, 3), dtype=np.uint8)
+                index += 1
+
+        clock = iter(range(10 ** 6))
+        mediapipe = mock.Mock()
+        mediapipe.solutions.pose.Pose.return_value.process.return_value.pose_landmarks = None
+        with mock.patch.dict(sys.modules, {'mediapipe': mediapipe}), \
+                mock.patch.object(reframe, '_video_metadata', return_value=(1920, 1080, 100.0)), \
+                mock.patch.object(reframe, '_iter_sampled_frames', side_effect=frames), \
+                mock.patch('clips.reframe.time.monotonic', side_effect=lambda: next(clock) * 0.1):
+            reframe._sample_person_boxes('in.mp4', 2.0, 0.45, False, None, None, 640, processes=None, **kwargs)
+        return decodes, mediapipe.solutions.pose.Pose.return_value.process.call_count
+
+    def test_spent_budget_lowers_the_decoder_rate(self):
+        decodes, analysed = self.sample(time_budget=1.0)
+        # After one frame the budget cannot cover 200 more: ffmpeg restarts
+        # at the widest spacing instead of decoding and piping every sample.
+        self.assertEqual(decodes, [(None, 2.0), (5.0, 2.0 / 10)])
+        self.assertEqual(analysed, 1 + 19)
+
+    def test_max_samples_stops_sampling(self):
+        decodes, analysed = self.sample(time_budget=None, max_samples=5)
+        self.assertEqual(decodes, [(None, 2.0)])
+        self.assertEqual(analysed, 5)
+
+    @skipUnless(shutil.which('ffmpeg'), 'ffmpeg not installed')
+    def test_pipe_yields_scaled_frames_at_sample_fps(self):
+        source = self.media_root / 'pattern.mp4'
+        run_command([
+            'ffmpeg', '-v', 'error', '-y', '-f', 'lavfi', '-i', 'testsrc=duration=4:size=320x180:rate=25',
+            '-c:v', 'libx264', str(source),
+        ])
+        frames = list(reframe._iter_sampled_frames(str(source), 1.0, 3.0, 2.0, 160, 90))
+        self.assertEqual(len(frames), 4)
+        self.assertEqual([t for t, _ in frames], [0.0, 0.5, 1.0, 1.5])
+        self.assertEqual(frames[0][1].shape, (90, 160, 3))
+
+
+class PoseIndexTests(SimpleTestCase):
+    def index(self):
+        rows = [(t, 960.0 + 10 * t, 540.0, 300.0, 700.0, 0.9) for t in np.arange(0, 30, 0.5)]
+        return {'frame': (1920, 1080), 'samples': np.asarray(rows, dtype=np.float32)}
+
+    def test_clip_track_is_sliced_from_the_index_in_clip_time(self):
+        index = self.index()
+        track = reframe.crop_track_from_index(index, 10.0, 14.0, smoothing=1.0)
+        self.assertEqual(track['frame'], (1920, 1080))
+        self.assertEqual([keyframe['t'] for keyframe in track['keyframes']], [0.0, 1.0, 2.0, 3.0])
+        # Same result as computing the track from the clip's own samples.
+        window = [
+            (float(row[0]) - 10.0,) + tuple(float(value) for value in row[1:])
+            for row in index['samples'] if 10.0 <= row[0] < 14.0
+        ]
+        direct = reframe._track_from_samples(window, 1920, 1080, 0.45, 0.22, False, 'clip', 1.0, 1.0)
+        self.assertEqual(track['keyframes'], direct['keyframes'])
+        self.assertEqual((track['crop_w'], track['crop_h']), (direct['crop_w'], direct['crop_h']))
+
+    def test_open_ended_and_empty_windows(self):
+        index = self.index()
+        track = reframe.crop_track_from_index(index, 28.0, None)
+        self.assertEqual([keyframe['t'] for keyframe in track['keyframes']], [0.0, 1.0])
+        self.assertIsNone(reframe.crop_track_from_index(index, 40.0, 50.0))
+
+    def test_slices_cover_the_whole_source(self):
+        self.assertEqual(reframe._pose_slices(90.0, 3, 2.0), [(0.0, 30.0), (30.0, 60.0), (60.0, None)])
+        self.assertEqual(reframe._pose_slices(0.4, 4, 2.0), [(0.0, None)])
+
+    def test_slices_are_sampled_in_parallel_and_merged_in_source_time(self):
+        calls = []
+        progress = []
+
+        def sample(path, fps, vis, debug, start, end, width, budget, processes, on_frame):
+            calls.append((start, end))
+            on_frame(5.0)
+            return 1920, 1080, [(1.0, 960.0, 540.0, 200.0, 600.0, 0.9)]
+
+        with mock.patch.object(reframe, '_video_metadata', return_value=(1920, 1080, 20.0)), \
+                mock.patch.object(reframe, '_sample_person_boxes', side_effect=sample):
+            index = reframe.build_pose_index('in.mp4', workers=2, on_progress=progress.append)
+
+        self.assertEqual(sorted(calls, key=lambda call: call[0] or 0), [(None, 10.0), (10.0, None)])
+        self.assertEqual(index['frame'], (1920, 1080))
+        self.assertEqual(sorted(index['samples'][:, 0].tolist()), [1.0, 11.0])
+        self.assertEqual(max(progress), 0.5)
+
+    def test_cancel_from_progress_stops_every_slice(self):
+        class Canceled(Exception):
+            pass
+
+        def sample(path, fps, vis, debug, start, end, width, budget, processes, on_frame):
+            for step in range(1000):
+                on_frame(step * 0.01)
+                time.sleep(0.001)
+            return 1920, 1080, []
+
+        def on_progress(fraction):
+            raise Canceled()
+
+        with mock.patch.object(reframe, '_video_metadata', return_value=(1920, 1080, 20.0)), \
+                mock.patch.object(reframe, '_sample_person_boxes', side_effect=sample):
+            with self.assertRaises(Canceled):
+                reframe.build_pose_index('in.mp4', workers=3, on_progress=on_progress)
+
+
+class SourceCacheTests(MediaTestMixin, SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        self.cache_dir = self.media_root / 'source_cache'
+        override = override_settings(SOURCE_CACHE_DIR=self.cache_dir)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def store(self, key, size, age):
+        source = self.write(f'downloads/{key}.mp4', b'v' * size)
+        self.assertTrue(source_cache.store(key, source))
+        cached = source_cache._entry_dir(key) / source_cache.SOURCE_NAME
+        stamp = time.time() - age
+        os.utime(cached, (stamp, stamp))
+        return cached
+
+    def test_eviction_skips_referenced_entries(self):
+        oldest = self.store('aa' + '0' * 62, 100, age=300)
+        middle = self.store('bb' + '0' * 62, 100, age=200)
+        newest = self.store('cc' + '0' * 62, 100, age=100)
+        source_cache.acquire('aa' + '0' * 62, 'job-1')
+
+        self.assertEqual(source_cache.evict(200), 1)
+        self.assertTrue(oldest.exists())
+        self.assertFalse(middle.exists())
+        self.assertTrue(newest.exists())
+        # The emptied prefix dir goes with the entry.
+        self.assertFalse(middle.parent.parent.exists())
+
+        source_cache.release('aa' + '0' * 62, 'job-1')
+        self.assertEqual(source_cache.evict(100), 1)
+        self.assertFalse(oldest.exists())
+
+    def test_stale_refs_do_not_pin_an_entry(self):
+        key = 'dd' + '0' * 62
+        cached = self.store(key, 100, age=10)
+        source_cache.acquire(key, 'dead-worker')
+        ref = source_cache._entry_dir(key) / source_cache.REFS_DIR / 'dead-worker'
+        stamp = time.time() - source_cache.STALE_REF_SECONDS - 1
+        os.utime(ref, (stamp, stamp))
+        self.assertEqual(source_cache.evict(0), 1)
+        self.assertFalse(cached.exists())
+
+    def test_release_and_evict_remove_entries_without_a_source(self):
+        key = 'ee' + '0' * 62
+        source_cache.acquire(key, 'job-1')
+        source_cache.acquire(key, 'job-2')
+        source_cache.release(key, 'job-1')
+        self.assertTrue(source_cache._entry_dir(key).exists())
+        source_cache.release(key, 'job-2')
+        self.assertFalse(source_cache._entry_dir(key).parent.exists())
+
+        # A worker that died between acquire() and release() leaves a stale ref.
+        source_cache.acquire(key, 'dead-worker')
+        ref = source_cache._entry_dir(key) / source_cache.REFS_DIR / 'dead-worker'
+        stamp = time.time() - source_cache.STALE_REF_SECONDS - 1
+        os.utime(ref, (stamp, stamp))
+        source_cache.evict(source_cache.get_cache_max_bytes())
+        self.assertEqual(list(self.cache_dir.iterdir()), [])
+
+
+class TrimWordsTests(SimpleTestCase):
+    words = [
+        {'word': 'sebelum', 'start': 8.0, 'end': 9.5, 'speaker': 'A'},
+        {'word': 'awal', 'start': 9.8, 'end': 10.4, 'speaker': 'A'},
+        {'word': 'tengah', 'start': 12.0, 'end': 12.5, 'speaker': 'B'},
+        {'word': 'akhir', 'start': 14.8, 'end': 15.6, 'speaker': 'B'},
+        {'word': 'sesudah', 'start': 15.0, 'end': 15.0},
+        {'word': 'lewat', 'start': 16.0, 'end': 17.0},
+    ]
+
+    def test_words_are_clamped_and_shifted_to_the_clip(self):
+        trimmed = trim_words(self.words, 10.0, 15.0)
+        self.assertEqual([word['word'] for word in trimmed], ['awal', 'tengah', 'akhir'])
+        self.assertEqual([(round(w['start'], 3), round(w['end'], 3)) for w in trimmed], [
+            (0.0, 0.4), (2.0, 2.5), (4.8, 5.0),
+        ])
+        # Other keys survive and the input is not modified.
+        self.assertEqual(trimmed[1]['speaker'], 'B')
+        self.assertEqual(self.words[1]['start'], 9.8)
+
+    def test_empty_and_zero_length_words_are_dropped(self):
+        self.assertEqual(trim_words(None, 0, 10), [])
+        self.assertEqual(trim_words([{'word': 'x', 'start': 3.0, 'end': 3.0}], 0, 10), [])
+
+    def test_window_clamp(self):
+        self.assertEqual(srt_utils._clip_window(9.0, 11.0, 10.0, 15.0), (0.0, 1.0))
+        self.assertEqual(srt_utils._clip_window(14.0, 16.0, 10.0, 15.0), (4.0, 5.0))
+        self.assertIsNone(srt_utils._clip_window(5.0, 10.0, 10.0, 15.0))
+        self.assertIsNone(srt_utils._clip_window(15.0, 16.0, 10.0, 15.0))
+
+
+class CropTrackTests(SimpleTestCase):
+    @staticmethod
+    def evaluate(expression, t):
+        return eval(expression, {'clip': lambda value, low, high: min(max(value, low), high), 't': t})
+
+    def test_track_is_smoothed_thinned_and_clamped(self):
+        samples = [
+            (1.0, 1160.0, 540.0, 200.0, 600.0, 0.9),
+            (0.0, 960.0, 540.0, 200.0, 600.0, 0.9),
+            (0.5, 1160.0, 540.0, 200.0, 600.0, 0.9),
+            (2.0, 1900.0, 540.0, 200.0, 600.0, 0.9),
+        ]
+        keyframes = reframe.build_crop_track(samples, 1920, 1080, 608, 1080, smoothing=0.5, keyframe_interval=1.0)
+        # Samples are sorted by time; t=0.5 only feeds the EMA.
+        self.assertEqual([keyframe['t'] for keyframe in keyframes], [0.0, 1.0, 2.0])
+        self.assertEqual([keyframe['x'] for keyframe in keyframes], [656, 806, 1201])
+        self.assertEqual({keyframe['y'] for keyframe in keyframes}, {0})
+        self.assertEqual(keyframes[1]['smooth_center'], (1110.0, 540.0))
+
+        clamped = reframe.build_crop_track(samples, 1920, 1080, 608, 1080, smoothing=1.0, keyframe_interval=1.0)
+        self.assertEqual(clamped[-1]['x'], 1920 - 608)
+        self.assertEqual(reframe.build_crop_track([], 1920, 1080, 608, 1080), [])
+
+    def position(self, commands, axis, t):
+        # Replay the sendcmd script the way ffmpeg applies it to frame time t.
+        x0, y0, script = commands
+        expression = {'x': x0, 'y': y0}[axis]
+        for line in filter(None, script.split('\n')):
+            when, _, body = line.rstrip(';').partition(' ')
+            if float(when) > t:
+                break
+            for command in body.split("', "):
+                target, command_axis, value = command.split(' ', 2)
+                self.assertEqual(target, 'crop')
+                if command_axis == axis:
+                    expression = value.strip("'")
+        return self.evaluate(expression, t)
+
+    def test_commands_interpolate_between_keyframes(self):
+        keyframes = [
+            {'t': 0.0, 'x': 100, 'y': 0},
+            {'t': 2.0, 'x': 300, 'y': 0},
+            {'t': 3.0, 'x': 300, 'y': 0},
+            {'t': 4.0, 'x': 200, 'y': 0},
+        ]
+        commands = reframe.crop_track_commands(keyframes)
+        # One bounded expression per segment; y never moves so is never sent.
+        self.assertNotIn('if(', commands[2])
+        self.assertNotIn(' y ', commands[2])
+        self.assertEqual(commands[1], '0')
+        for t, expected in ((0, 100), (1, 200), (2.5, 300), (3.5, 250), (10, 200)):
+            self.assertAlmostEqual(self.position(commands, 'x', t), expected)
+        self.assertEqual(reframe.crop_track_commands([]), ('0', '0', ''))
+        self.assertEqual(reframe.crop_track_commands(keyframes[1:3]), ('300', '0', ''))
+
+    def test_long_track_keeps_the_render_command_bounded(self):
+        keyframes = [{'t': float(t), 'x': 100 + (t % 7) * 10, 'y': 0} for t in range(2 * 60 * 60)]
+        track = {'crop_w': 608, 'crop_h': 1080, 'keyframes': keyframes}
+        seen = {}
+
+        def fake_run(command, processes=None):
+            vf = command[command.index('-vf') + 1]
+            script_path = vf.split("sendcmd=f='", 1)[1].split("'", 1)[0]
+            seen['command'] = command
+            seen['script_path'] = script_path
+            seen['script'] = Path(script_path).read_text(encoding='utf-8')
+
+        with mock.patch.object(services, 'crop_track_from_index', return_value=track), \
+                mock.patch.object(services, 'run_command', side_effect=fake_run):
+            services.render_clip('in.mp4', 'out.mp4', end=7200, portrait=True, pose_index={})
+        self.assertLess(max(len(arg) for arg in seen['command']), 1024)
+        self.assertEqual(len(seen['script'].splitlines()), len(keyframes) - 1)
+        self.assertFalse(os.path.exists(seen['script_path']))
+
+
+@override_settings(PROGRESS_REDIS_URL='redis://progress-test')
+class ProgressRedisTests(SimpleTestCase):
+    def setUp(self):
+        self.now = 1000.0
+        patches = [
+            mock.patch('clips.progress.time.monotonic', side_effect=lambda: self.now),
+            mock.patch.object(progress, '_client', None),
+            mock.patch.object(progress, '_retry_at', 0.0),
+        ]
+        for patcher in patches:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        redis_patch = mock.patch.object(progress, 'redis')
+        self.redis = redis_patch.start()
+        self.addCleanup(redis_patch.stop)
+
+    def test_failed_connect_is_retried_after_a_pause(self):
+        client = self.redis.Redis.from_url.return_value
+        client.ping.side_effect = ConnectionError('down')
+        self.assertIsNone(progress.get_redis())
+        self.now += progress.RETRY_SECONDS - 1
+        self.assertIsNone(progress.get_redis())
+        self.assertEqual(self.redis.Redis.from_url.call_count, 1)
+
+        client.ping.side_effect = None
+        self.now += 1
+        self.assertIs(progress.get_redis(), client)
+        self.assertIs(progress.get_redis(), client)
+        self.assertEqual(self.redis.Redis.from_url.call_count, 2)
+
+
+@override_settings(PROGRESS_MIN_INTERVAL_MS=1000, PROGRESS_MIN_STEP=5, CANCEL_CHECK_INTERVAL_MS=2000)
+class ProgressReporterTests(TestCase):
+    def setUp(self):
+        self.now = 1000.0
+        self.hot = []
+        patches = [
+            mock.patch('clips.tasks.time.monotonic', side_effect=lambda: self.now),
+            mock.patch('clips.tasks.set_hot_progress', side_effect=self.set_hot),
+            mock.patch('clips.tasks.publish_job_event'),
+        ]
+        for patcher in patches:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.job = Job.objects.create(mode='auto', status='running', progress=0)
+
+    def set_hot(self, job_id, progress, message):
+        self.hot.append((progress, message))
+        return True
+
+    def test_ticks_are_coalesced_by_time_and_step(self):
+        reporter = ProgressReporter(self.job)
+        self.assertTrue(reporter.report(progress=10, message='a'))
+        self.assertFalse(reporter.report(progress=12, message='b'))
+        self.assertTrue(reporter.report(progress=15, message='c'))
+        self.now += 0.5
+        self.assertFalse(reporter.report(progress=16, message='d'))
+        self.now += 0.6
+        self.assertTrue(reporter.report(progress=16, message='e'))
+        self.assertEqual(self.hot, [(10, 'a'), (15, 'c'), (16, 'e')])
+        # Hot-store ticks never write the row.
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.progress, 0)
+
+    def test_without_redis_ticks_fall_back_to_the_database(self):
+        reporter = ProgressReporter(self.job)
+        with mock.patch('clips.tasks.set_hot_progress', return_value=False):
+            reporter.report(progress=30, message='Downloading')
+            reporter.report(progress=31, message='Downloading')
+        self.job.refresh_from_db()
+        self.assertEqual((self.job.progress, self.job.message), (30, 'Downloading'))
+
+    def test_cancel_checks_are_throttled(self):
+        reporter = ProgressReporter(self.job)
+        Job.objects.filter(id=self.job.id).update(cancel_requested=True)
+        reporter.check_canceled()
+        self.now += 2.5
+        with self.assertRaises(JobCanceledError):
+            reporter.check_canceled()
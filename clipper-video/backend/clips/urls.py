@@ -1,6 +1,9 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import VideoViewSet, ClipViewSet, JobCreateView, JobDetailView, JobZipView, LocalJobUploadView, JobCancelView, SubsWordsView
+from .views import (
+    VideoViewSet, ClipViewSet, JobCreateView, JobDetailView, JobZipView, LocalJobUploadView, JobCancelView, JobEventsView, SubsWordsView,
+    ChunkedUploadCreateView, ChunkedUploadView, ChunkedUploadFinalizeView,
+)
 
 router = DefaultRouter()
 router.register(r'videos', VideoViewSet, basename='video')
@@ -10,7 +13,11 @@ urlpatterns = [
     path('', include(router.urls)),
     path('jobs/', JobCreateView.as_view(), name='job-create'),
     path('jobs/upload/', LocalJobUploadView.as_view(), name='job-upload'),
+    path('jobs/uploads/', ChunkedUploadCreateView.as_view(), name='job-upload-create'),
+    path('jobs/uploads/<uuid:upload_id>/', ChunkedUploadView.as_view(), name='job-upload-chunk'),
+    path('jobs/uploads/<uuid:upload_id>/finalize/', ChunkedUploadFinalizeView.as_view(), name='job-upload-finalize'),
     path('jobs/<uuid:job_id>/', JobDetailView.as_view(), name='job-detail'),
+    path('jobs/<uuid:job_id>/events', JobEventsView.as_view(), name='job-events'),
     path('jobs/<uuid:job_id>/cancel/', JobCancelView.as_view(), name='job-cancel'),
     path('jobs/<uuid:job_id>/download-zip/', JobZipView.as_view(), name='job-zip'),
     path('subs/<uuid:job_id>/words.json', SubsWordsView.as_view(), name='subs-words-job'),
@@ -1,24 +1,79 @@
 import re
 import subprocess
+import threading
 from pathlib import Path
 
 
-def run_command(cmd, cwd=None):
-    result = subprocess.run(
-        cmd,
-        cwd=cwd,
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
-        text=True,
-        check=False,
-    )
-    if result.returncode != 0:
-        raise RuntimeError(result.stderr.strip() or result.stdout.strip())
-    return result.stdout
+def _stop_process(process, timeout=5):
+    if process.poll() is None:
+        process.terminate()
+    try:
+        process.wait(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+class ProcessGroup:
+    """Child processes started on behalf of one job.
+
+    Background downloads outlive the code that waits on them when a job is
+    canceled or fails; terminate() stops whatever is still running and
+    refuses to start anything new (e.g. a stale-info retry).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._processes = set()
+        self._closed = False
+
+    def start(self, cmd, **kwargs):
+        with self._lock:
+            if self._closed:
+                raise RuntimeError('Proses dihentikan')
+            process = subprocess.Popen(cmd, **kwargs)
+            self._processes.add(process)
+        return process
 
+    def discard(self, process):
+        with self._lock:
+            self._processes.discard(process)
 
-def run_command_stream(cmd, on_line=None, cwd=None):
-    process = subprocess.Popen(
+    def terminate(self):
+        with self._lock:
+            self._closed = True
+            processes = list(self._processes)
+            self._processes.clear()
+        for process in processes:
+            _stop_process(process)
+
+
+def run_command(cmd, cwd=None, processes=None):
+    if processes is None:
+        result = subprocess.run(
+            cmd,
+            cwd=cwd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            check=False,
+        )
+        returncode, stdout, stderr = result.returncode, result.stdout, result.stderr
+    else:
+        process = processes.start(cmd, cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        try:
+            stdout, stderr = process.communicate()
+        finally:
+            processes.discard(process)
+        returncode = process.returncode
+    if returncode != 0:
+        raise RuntimeError(stderr.strip() or stdout.strip())
+    return stdout
+
+
+def run_command_stream(cmd, on_line=None, cwd=None, processes=None):
+    popen = subprocess.Popen if processes is None else processes.start
+    process = popen(
         cmd,
         cwd=cwd,
         stdout=subprocess.PIPE,
@@ -36,12 +91,10 @@ def run_command_stream(cmd, on_line=None, cwd=None):
                     on_line(line)
     except Exception as exc:
         callback_error = exc
-        process.terminate()
-        try:
-            process.wait(timeout=5)
-        except subprocess.TimeoutExpired:
-            process.kill()
-            process.wait()
+        _stop_process(process)
+    finally:
+        if processes is not None:
+            processes.discard(process)
     return_code = process.wait()
     if callback_error:
         raise callback_error
@@ -68,7 +121,7 @@ def format_timecode(seconds):
 
 
 def parse_yt_dlp_progress(line):
-    match = re.search(r'\\[download\\]\\s+(\\d+(?:\\.\\d+)?)%', line)
+    match = re.search(r'\[download\]\s+(\d+(?:\.\d+)?)%', line)
     if not match:
         return None
     try:
@@ -77,6 +130,14 @@ def parse_yt_dlp_progress(line):
         return None
 
 
+def parse_ffmpeg_time(line):
+    match = re.search(r'time=(\d+):(\d{2}):(\d{2}(?:\.\d+)?)', line)
+    if not match:
+        return None
+    hours, minutes, seconds = match.groups()
+    return int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+
+
 def format_srt_time(seconds):
     total_ms = int(round(seconds * 1000))
     hours = total_ms // 3600000
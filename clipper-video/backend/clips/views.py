@@ -5,26 +5,88 @@ from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
+from rest_framework.renderers import BaseRenderer, JSONRenderer
 from django.shortcuts import get_object_or_404
 from django.core.exceptions import PermissionDenied
-from django.http import FileResponse, Http404
-from .models import Video, Clip, Job
-from .serializers import VideoSerializer, VideoListSerializer, ClipSerializer, JobCreateSerializer, JobDetailSerializer, LocalJobUploadSerializer
+from django.http import Http404, StreamingHttpResponse
+from .models import Video, Clip, Job, JobUpload
+from .serializers import VideoSerializer, VideoListSerializer, ClipSerializer, JobCreateSerializer, JobDetailSerializer, LocalJobUploadSerializer, ChunkedUploadCreateSerializer
+from django.db import transaction
+from django.utils import timezone as django_timezone
 from django.db.models import Q
 from django.conf import settings
 from pathlib import Path
 from celery.result import AsyncResult
+import hashlib
 import shutil
-import zipfile
 import tempfile
 
-from .tasks import process_job
+from .tasks import build_job_archive, process_job
+from .progress import publish_job_event, subscribe_job_events
+from .manifest import job_outputs
+from .zipstream import ZipEntry, ZipStream
+from .media import ranged_response, serve_media
 import json
+import threading
+import time
 from pathlib import Path
 from django.conf import settings
 
 ACTIVE_JOB_LIMIT = 3
 ACTIVE_JOB_STATUSES = ['queued', 'running']
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+TERMINAL_JOB_STATUSES = ['done', 'failed', 'canceled']
+# SSE streams end after this long; EventSource reconnects on its own.
+EVENTS_MAX_SECONDS = 300
+EVENTS_HEARTBEAT_SECONDS = 15
+EVENTS_POLL_SECONDS = 2
+
+
+class _StreamSlots:
+    """Caps how many SSE streams one process holds open at a time.
+
+    Under WSGI each stream pins a worker thread; without a cap a few open
+    tabs would starve every other API request.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._active = 0
+
+    def acquire(self):
+        limit = getattr(settings, 'SSE_MAX_STREAMS', 4)
+        with self._lock:
+            if self._active >= limit:
+                return False
+            self._active += 1
+            return True
+
+    def release(self):
+        with self._lock:
+            self._active = max(0, self._active - 1)
+
+
+_EVENT_STREAM_SLOTS = _StreamSlots()
+
+
+class _SlotStream:
+    """Streaming body that gives its slot back when the response is closed,
+    even if the client left before the first byte was read."""
+
+    def __init__(self, stream, release):
+        self._stream = stream
+        self._release = release
+
+    def __iter__(self):
+        return self._stream
+
+    def close(self):
+        try:
+            self._stream.close()
+        finally:
+            release, self._release = self._release, None
+            if release:
+                release()
 
 
 def _active_job_limit_response():
@@ -166,56 +228,247 @@ class LocalJobUploadView(APIView):
         serializer.is_valid(raise_exception=True)
 
         upload = serializer.validated_data['video_file']
-        job = Job.objects.create(
-            source_type='local',
-            youtube_url='',
-            local_video_name=getattr(upload, 'name', ''),
-            mode=serializer.validated_data['mode'],
-            interval_minutes=serializer.validated_data.get('interval_minutes'),
-            ranges=serializer.validated_data.get('ranges'),
-            strict_1080=serializer.validated_data.get('strict_1080', False),
-            min_height_fallback=serializer.validated_data.get('min_height_fallback', 720),
-            subtitle_langs=serializer.validated_data.get('subtitle_langs') or ['id', 'en'],
-            burn_subtitles=serializer.validated_data.get('burn_subtitles', False),
-            generate_srt=serializer.validated_data.get('generate_srt', False),
-            auto_captions=serializer.validated_data.get('auto_captions', False),
-            auto_caption_lang=serializer.validated_data.get('auto_caption_lang', 'id'),
-            whisper_model=serializer.validated_data.get('whisper_model', 'tiny'),
-            subtitle_font=serializer.validated_data.get('subtitle_font', 'Arial'),
-            subtitle_size=serializer.validated_data.get('subtitle_size', 14),
-            orientation=serializer.validated_data.get('orientation', 'landscape'),
-            max_clips=serializer.validated_data.get('max_clips', 0),
-            download_sections=False,
-            burn_word_level=serializer.validated_data.get('burn_word_level', False),
-            status='queued',
-            progress=0,
-            message='Job queued',
-        )
-
-        job_dir = Path(settings.MEDIA_ROOT) / 'jobs' / str(job.id)
-        work_dir = job_dir / 'work'
-        work_dir.mkdir(parents=True, exist_ok=True)
-        suffix = Path(upload.name).suffix or '.mp4'
-        dest = work_dir / f'local_source{suffix}'
+        job = _create_local_job(serializer.validated_data, getattr(upload, 'name', ''))
+        dest = _local_source_path(job.id, upload.name)
+        dest.parent.mkdir(parents=True, exist_ok=True)
         with open(dest, 'wb') as out:
             for chunk in upload.chunks():
                 out.write(chunk)
+        return _start_local_job(job, dest)
+
+
+def _local_source_path(job_id, filename):
+    suffix = Path(filename).suffix or '.mp4'
+    return Path(settings.MEDIA_ROOT) / 'jobs' / str(job_id) / 'work' / f'local_source{suffix}'
+
+
+def _create_local_job(data, filename, **extra):
+    return Job.objects.create(
+        source_type='local',
+        youtube_url='',
+        local_video_name=filename,
+        mode=data['mode'],
+        interval_minutes=data.get('interval_minutes'),
+        ranges=data.get('ranges'),
+        strict_1080=data.get('strict_1080', False),
+        min_height_fallback=data.get('min_height_fallback', 720),
+        subtitle_langs=data.get('subtitle_langs') or ['id', 'en'],
+        burn_subtitles=data.get('burn_subtitles', False),
+        generate_srt=data.get('generate_srt', False),
+        auto_captions=data.get('auto_captions', False),
+        auto_caption_lang=data.get('auto_caption_lang', 'id'),
+        whisper_model=data.get('whisper_model', 'tiny'),
+        subtitle_font=data.get('subtitle_font', 'Arial'),
+        subtitle_size=data.get('subtitle_size', 14),
+        orientation=data.get('orientation', 'landscape'),
+        max_clips=data.get('max_clips', 0),
+        download_sections=False,
+        burn_word_level=data.get('burn_word_level', False),
+        status='queued',
+        progress=0,
+        message='Job queued',
+        **extra,
+    )
 
-        # Store relative to MEDIA_ROOT so it works cross-platform.
-        job.local_video_path = str(dest.relative_to(settings.MEDIA_ROOT))
-        job.save(update_fields=['local_video_path', 'updated_at'])
 
-        task = process_job.delay(str(job.id))
-        job.celery_task_id = task.id
-        job.save(update_fields=['celery_task_id', 'updated_at'])
-        return Response({
-            'id': str(job.id),
-            'status': job.status,
-            'progress': job.progress,
-            'message': job.message,
-            'created_at': job.created_at,
-            'access_token': job.access_token,
-        }, status=status.HTTP_201_CREATED)
+def _job_created_payload(job):
+    return {
+        'id': str(job.id),
+        'status': job.status,
+        'progress': job.progress,
+        'message': job.message,
+        'created_at': job.created_at,
+        'access_token': job.access_token,
+    }
+
+
+def _start_local_job(job, dest):
+    # Store relative to MEDIA_ROOT so it works cross-platform.
+    job.local_video_path = str(dest.relative_to(settings.MEDIA_ROOT))
+    job.save(update_fields=['local_video_path', 'updated_at'])
+
+    task = process_job.delay(str(job.id))
+    job.celery_task_id = task.id
+    job.save(update_fields=['celery_task_id', 'updated_at'])
+    return Response(_job_created_payload(job), status=status.HTTP_201_CREATED)
+
+
+class ChunkedUploadCreateView(APIView):
+    """Start a resumable upload (tus-style): POST job options + filename/size.
+
+    Chunks are then sent with PATCH to the returned upload_url carrying an
+    Upload-Offset header, and POST .../finalize/ creates and queues the job.
+    """
+    permission_classes = [AllowAny]
+
+    def post(self, request):
+        limit_response = _active_job_limit_response()
+        if limit_response:
+            return limit_response
+        serializer = ChunkedUploadCreateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        options = dict(serializer.validated_data)
+        filename = Path(options.pop('filename')).name
+        size = options.pop('size')
+        upload = JobUpload.objects.create(filename=filename, size=size, options=options)
+
+        dest = _local_source_path(upload.target_job_id, filename)
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        dest.touch()
+        response = Response(_upload_payload(upload), status=status.HTTP_201_CREATED)
+        response['Location'] = _upload_url(upload)
+        response['Upload-Offset'] = '0'
+        return response
+
+
+def _upload_url(upload):
+    return f'/api/jobs/uploads/{upload.id}/'
+
+
+def _upload_payload(upload):
+    return {
+        'id': str(upload.id),
+        'upload_url': _upload_url(upload),
+        'filename': upload.filename,
+        'size': upload.size,
+        'offset': upload.offset,
+        'finalized': upload.finalized_at is not None,
+    }
+
+
+class ChunkedUploadView(APIView):
+    """Report (HEAD/GET) or advance (PATCH) the offset of a resumable upload.
+
+    PATCH spools the raw request body to a temp file, then locks the upload
+    row only to check Upload-Offset and append the chunk to the job's final
+    source path. A chunk that was already stored (client retry after a lost
+    response) is acknowledged without reading it; a chunk that only partly
+    overlaps has its stored prefix skipped. A gap is a 409.
+    """
+    permission_classes = [AllowAny]
+
+    def head(self, request, upload_id):
+        upload = get_object_or_404(JobUpload, id=upload_id)
+        response = Response(status=status.HTTP_200_OK)
+        response['Upload-Offset'] = str(upload.offset)
+        response['Upload-Length'] = str(upload.size)
+        response['Cache-Control'] = 'no-store'
+        return response
+
+    def get(self, request, upload_id):
+        upload = get_object_or_404(JobUpload, id=upload_id)
+        response = Response(_upload_payload(upload))
+        response['Upload-Offset'] = str(upload.offset)
+        response['Cache-Control'] = 'no-store'
+        return response
+
+    def patch(self, request, upload_id):
+        try:
+            chunk_offset = int(request.headers.get('Upload-Offset', ''))
+            chunk_length = int(request.headers.get('Content-Length') or 0)
+        except ValueError:
+            return Response({'detail': 'Header Upload-Offset wajib berupa angka'}, status=status.HTTP_400_BAD_REQUEST)
+        if chunk_offset < 0:
+            return Response({'detail': 'Upload-Offset tidak valid'}, status=status.HTTP_400_BAD_REQUEST)
+
+        upload = get_object_or_404(JobUpload, id=upload_id)
+        rejected = self._reject(upload, chunk_offset, chunk_length)
+        if rejected is not None:
+            return rejected
+        if chunk_offset + chunk_length <= upload.offset:
+            # Already stored (retry after a lost response): don't read it again.
+            return self._offset_response(upload)
+
+        dest = _local_source_path(upload.target_job_id, upload.filename)
+        # Receive the chunk before taking the row lock, so a slow client never
+        # holds the lock (or an open transaction) for the whole transfer.
+        with tempfile.TemporaryFile(dir=dest.parent) as spool:
+            received = self._receive(request, spool, chunk_length)
+            with transaction.atomic():
+                # Serialise concurrent PATCHes for the same upload.
+                upload = get_object_or_404(JobUpload.objects.select_for_update(), id=upload_id)
+                rejected = self._reject(upload, chunk_offset, chunk_length)
+                if rejected is not None:
+                    return rejected
+                # Bytes at the start of this chunk that are already stored.
+                skip = upload.offset - chunk_offset
+                if received > skip:
+                    self._append(spool, dest, upload.offset, skip, received - skip)
+                    upload.offset += received - skip
+                    upload.save(update_fields=['offset', 'updated_at'])
+        return self._offset_response(upload)
+
+    def _reject(self, upload, chunk_offset, chunk_length):
+        """Error response for a chunk that cannot be applied, else None."""
+        if upload.finalized_at is not None:
+            return Response({'detail': 'Upload sudah selesai'}, status=status.HTTP_409_CONFLICT)
+        if chunk_offset > upload.offset:
+            response = Response(
+                {'detail': 'Upload-Offset tidak cocok', 'offset': upload.offset},
+                status=status.HTTP_409_CONFLICT,
+            )
+            response['Upload-Offset'] = str(upload.offset)
+            return response
+        if chunk_offset + chunk_length > upload.size:
+            return Response({'detail': 'Chunk melebihi ukuran file'}, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        return None
+
+    def _offset_response(self, upload):
+        response = Response(status=status.HTTP_204_NO_CONTENT)
+        response['Upload-Offset'] = str(upload.offset)
+        return response
+
+    def _receive(self, request, spool, length):
+        stream = request.stream
+        received = 0
+        while received < length and stream is not None:
+            data = stream.read(min(UPLOAD_CHUNK_SIZE, length - received))
+            if not data:
+                break
+            spool.write(data)
+            received += len(data)
+        return received
+
+    def _append(self, spool, dest, offset, skip, to_write):
+        spool.seek(skip)
+        written = 0
+        with open(dest, 'r+b') as out:
+            # Anything past the committed offset is from an interrupted write.
+            out.seek(offset)
+            while written < to_write:
+                data = spool.read(min(UPLOAD_CHUNK_SIZE, to_write - written))
+                if not data:
+                    break
+                out.write(data)
+                written += len(data)
+            out.truncate()
+
+
+class ChunkedUploadFinalizeView(APIView):
+    """Create and queue the job once every byte has arrived. Safe to repeat."""
+    permission_classes = [AllowAny]
+
+    def post(self, request, upload_id):
+        with transaction.atomic():
+            upload = get_object_or_404(JobUpload.objects.select_for_update(), id=upload_id)
+            if upload.finalized_at is not None:
+                job = get_object_or_404(Job, id=upload.target_job_id)
+                return Response(_job_created_payload(job), status=status.HTTP_200_OK)
+            if upload.offset != upload.size:
+                response = Response(
+                    {'detail': 'Upload belum lengkap', 'offset': upload.offset, 'size': upload.size},
+                    status=status.HTTP_409_CONFLICT,
+                )
+                response['Upload-Offset'] = str(upload.offset)
+                return response
+            limit_response = _active_job_limit_response()
+            if limit_response:
+                return limit_response
+
+            job = _create_local_job(upload.options, upload.filename, id=upload.target_job_id)
+            upload.finalized_at = django_timezone.now()
+            upload.save(update_fields=['finalized_at', 'updated_at'])
+        return _start_local_job(job, _local_source_path(job.id, upload.filename))
 
 
 class JobDetailView(APIView):
@@ -226,6 +479,125 @@ class JobDetailView(APIView):
         serializer = JobDetailSerializer(job)
         return Response(serializer.data)
 
+class EventStreamRenderer(BaseRenderer):
+    """Lets EventSource's Accept: text/event-stream pass content negotiation."""
+    media_type = 'text/event-stream'
+    format = 'sse'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        # Only error bodies reach here; streams bypass rendering.
+        return json.dumps(data, default=str).encode('utf-8')
+
+
+def _job_settled(job):
+    """Nothing more will change: terminal, and a done job's archive is built."""
+    if job.status not in TERMINAL_JOB_STATUSES:
+        return False
+    return job.status != 'done' or job.archive_status != 'building'
+
+
+def _sse(event, data):
+    return f'event: {event}\ndata: {json.dumps(data, default=str)}\n\n'
+
+
+class JobEventsView(APIView):
+    """Server-sent events for one job: a snapshot, then status/result deltas.
+
+    A done job's stream stays open until its archive is ready or failed and
+    ends with a final snapshot. Deltas come from the job's Redis pub/sub channel. Without Redis the
+    stream polls the job row instead, still without rescanning the job
+    directory until the job finishes.
+    """
+    permission_classes = [AllowAny]
+    renderer_classes = [EventStreamRenderer, JSONRenderer]
+
+    def get(self, request, job_id):
+        job = get_object_or_404(Job, id=job_id)
+        if not _EVENT_STREAM_SLOTS.acquire():
+            # Clients fall back to polling JobDetailView.
+            response = Response(
+                {'detail': 'Terlalu banyak stream aktif, gunakan polling.'},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+            )
+            response['Retry-After'] = str(EVENTS_MAX_SECONDS)
+            return response
+        response = StreamingHttpResponse(
+            _SlotStream(self._stream(job), _EVENT_STREAM_SLOTS.release),
+            content_type='text/event-stream',
+        )
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+    def _stream(self, job):
+        # Subscribe before the snapshot so no delta falls in between.
+        pubsub = subscribe_job_events(job.id)
+        try:
+            yield _sse('snapshot', JobDetailSerializer(job).data)
+            if _job_settled(job):
+                return
+            deadline = time.monotonic() + EVENTS_MAX_SECONDS
+            if pubsub is not None:
+                yield from self._relay(job, pubsub, deadline)
+            else:
+                yield from self._poll(job, deadline)
+        finally:
+            if pubsub is not None:
+                try:
+                    pubsub.close()
+                except Exception:
+                    pass
+
+    def _relay(self, job, pubsub, deadline):
+        last_sent = time.monotonic()
+        while time.monotonic() < deadline:
+            message = pubsub.get_message(timeout=1.0)
+            if message is None:
+                if time.monotonic() - last_sent >= EVENTS_HEARTBEAT_SECONDS:
+                    last_sent = time.monotonic()
+                    yield ': keep-alive\n\n'
+                continue
+            try:
+                payload = json.loads(message['data'])
+            except (TypeError, ValueError):
+                continue
+            last_sent = time.monotonic()
+            terminal = payload['event'] == 'status' and payload['data'].get('status') in TERMINAL_JOB_STATUSES
+            settled_archive = payload['event'] == 'archive' and payload['data'].get('archive_status') != 'building'
+            if terminal or settled_archive:
+                # State changes clients stop on go out as a full snapshot
+                # (with results), so nothing is lost when they close.
+                job.refresh_from_db()
+                yield _sse('snapshot', JobDetailSerializer(job).data)
+                if _job_settled(job):
+                    return
+                continue
+            yield _sse(payload['event'], payload['data'])
+
+    def _poll(self, job, deadline):
+        last = None
+        while time.monotonic() < deadline:
+            job.refresh_from_db(fields=['status', 'progress', 'message', 'error', 'archive_status'])
+            current = {
+                'status': job.status,
+                'progress': job.progress,
+                'message': job.message,
+                'error': job.error,
+                'archive_status': job.archive_status,
+            }
+            if current != last:
+                last = current
+                if job.status in TERMINAL_JOB_STATUSES:
+                    yield _sse('snapshot', JobDetailSerializer(job).data)
+                    if _job_settled(job):
+                        return
+                else:
+                    yield _sse('status', current)
+            else:
+                yield ': keep-alive\n\n'
+            time.sleep(EVENTS_POLL_SECONDS)
+
+
 class JobCancelView(APIView):
     permission_classes = [AllowAny]
 
@@ -248,6 +620,12 @@ class JobCancelView(APIView):
         job.message = 'Canceled by user'
         job.cancel_requested = True
         job.save(update_fields=['status', 'progress', 'message', 'cancel_requested', 'updated_at'])
+        publish_job_event(job.id, 'status', {
+            'status': job.status,
+            'progress': job.progress,
+            'message': job.message,
+            'error': job.error,
+        })
 
         if job.celery_task_id:
             try:
@@ -257,12 +635,22 @@ class JobCancelView(APIView):
 
         job_dir = Path(settings.MEDIA_ROOT) / 'jobs' / str(job.id)
         shutil.rmtree(job_dir, ignore_errors=True)
+        # The manifest must not list files that were just deleted.
+        job.outputs.all().delete()
 
         serializer = JobDetailSerializer(job)
         return Response(serializer.data)
 
 
 class JobZipView(APIView):
+    """Download all job outputs as one ZIP.
+
+    The archive is prebuilt by the build_job_archive task; until it is ready
+    this answers 202 with archive_status 'building'. A ready archive is served
+    like any other media file (serve_media). If the build failed the ZIP is
+    streamed on the fly instead. Both paths send an exact Content-Length and
+    honour single byte-range requests for resuming.
+    """
     permission_classes = [AllowAny]
 
     def get(self, request, job_id):
@@ -270,33 +658,45 @@ class JobZipView(APIView):
         job_dir = Path(settings.MEDIA_ROOT) / 'jobs' / str(job.id)
         if not job_dir.exists():
             raise Http404('Job outputs not found')
-
-        zip_path = job_dir / f'job_{job.id}.zip'
-        source_files = [
-            path for path in job_dir.iterdir()
-            if path.is_file() and path.name != zip_path.name and path.suffix.lower() != '.json'
+        filename = f'job_{job.id}.zip'
+
+        if job.archive_status == 'ready':
+            archive = job_outputs(job, kinds=['archive']).first()
+            if archive is not None and (job_dir / archive.filename).is_file():
+                # Same path as /media/: the proxy (accel) or sendfile sends the
+                # bytes, not a Python loop in this worker.
+                response = serve_media(request, f'jobs/{job.id}/{archive.filename}')
+                response['Content-Disposition'] = f'attachment; filename="{filename}"'
+                return response
+
+        if job.archive_status == 'failed':
+            return self._stream_archive(request, job, job_dir, filename)
+
+        if job.status == 'done' and (job.archive_status != 'building' or self._build_is_stale(job)):
+            # Finished before archives were prebuilt, the file went missing, or
+            # the worker building it died without reporting back.
+            Job.objects.filter(id=job.id).update(archive_status='building', updated_at=django_timezone.now())
+            build_job_archive.delay(str(job.id))
+        return Response({'archive_status': 'building'}, status=status.HTTP_202_ACCEPTED)
+
+    def _build_is_stale(self, job):
+        stale_after = getattr(settings, 'ARCHIVE_BUILD_STALE_SECONDS', 3600)
+        return job.updated_at < django_timezone.now() - timedelta(seconds=stale_after)
+
+    def _stream_archive(self, request, job, job_dir, filename):
+        outputs = [
+            output for output in job_outputs(job).exclude(kind__in=['words', 'archive'])
+            if (job_dir / output.filename).is_file()
         ]
-        latest_source_mtime = max((path.stat().st_mtime for path in source_files), default=0)
-        zip_is_stale = (not zip_path.exists()) or (zip_path.stat().st_mtime < latest_source_mtime)
+        archive = ZipStream(
+            ZipEntry(job_dir / output.filename, crc=output.crc32)
+            for output in outputs
+        )
+        etag = '"%s"' % hashlib.sha256(
+            '|'.join(f'{output.filename}:{output.checksum}' for output in outputs).encode('utf-8')
+        ).hexdigest()[:32]
+        return ranged_response(request, archive.size, etag, archive.iter_range, 'application/zip', filename)
 
-        if zip_is_stale:
-            temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.zip')
-            temp_zip_path = Path(temp_file.name)
-            temp_file.close()
-            try:
-                with zipfile.ZipFile(temp_zip_path, 'w') as zipf:
-                    for path in source_files:
-                        # Video/audio sudah terkompres, jadi simpan tanpa kompresi ulang agar respons cepat.
-                        suffix = path.suffix.lower()
-                        compression = zipfile.ZIP_STORED if suffix in {'.mp4', '.mov', '.m4a', '.webm', '.mkv'} else zipfile.ZIP_DEFLATED
-                        zipf.write(path, arcname=path.name, compress_type=compression)
-                temp_zip_path.replace(zip_path)
-            finally:
-                if temp_zip_path.exists():
-                    temp_zip_path.unlink(missing_ok=True)
-
-        response = FileResponse(open(zip_path, 'rb'), as_attachment=True, filename=f'job_{job.id}.zip')
-        return response
 
 class JobViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
@@ -331,21 +731,18 @@ class SubsWordsView(APIView):
         if not job_dir.exists():
             return Response({}, status=status.HTTP_404_NOT_FOUND)
 
+        words_outputs = job_outputs(job, kinds=['words'])
         if clip_idx is not None:
-            fpath = job_dir / f'clip_{int(clip_idx):03d}_words.json'
-            if not fpath.exists():
+            output = words_outputs.filter(clip_index=int(clip_idx)).first()
+            if output is None:
                 return Response([], status=status.HTTP_200_OK)
-            data = json.loads(fpath.read_text(encoding='utf-8'))
+            data = json.loads((job_dir / output.filename).read_text(encoding='utf-8'))
             return Response(data)
 
         # return mapping of clip idx -> words list
         out = {}
-        for path in sorted(job_dir.glob('clip_*_words.json')):
-            # filename like clip_001_words.json
-            name = path.name
-            try:
-                idx = int(name.split('_')[1])
-            except Exception:
+        for output in words_outputs:
+            if output.clip_index is None:
                 continue
-            out[idx] = json.loads(path.read_text(encoding='utf-8'))
+            out[output.clip_index] = json.loads((job_dir / output.filename).read_text(encoding='utf-8'))
         return Response(out)
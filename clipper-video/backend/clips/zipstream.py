@@ -0,0 +1,246 @@
+"""Streaming ZIP writer with a layout fixed before the first byte is sent.
+
+Every entry is written with a data descriptor: the local header leaves the
+CRC and sizes zero (flag bit 3) and the real values follow the data and go
+in the central directory, so no header depends on the CRC. Sizes are known up front: video is stored as-is and
+small text files are deflated in memory while the layout is planned. That
+makes the archive length precomputable (Content-Length) and lets any byte
+range be regenerated on demand (HTTP Range resume) without a temp file.
+"""
+import struct
+import time
+import zlib
+from pathlib import Path
+
+CHUNK_SIZE = 1024 * 1024
+# Larger non-video files are stored rather than compressed in memory.
+DEFLATE_MAX_BYTES = 32 * 1024 * 1024
+STORED_SUFFIXES = {'.mp4', '.mov', '.m4a', '.webm', '.mkv', '.zip'}
+
+ZIP64_LIMIT = 0xFFFFFFFF
+ZIP_STORED = 0
+ZIP_DEFLATED = 8
+FLAG_DATA_DESCRIPTOR = 0x08
+FLAG_UTF8 = 0x800
+VERSION_DEFAULT = 20
+VERSION_ZIP64 = 45
+
+
+def _dos_datetime(timestamp):
+    tm = time.localtime(timestamp)
+    year = max(tm.tm_year, 1980)
+    dos_date = ((year - 1980) << 9) | (tm.tm_mon << 5) | tm.tm_mday
+    dos_time = (tm.tm_hour << 11) | (tm.tm_min << 5) | (tm.tm_sec // 2)
+    return dos_time, dos_date
+
+
+class ZipEntry:
+    def __init__(self, path, arcname=None, crc=None):
+        self.path = Path(path)
+        self.name = (arcname or self.path.name).encode('utf-8')
+        stat = self.path.stat()
+        self.size = stat.st_size
+        self.dos_time, self.dos_date = _dos_datetime(stat.st_mtime)
+        self.crc = crc
+        self.payload = None
+        self.method = ZIP_STORED
+        if self.path.suffix.lower() not in STORED_SUFFIXES and self.size <= DEFLATE_MAX_BYTES:
+            data = self.path.read_bytes()
+            compressor = zlib.compressobj(6, zlib.DEFLATED, -15)
+            self.payload = compressor.compress(data) + compressor.flush()
+            self.crc = zlib.crc32(data)
+            self.size = len(data)
+            self.method = ZIP_DEFLATED
+        self.compressed_size = len(self.payload) if self.payload is not None else self.size
+        self.zip64 = self.size >= ZIP64_LIMIT or self.compressed_size >= ZIP64_LIMIT
+        self.offset = 0
+
+    @property
+    def version(self):
+        return VERSION_ZIP64 if self.zip64 else VERSION_DEFAULT
+
+    def local_header(self):
+        # With a data descriptor the CRC and sizes are zero here; zip64
+        # entries mark the sizes 0xFFFFFFFF and zero them in the extra field.
+        extra = b''
+        size = compressed_size = 0
+        if self.zip64:
+            extra = struct.pack('<HHQQ', 0x0001, 16, 0, 0)
+            size = compressed_size = ZIP64_LIMIT
+        return struct.pack(
+            '<IHHHHHIIIHH',
+            0x04034B50,
+            self.version,
+            FLAG_DATA_DESCRIPTOR | FLAG_UTF8,
+            self.method,
+            self.dos_time,
+            self.dos_date,
+            0,
+            compressed_size,
+            size,
+            len(self.name),
+            len(extra),
+        ) + self.name + extra
+
+    def descriptor_size(self):
+        return 24 if self.zip64 else 16
+
+    def descriptor(self):
+        if self.zip64:
+            return struct.pack('<IIQQ', 0x08074B50, self.crc, self.compressed_size, self.size)
+        return struct.pack('<IIII', 0x08074B50, self.crc, self.compressed_size, self.size)
+
+    def central_header(self):
+        extra_fields = []
+        size = self.size
+        compressed_size = self.compressed_size
+        offset = self.offset
+        if self.zip64:
+            extra_fields.extend([self.size, self.compressed_size])
+            size = compressed_size = ZIP64_LIMIT
+        if self.offset >= ZIP64_LIMIT:
+            extra_fields.append(self.offset)
+            offset = ZIP64_LIMIT
+        extra = b''
+        if extra_fields:
+            extra = struct.pack(f'<HH{len(extra_fields)}Q', 0x0001, 8 * len(extra_fields), *extra_fields)
+        version = VERSION_ZIP64 if extra_fields else VERSION_DEFAULT
+        return struct.pack(
+            '<IHHHHHHIIIHHHHHII',
+            0x02014B50,
+            version,
+            version,
+            FLAG_DATA_DESCRIPTOR | FLAG_UTF8,
+            self.method,
+            self.dos_time,
+            self.dos_date,
+            self.crc,
+            compressed_size,
+            size,
+            len(self.name),
+            len(extra),
+            0,
+            0,
+            0,
+            0,
+            offset,
+        ) + self.name + extra
+
+    def central_header_size(self):
+        fields = (2 if self.zip64 else 0) + (1 if self.offset >= ZIP64_LIMIT else 0)
+        return 46 + len(self.name) + (4 + 8 * fields if fields else 0)
+
+
+class ZipStream:
+    """A ZIP archive over files on disk, served as byte ranges."""
+
+    def __init__(self, entries):
+        self.entries = list(entries)
+        position = 0
+        for entry in self.entries:
+            entry.offset = position
+            position += len(entry.local_header()) + entry.compressed_size + entry.descriptor_size()
+        self.central_offset = position
+        self.central_size = sum(entry.central_header_size() for entry in self.entries)
+        self.size = self.central_offset + self.central_size + len(self._end_records())
+
+    def _end_records(self):
+        count = len(self.entries)
+        needs_zip64 = (
+            count >= 0xFFFF
+            or self.central_offset >= ZIP64_LIMIT
+            or self.central_size >= ZIP64_LIMIT
+        )
+        records = b''
+        if needs_zip64:
+            zip64_end_offset = self.central_offset + self.central_size
+            records += struct.pack(
+                '<IQHHIIQQQQ',
+                0x06064B50,
+                44,
+                VERSION_ZIP64,
+                VERSION_ZIP64,
+                0,
+                0,
+                count,
+                count,
+                self.central_size,
+                self.central_offset,
+            )
+            records += struct.pack('<IIQI', 0x07064B50, 0, zip64_end_offset, 1)
+        records += struct.pack(
+            '<IHHHHIIH',
+            0x06054B50,
+            0,
+            0,
+            min(count, 0xFFFF),
+            min(count, 0xFFFF),
+            min(self.central_size, ZIP64_LIMIT),
+            min(self.central_offset, ZIP64_LIMIT),
+            0,
+        )
+        return records
+
+    def _segments(self):
+        """Yield (start, length, producer) for each part of the archive."""
+        for entry in self.entries:
+            header = entry.local_header()
+            position = entry.offset
+            yield position, len(header), lambda skip, take, data=header: iter([data[skip:skip + take]])
+            position += len(header)
+            yield position, entry.compressed_size, (
+                lambda skip, take, entry=entry: self._entry_data(entry, skip, take)
+            )
+            position += entry.compressed_size
+            yield position, entry.descriptor_size(), (
+                lambda skip, take, entry=entry: iter([self._ensure_crc(entry).descriptor()[skip:skip + take]])
+            )
+        yield self.central_offset, self.size - self.central_offset, self._central_directory
+
+    def _central_directory(self, skip, take):
+        data = b''.join(self._ensure_crc(entry).central_header() for entry in self.entries)
+        data += self._end_records()
+        yield data[skip:skip + take]
+
+    def _ensure_crc(self, entry):
+        if entry.crc is None:
+            crc = 0
+            with open(entry.path, 'rb') as handle:
+                for chunk in iter(lambda: handle.read(CHUNK_SIZE), b''):
+                    crc = zlib.crc32(chunk, crc)
+            entry.crc = crc
+        return entry
+
+    def _entry_data(self, entry, skip, take):
+        if entry.payload is not None:
+            yield entry.payload[skip:skip + take]
+            return
+        # Reading the whole file from the start: compute the CRC on the way.
+        track_crc = entry.crc is None and skip == 0 and take == entry.size
+        crc = 0
+        with open(entry.path, 'rb') as handle:
+            handle.seek(skip)
+            remaining = take
+            while remaining > 0:
+                chunk = handle.read(min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    raise IOError(f'{entry.path} shrank while streaming')
+                if track_crc:
+                    crc = zlib.crc32(chunk, crc)
+                remaining -= len(chunk)
+                yield chunk
+        if track_crc:
+            entry.crc = crc
+
+    def iter_range(self, start=0, end=None):
+        """Yield archive bytes from start to end inclusive."""
+        end = self.size - 1 if end is None else min(end, self.size - 1)
+        for seg_start, length, producer in self._segments():
+            seg_end = seg_start + length - 1
+            if length == 0 or seg_end < start:
+                continue
+            if seg_start > end:
+                break
+            skip = max(0, start - seg_start)
+            take = min(seg_end, end) - (seg_start + skip) + 1
+            yield from producer(skip, take)
@@ -40,6 +40,7 @@ export const jobAPI = {
   get: (id, config = {}) => apiClient.get(`/jobs/${id}/`, config),
   cancel: (id, token) => apiClient.post(`/jobs/${id}/cancel/`, { token }),
   downloadZipUrl: (id) => `${API_BASE_URL}/jobs/${id}/download-zip/`,
+  eventsUrl: (id) => `${API_BASE_URL}/jobs/${id}/events`,
   createLocal: (formData) => apiClient.post('/jobs/upload/', formData, {
     headers: { 'Content-Type': 'multipart/form-data' }
   })